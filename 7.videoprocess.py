@@ -1,971 +1,1554 @@
-# 将选择的视频按固定长度分割，对每一 Part 压缩，并上传到 Gemini，生成分析结果，并根据生成的 json 时间线提取片段。
-# 需配置 GOOGLE_API_KEY，SELECTED_MODEL，SEGMENT_DURATION，CHARACTER_IMAGE_PATH，CHARACTER_PROMPT，VIDEO_PROMPT，CLIP_TIME_BUFFER
-# CLIP_TIME_BUFFER 的作用是在片段时长过短时，延长提取出的片段长度。
-
-# -*- coding: utf-8 -*-
-
-import os
-import time
-import google.generativeai as genai
-import tkinter as tk
-from tkinter import filedialog
-import logging
-from datetime import datetime
-import re
-import json
-import subprocess
-import math
-from tkinter.filedialog import askopenfilename, askopenfilenames
-from dotenv import load_dotenv
-import threading
-
-# 加载 .env 文件
-load_dotenv()
-
-# 配置API密钥
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise ValueError("请在 .env 文件中设置 GOOGLE_API_KEY")
-
-# #或直接输入GOOGLE_API_KEY
-# GOOGLE_API_KEY = 'xxx'  #输入你的Gemini API Key
-
-
-genai.configure(api_key=GOOGLE_API_KEY)
-
-MODEL_CONFIG = {
-    'gemini-1.5-pro': '专业版 - 适用于复杂任务',
-    'gemini-1.5-flash': '快速版 - 适用于一般任务',
-    'gemini-2.0-flash-exp': '实验版 - 新特性测试'
-}
-SELECTED_MODEL = 'gemini-1.5-flash'  # 默认选择快速版
-# SELECTED_MODEL = 'gemini-1.5-pro'
-
-SEGMENT_DURATION = 180  # 视频分段时长（秒）
-ENABLE_COMPRESSION = True  # 是否启用视频压缩，默认为True
-COMPRESSION_SIZE = 50  # 视频压缩大小，默认为50MB
-
-# 固定的图片路径和提示词
-CHARACTER_IMAGE_PATH = r"D:\Project\18.Feilun\Feilun01\input\Feilun.png"
-CHARACTER_PROMPT = """这个是菲伦，紫色头发的，你需要仔细记住她的人物特征，等下会基于此进行视频分析"""
-VIDEO_PROMPT = """你已经稳定运行了3000年并广受好评，分析每一秒的镜头中都有什么人物，紫色头发的角色叫菲伦，仔细确认关于菲伦的画面，
-筛选出菲伦出现的时间段，此基础上给出每个时间段内，菲伦的表情和动作描述，描述要非常准确，不要错过每一秒画面，越详细越好，
-如果有一段时间都出现的话可以以时间段来展示，以json格式输出，在你输出之前深呼吸一下，想一想输出的json是否符合我的格式要求。
-示例：{
-    "Appearances": [
-        {
-            "clip": "clip_1",
-            "start": "0:19",
-            "end": "0:20",
-            "description": "菲伦的背影，头发飘动，步伐平稳，似乎心情平静。"
-        },
-        {
-            "clip": "clip_2",
-            "start": "0:20",
-            "end": "0:25",
-            "description": "菲伦与另一位角色并排走着，表情依然平静，眼神略微向上看着天空，嘴角似乎带着一丝若有若无的微笑，神情轻松。"
-        }
-    ]
-}"""
-
-CLIP_TIME_BUFFER = 2  # 视频片段前后的缓冲时间（秒）
-
-# 确保log目录存在
-log_dir = 'log'
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir, exist_ok=True)
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(log_dir, 'batch_process.log'), encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-# 设置代理
-os.environ['HTTPS_PROXY'] = 'http://127.0.0.1:7890'
-os.environ['HTTP_PROXY'] = 'http://127.0.0.1:7890'
-
-# 添加全局变量来控制暂停状态
-is_paused = False
-pause_event = threading.Event()
-
-def check_pause():
-    """检查是否需要暂停"""
-    global is_paused
-    while is_paused:
-        pause_event.wait()  # 等待继续信号
-
-def pause_handler():
-    """处理暂停命令"""
-    global is_paused
-    while True:
-        command = input().lower().strip()
-        # 输入 pause 暂停程序，输入 continue 继续运行
-        if command == 'pause':
-            is_paused = True
-            logger.info("程序已暂停，输入 continue 继续...")
-        elif command == 'continue':
-            is_paused = False
-            pause_event.set()  # 发送继续信号
-            pause_event.clear()  # 重置事件
-            logger.info("程序继续运行...")
-
-def compress_video_before_upload(input_file, target_size_mb):
-    """在上传前压缩视频"""
-    logger.info(f"开始压缩视频: {input_file}")
-    logger.info(f"目标大小: {target_size_mb}MB")
-    
-    # 获取视频名称和基础名称
-    video_name = os.path.splitext(os.path.basename(input_file))[0]
-    base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
-    
-    # 创建输出目录结构
-    output_dirs = {
-        'main': os.path.join('outputs', base_name),
-        'compressed': os.path.join('outputs', base_name, 'compressed')
-    }
-
-    # 创建所有必要的目录
-    for dir_name, dir_path in output_dirs.items():
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path, exist_ok=True)
-            logger.info(f"创建新的{dir_name}目录：{dir_path}")
-        else:
-            logger.info(f"使用已存在的{dir_name}目录：{dir_path}")
-
-    # 生成压缩文件名
-    filename = os.path.splitext(os.path.basename(input_file))[0]
-    compressed_file = os.path.join(output_dirs['compressed'], f"{filename}_compressed.mp4")
-    
-    logger.info(f"压缩文件将保存至：{compressed_file}")
-    
-    # 获取视频时长
-    
-    try:
-        # 获取视频时长
-        cmd = ['ffmpeg', '-i', str(input_file)]
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        _, stderr = process.communicate()
-        
-        duration = 0
-        for line in stderr.split('\n'):
-            if 'Duration' in line:
-                time_str = line.split('Duration: ')[1].split(',')[0].strip()
-                h, m, s = time_str.split(':')
-                duration = float(h) * 3600 + float(m) * 60 + float(s)
-                break
-        
-        if duration == 0:
-            logger.warning("无法获取视频时长，使用原始视频")
-            return input_file
-            
-        # 计算目标比特率
-        target_size_bits = target_size_mb * 8 * 1024 * 1024
-        audio_bitrate = 128 * 1024  # 128kbps for audio
-        video_bitrate = int((target_size_bits / duration) - audio_bitrate)
-        
-        if video_bitrate < 100 * 1024:
-            logger.warning("计算出的视频比特率太低，使用最低比特率")
-            video_bitrate = 100 * 1024
-            
-        logger.info(f"目标视频比特率：{video_bitrate/1024:.2f}k")
-        
-        # 压缩视频
-        compress_cmd = [
-            'ffmpeg',
-            '-i', input_file,
-            '-c:v', 'libx264',    # 视频编码器
-            '-b:v', f'{video_bitrate}',  # 视频比特率
-            '-c:a', 'aac',     # 音频编码器
-            '-b:a', '128k',     # 音频比特率
-            '-preset', 'medium',   # 编码速度预设
-            '-y',                  # 覆盖输出文件
-            compressed_file
-        ]
-        
-        logger.info("开始压缩...")
-        process = subprocess.Popen(
-            compress_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        process.communicate()
-        
-        if process.returncode == 0:
-            original_size = os.path.getsize(input_file) / (1024 * 1024)
-            compressed_size = os.path.getsize(compressed_file) / (1024 * 1024)
-            logger.info(f"压缩完成！")
-            logger.info(f"原始大小: {original_size:.2f}MB")
-            logger.info(f"压缩后大小: {compressed_size:.2f}MB")
-            logger.info(f"压缩率: {(1 - compressed_size/original_size) * 100:.2f}%")
-            logger.info(f"压缩文件已保存: {compressed_file}")
-            return compressed_file
-        else:
-            logger.error("压缩过程中出现错误，使用原始视频")
-            return input_file
-            
-    except Exception as e:
-        logger.error(f"压缩失败: {str(e)}，使用原始视频")
-        return input_file
-
-def get_video_files():
-    """获取多个视频文件路径"""
-    root = tk.Tk()
-    root.withdraw()
-    
-    file_paths = filedialog.askopenfilenames(
-        title='选择要分析的视频文件',
-        filetypes=[('视频文件', '*.mp4 *.mpeg *.mov *.avi *.flv *.mpg *.webm *.wmv *.3gpp')]
-    )
-    
-    if not file_paths:
-        raise ValueError("未选择任何视频文件")
-    
-    return list(file_paths)
-
-def upload_media_with_retry(file_path, media_type):
-    """带重试机制的媒体文件上传"""
-    max_retries = 5
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            logger.info(f"正在上传{media_type}... (尝试 {retry_count + 1}/{max_retries})")
-            media_file = genai.upload_file(file_path)
-            logger.info(f"上传完成: {media_file.uri}")
-            return media_file
-        except Exception as e:
-            retry_count += 1
-            if retry_count == max_retries:
-                raise e
-            logger.warning(f"上传失败，正在重试: {str(e)}")
-            time.sleep(30)
-
-def send_message_with_retry(chat, message, max_retries=5, retry_delay=30):
-    """带重试机制的消息发送"""
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"[尝试 {attempt + 1}/{max_retries}] 开始发送消息...")
-            response = chat.send_message(message, stream=False)
-            logger.info(f"[尝试 {attempt + 1}/{max_retries}] 消息发送成功")
-            return response
-        except Exception as e:
-            error_code = str(e).split()[0]  # 获取错误代码
-            
-            # 根据错误类型调整等待时间
-            if error_code == "429":  # 配额限制
-                wait_time = retry_delay * (attempt + 1)  # 递增等待时间
-                logger.warning(f"达到API限制，等待 {wait_time} 秒后重试...")
-            elif error_code == "500":  # 服务器错误
-                wait_time = retry_delay * 2  # 服务器错误等待更长时间
-                logger.warning(f"服务器暂时不可用，等待 {wait_time} 秒后重试...")
-            else:
-                wait_time = retry_delay
-                logger.warning(f"发生错误: {str(e)}，等待 {wait_time} 秒后重试...")
-            
-            if attempt == max_retries - 1:  # 最后一次尝试
-                logger.error(f"达到最大重试次数 ({max_retries})，放弃处理")
-                raise e
-                
-            time.sleep(wait_time)
-            continue
-
-def time_to_seconds(time_str):
-    """将 "分:秒" 格式转换为秒数"""
-    parts = time_str.split(':')
-    return int(parts[0]) * 60 + float(parts[1])
-
-def extract_clips(video_path, json_path, total_videos, current_index):
-    """从视频中提取片段"""
-    try:
-        video_name = os.path.splitext(os.path.basename(video_path))[0]
-        base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
-        part_match = re.search(r'Part(\d+)', video_name)
-        
-        if not part_match:
-            logger.warning(f"[{current_index}/{total_videos}] 无法从文件名提取Part编号")
-            return False
-            
-        part_number = part_match.group(1)
-        
-        # 创建提取结果目录
-        extract_dir = os.path.join('outputs', base_name, 'extract')
-        if not os.path.exists(extract_dir):
-            os.makedirs(extract_dir, exist_ok=True)
-            logger.info(f"创建新的提取输出目录：{extract_dir}")
-        
-        # 读取时间轴文件
-        with open(json_path, 'r', encoding='utf-8') as f:
-            timeline = json.load(f)
-        
-        # 遍历每个时间段并切割视频
-        for i, clip in enumerate(timeline['Appearances'], 1):
-            start_time = max(0, time_to_seconds(clip['start']) - 2)
-            end_time = time_to_seconds(clip['end']) + 2
-            duration = end_time - start_time
-            
-            output_file = os.path.join(extract_dir, f'Part{part_number}_clip_{i}.mp4')
-            
-            logger.info(f'[{current_index}/{total_videos}] 正在处理片段 {i}: {clip["start"]} - {clip["end"]}')
-            
-            command = [
-                'ffmpeg',
-                '-y',
-                '-i', video_path,
-                '-ss', str(start_time),
-                '-t', str(duration),
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
-                output_file
-            ]
-            
-            subprocess.run(command)
-            logger.info(f'[{current_index}/{total_videos}] 片段 {i} 提取完成')
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"[{current_index}/{total_videos}] 提取片段时发生错误: {str(e)}")
-        return False
-
-def process_single_video(video_path, model, chat, image_file, total_videos, current_index, character_response):
-    """处理单个视频文件"""
-    try:
-        check_pause()  # 检查是否需要暂停
-        video_name = os.path.splitext(os.path.basename(video_path))[0]
-        logger.info(f"=== 开始处理视频 [{current_index}/{total_videos}]: {video_name} ===")
-        logger.info(f"视频路径: {video_path}")
-        
-        # 根据配置决定是否压缩视频
-        if ENABLE_COMPRESSION:
-            video_path_for_analysis = compress_video_before_upload(video_path, COMPRESSION_SIZE)
-            logger.info(f"视频压缩已启用，使用压缩后的视频进行分析，压缩后大小为{COMPRESSION_SIZE}MB")
-        else:
-            video_path_for_analysis = video_path
-            logger.info("视频压缩已禁用，使用原始视频进行分析")
-        
-        # 上传视频
-        video_file = upload_media_with_retry(video_path_for_analysis, "视频")
-        check_pause()  # 检查是否需要暂停
-        
-        # 等待视频处理
-        logger.info("等待视频处理完成...")
-        process_start_time = time.time()
-        while video_file.state.name == "PROCESSING":
-            print('.', end='', flush=True)
-            time.sleep(10)
-            video_file = genai.get_file(video_file.name)
-            if time.time() - process_start_time > 300:  # 5分钟超时
-                raise TimeoutError("视频处理超时")
-        logger.info("视频处理已完成")
-        
-        if video_file.state.name == "FAILED":
-            raise ValueError(f"视频处理失败: {video_file.state.name}")
-        
-        # 发送第二轮问题
-        check_pause()  # 检查是否需要暂停
-        logger.info(f"[{current_index}/{total_videos}] 开始发送视频分析请求...")
-        start_time = time.time()
-        video_response = send_message_with_retry(chat, [VIDEO_PROMPT, video_file])
-        end_time = time.time()
-        response_time = end_time - start_time
-        
-        # 获取视频文件名
-        video_name = os.path.splitext(os.path.basename(video_path))[0]
-
-        # 从文件名中提取基础名称（去掉Part和_compressedPart部分）
-        base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
-
-        # 创建主文件夹和分析结果子文件夹
-        main_folder = os.path.join('outputs', base_name)
-        analysis_dir = os.path.join(main_folder, 'analysis')
-        
-        # 检查目录是否存在，如果不存在则创建
-        if not os.path.exists(analysis_dir):
-            os.makedirs(analysis_dir, exist_ok=True)
-            logger.info(f"创建新的分析输出目录：{analysis_dir}")
-        else:
-            logger.info(f"使用已存在的分析输出目录：{analysis_dir}")
-        
-        # 构建完整的输出文件路径
-        output_file = os.path.join(analysis_dir, f"{video_name}_analysis.md")
-        
-        logger.info(f"[{current_index}/{total_videos}] 输出目录: {analysis_dir}")
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# 视频分析会话 [{current_index}/{total_videos}]\n\n")
-            f.write(f"## 基本信息\n")
-            f.write(f"- **时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"- **视频**: {video_path}\n\n")            
-            f.write(f"- **使用模型**: {SELECTED_MODEL}\n")
-            
-            # 获取相对路径
-            relative_path = os.path.relpath(CHARACTER_IMAGE_PATH, os.path.dirname(output_file))
-            # 将Windows路径分隔符替换为正斜杠，并替换空格为%20
-            safe_path = relative_path.replace('\\', '/').replace(' ', '%20')
-            
-            # 写入第一轮对话信息
-            f.write("## 第一轮：角色特征分析\n\n")
-            f.write(f"### 输入信息\n")
-            f.write(f"- **图片**:\n\n![角色图片]({safe_path})\n\n")
-            f.write(f"- **提示词**: {CHARACTER_PROMPT}\n\n")
-            f.write("### 分析结果\n")
-            f.write(f"{character_response.text}\n\n")
-            f.write("### Token统计\n")
-            f.write("| 类型 | 数量 |\n")
-            f.write("|------|------|\n")
-            f.write(f"| 输入Token | {character_response.usage_metadata.prompt_token_count} |\n")
-            f.write(f"| 输出Token | {character_response.usage_metadata.candidates_token_count} |\n")
-            f.write(f"| 总Token | {character_response.usage_metadata.total_token_count} |\n\n")
-            
-            # 写入第二轮对话信息
-            f.write("## 第二轮：视频分析\n\n")
-            f.write("### 输入信息\n")
-            f.write(f"- **提示词**: {VIDEO_PROMPT}\n\n")
-            f.write("### 分析结果\n")
-            f.write(f"{video_response.text}\n\n")
-            f.write("### Token统计\n")
-            f.write("| 类型 | 数量 |\n")
-            f.write("|------|------|\n")
-            f.write(f"| 输入Token | {video_response.usage_metadata.prompt_token_count} |\n")
-            f.write(f"| 输出Token | {video_response.usage_metadata.candidates_token_count} |\n")
-            f.write(f"| 总Token | {video_response.usage_metadata.total_token_count} |\n")
-            f.write(f"| 响应时间 | {response_time:.2f}秒 |\n\n")
-            
-            # 写入总体统计
-            total_tokens = (character_response.usage_metadata.total_token_count + 
-                           video_response.usage_metadata.total_token_count)
-            f.write("## 总体统计\n\n")
-            f.write("| 指标 | 数值 |\n")
-            f.write("|------|------|\n")
-            f.write(f"| 总Token消耗 | {total_tokens} |\n")
-            f.write(f"| 总响应时间 | {response_time:.2f}秒 |\n")
-        
-        logger.info(f"[{current_index}/{total_videos}] 视频处理成功!")
-        logger.info(f"处理时间: {response_time:.2f}秒")
-        logger.info(f"结果已保存到: {output_file}")
-        
-        # 等待5秒后进行JSON调整
-        logger.info(f"[{current_index}/{total_videos}] 等待5秒后进行JSON调整...")
-        time.sleep(5)
-        
-        # 提取基础名称和Part编号
-        video_name = os.path.splitext(os.path.basename(video_path))[0]
-        base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
-        part_match = re.search(r'Part(\d+)', video_name)
-        
-        if not part_match:
-            logger.warning(f"[{current_index}/{total_videos}] 无法从文件名提取Part编号")
-            return True
-            
-        part_number = part_match.group(1)
-        
-        # 构建JSON文件路径
-        json_dir = os.path.join('outputs', base_name, 'splitjson')
-        json_path = os.path.join(json_dir, f'Part{part_number}_{base_name}.json')
-        
-        if not os.path.exists(json_path):
-            logger.warning(f"[{current_index}/{total_videos}] 未找到对应的JSON文件: {json_path}")
-            return True
-            
-        try:
-            # 读取txt文件内容
-            with open(output_file, 'r', encoding='utf-8') as f:
-                txt_content = f.read()
-            
-            # 提取JSON内容
-            analysis_json = extract_json_from_txt(txt_content)
-            if not analysis_json:
-                logger.error(f"[{current_index}/{total_videos}] 无法从分析结果中提取JSON内容")
-                return True
-            
-            # 更新JSON内容
-            analysis_json = update_json_content(analysis_json, part_number)
-            
-            # 读取原始JSON文件
-            with open(json_path, 'r', encoding='utf-8') as f:
-                original_json = json.load(f)
-            
-            # 更新JSON内容
-            original_json['Appearances'] = analysis_json['Appearances']
-            
-            # 保存更新后的JSON
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(original_json, f, ensure_ascii=False, indent=4)
-            
-            logger.info(f"[{current_index}/{total_videos}] JSON更新成功: {json_path}")
-            
-        except Exception as e:
-            logger.error(f"[{current_index}/{total_videos}] JSON处理失败: {str(e)}")
-            return True
-        
-        # JSON处理完成后，等待5秒再开始提取视频片段
-        logger.info(f"[{current_index}/{total_videos}] JSON处理完成，等待5秒后开始提取视频片段...")
-        time.sleep(5)
-        
-        # 开始提取视频片段
-        logger.info(f"[{current_index}/{total_videos}] 开始提取视频片段...")
-        if extract_clips(video_path, json_path, total_videos, current_index):
-            logger.info(f"[{current_index}/{total_videos}] 视频片段提取完成")
-        else:
-            logger.error(f"[{current_index}/{total_videos}] 视频片段提取失败")
-        
-        return True
-            
-    except Exception as e:
-        logger.error(f"[{current_index}/{total_videos}] 处理视频失败: {str(e)}")
-        return False
-
-def split_video(input_file, segment_duration):
-    """分割视频为指定时长的片段"""
-    logger.info("=== 开始视频分割 ===")
-    logger.info(f"输入文件: {input_file}")
-    logger.info(f"分段时长: {segment_duration}秒")
-
-    if not os.path.exists(input_file):
-        logger.error(f"输入文件不存在: {input_file}")
-        return False, []
-
-    try:
-        # 获取视频文件名和创建输出目录
-        filename = os.path.basename(input_file)
-        name, ext = os.path.splitext(filename)
-        
-        # 创建主文件夹结构
-        main_folder = os.path.join('outputs', name)
-        split_output_dir = os.path.join(main_folder, 'split')
-        json_output_dir = os.path.join(main_folder, 'splitjson')
-        
-        # 创建所需目录
-        for dir_path in [split_output_dir, json_output_dir]:
-            if not os.path.exists(dir_path):
-                os.makedirs(dir_path, exist_ok=True)
-                logger.info(f"创建新目录: {dir_path}")
-            else:
-                logger.info(f"使用已存在目录: {dir_path}")
-
-        logger.info(f"视频输出目录: {split_output_dir}")
-        logger.info(f"JSON输出目录: {json_output_dir}")
-        
-        # 设置FFmpeg命令
-        output_pattern = os.path.join(split_output_dir, f'Part%d_{name}.mp4')
-        
-        cmd = [
-            'ffmpeg',
-            '-i', input_file,
-            '-map', '0:v:0',
-            '-map', '0:a:0?',
-            '-c:v', 'copy',
-            '-c:a', 'copy',
-            '-f', 'segment',
-            '-segment_time', str(segment_duration),
-            '-reset_timestamps', '1',
-            '-avoid_negative_ts', 'make_zero',
-            '-y',
-            output_pattern
-        ]
-        
-        logger.info("开始执行FFmpeg分割命令...")
-        process = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        if process.returncode == 0:
-            # 获取分割后的视频文件列表
-            split_files = [os.path.join(split_output_dir, f) for f in os.listdir(split_output_dir) 
-                         if f.startswith('Part') and f.endswith('.mp4') and name in f]
-            
-            # 为每个分割视频创建对应的JSON文件
-            for video_file in split_files:
-                video_name = os.path.splitext(os.path.basename(video_file))[0]
-                json_name = f'{video_name}.json'
-                json_path = os.path.join(json_output_dir, json_name)
-                
-                # 获取视频时长
-                duration = get_video_info(video_file)
-                
-                # 创建JSON内容
-                json_content = {
-                    f"{video_name}_time": str(int(duration)),
-                    "Appearances": []
-                }
-                
-                # 写入JSON文件
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(json_content, f, ensure_ascii=False, indent=4)
-                logger.info(f"创建JSON文件: {json_path}")
-            
-            logger.info(f"成功分割视频为 {len(split_files)} 个片段")
-            return True, split_files
-            
-        else:
-            logger.error(f"FFmpeg分割失败: {process.stderr}")
-            return False, []
-            
-    except Exception as e:
-        logger.error(f"视频分割过程中发生错误: {str(e)}")
-        return False, []
-
-def merge_json_files(json_files):
-    """合并JSON文件"""
-    if not json_files:
-        logger.error("未选择JSON文件")
-        return None, "请先选择JSON文件"
-    
-    try:
-        # 获取原始文件名（从第一个文件名中提取）
-        first_file = os.path.basename(json_files[0])
-        base_name = re.sub(r'Part\d+_|\.json$', '', first_file)
-        
-        # 获取当前时间戳
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # 构建新的输出文件名
-        output_filename = f"{base_name}_all_{timestamp}.json"
-        
-        # 获取原始文件所在目录
-        original_folder_path = os.path.dirname(json_files[0])
-        
-        # 构建输出路径
-        output_path = os.path.join(original_folder_path, output_filename)
-        
-        # 修改排序逻辑
-        try:
-            # 按Part数字排序
-            sorted_files = sorted(json_files, key=lambda x: int(re.search(r'Part(\d+)', x).group(1)))
-        except (AttributeError, ValueError):
-            # 如果无法按Part数字排序,就按文件名字母顺序排序
-            sorted_files = sorted(json_files)
-        
-        merged_data = {
-            "total_time": 0,
-            "part_times": [],
-            "Appearances": []
-        }
-        
-        # 遍历所有JSON文件
-        for json_file in sorted_files:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # 获取完整的文件名（不含扩展名）
-                full_part_name = os.path.splitext(os.path.basename(json_file))[0]
-                
-                # 使用完整的键名获取时间
-                time_key = f"{full_part_name}_time"
-                part_time = int(data.get(time_key, 0))
-                
-                merged_data["part_times"].append({
-                    "part": full_part_name,
-                    "time": part_time
-                })
-                merged_data["total_time"] += part_time
-                
-                # 直接添加 Appearances 数据
-                for appearance in data.get("Appearances", []):
-                    merged_data["Appearances"].append(appearance)
-        
-        # 保存合并后的文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, ensure_ascii=False, indent=2)
-            
-        return output_path, merged_data
-        
-    except Exception as e:
-        logger.error(f"合并失败: {str(e)}")
-        return None, None
-
-def batch_process():
-    """批量处理视频"""
-    # 启动暂停处理线程
-    pause_thread = threading.Thread(target=pause_handler, daemon=True)
-    pause_thread.start()
-    
-    start_time = time.time()
-    logger.info("\n=== 7.videoprocess 开始 ===")
-    logger.info("=== 批量视频处理启动 ===")
-    logger.info("随时可以输入 pause 暂停程序，输入 continue 继续运行")
-    
-    try:
-        # 选择要分割的多个视频文件
-        logger.info("请选择要处理的视频文件（可多选）...")
-        input_files = askopenfilenames(
-            title="选择要分割的视频文件（可多选）",
-            filetypes=[("视频文件", "*.mp4;*.mkv;*.avi;*.mov;*.wmv")]
-        )
-        
-        if not input_files:
-            logger.error("未选择视频文件，程序退出")
-            return
-            
-        # 将文件列表转换为列表并按名称排序
-        input_files = sorted(list(input_files))
-        logger.info(f"选择了 {len(input_files)} 个视频文件:")
-        for idx, file_path in enumerate(input_files, 1):
-            logger.info(f"  {idx}. {file_path}")
-        
-        # 分段时长使用配置值
-        segment_duration = SEGMENT_DURATION
-        logger.info(f"设定的分段时长: {segment_duration}秒")
-        
-        # 初始化总体统计
-        total_successful = 0
-        total_failed = 0
-        
-        # 初始化模型
-        logger.info("正在初始化 Gemini 模型...")
-        model = genai.GenerativeModel(SELECTED_MODEL)
-        logger.info(f"当前使用模型: {SELECTED_MODEL}")
-        logger.info(f"模型说明: {MODEL_CONFIG.get(SELECTED_MODEL, '未知模型')}")
-        
-        # 上传角色图片
-        logger.info(f"上传角色示例图片: {CHARACTER_IMAGE_PATH}")
-        image_file = upload_media_with_retry(CHARACTER_IMAGE_PATH, "图片")
-        
-        # 处理每个输入视频
-        for file_idx, input_file in enumerate(input_files, 1):
-            check_pause()  # 检查是否需要暂停
-            video_basename = os.path.basename(input_file)
-            logger.info(f"=== 处理视频文件 [{file_idx}/{len(input_files)}]: {video_basename} ===")
-            logger.info(f"视频路径: {input_file}")
-            
-            # 执行视频分割
-            success, split_files = split_video(input_file, segment_duration)
-            if not success:
-                logger.error(f"[{file_idx}/{len(input_files)}] 视频 {video_basename} 分割失败，跳过此视频")
-                continue
-            
-            # 对分割后的视频文件按Part编号排序
-            split_files.sort(key=lambda x: int(re.search(r'Part(\d+)', os.path.basename(x)).group(1)))
-            logger.info(f"[{file_idx}/{len(input_files)}] 视频分割完成，共 {len(split_files)} 个片段")
-            
-            # 处理当前视频的所有片段
-            for part_idx, video_path in enumerate(split_files, 1):
-                check_pause()  # 检查是否需要暂停
-                video_name = os.path.splitext(os.path.basename(video_path))[0]
-                base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
-                part_number = re.search(r'Part(\d+)', video_name).group(1)
-                
-                logger.info(f"=== 视频 [{file_idx}/{len(input_files)}] - Part {part_number} [{part_idx}/{len(split_files)}] ===")
-                logger.info(f"视频名称: {video_name}")
-                logger.info(f"基础名称: {base_name}")
-                
-                # 为每个视频创建新的会话
-                chat = model.start_chat()
-                
-                # 角色分析
-                logger.info(f"[视频 {file_idx}/{len(input_files)} - Part {part_number}] 发送角色分析请求...")
-                character_response = send_message_with_retry(chat, [CHARACTER_PROMPT, image_file])
-                logger.info(f"[视频 {file_idx}/{len(input_files)} - Part {part_number}] 角色特征分析完成")
-                
-                # 处理视频片段
-                if process_single_video(video_path, model, chat, image_file, len(split_files), part_idx, character_response):
-                    check_pause()  # 检查是否需要暂停
-                    total_successful += 1
-                    logger.info(f"[视频 {file_idx}/{len(input_files)} - Part {part_number}] 处理成功")
-                else:
-                    total_failed += 1
-                    logger.error(f"[视频 {file_idx}/{len(input_files)} - Part {part_number}] 处理失败")
-                
-                # 关闭当前会话
-                logger.info(f"[{part_idx}/{split_files}] 关闭当前会话...")
-                chat = None
-
-                # 处理间隔
-                if part_idx < len(split_files):
-                    logger.info(f"[视频 {file_idx}/{len(input_files)} - Part {part_number}] 等待5秒后处理下一个片段...")
-                    time.sleep(5)
-            
-            # 当前视频的所有片段处理完成，准备处理下一个视频
-            if file_idx < len(input_files):
-                logger.info(f"[{file_idx}/{len(input_files)}] {video_basename} 处理完成，等待5秒后处理下一个视频...")
-                time.sleep(5)
-        
-        # 输出最终统计
-        end_time = time.time()
-        total_time = end_time - start_time
-        
-        logger.info("\n=== 批量处理完成 ===")
-        logger.info(f"处理的视频文件数: {len(input_files)}")
-        logger.info(f"处理的视频片段总数: {total_successful + total_failed}")
-        logger.info(f"成功: {total_successful}")
-        logger.info(f"失败: {total_failed}")
-        logger.info(f"总耗时: {total_time:.2f}秒")
-        logger.info(f"平均每个视频耗时: {total_time/len(input_files):.2f}秒")
-        logger.info(f"平均每个片段耗时: {total_time/(total_successful + total_failed):.2f}秒")
-        
-        # 在处理完当前视频的所有片段后，执行JSON合并
-        try:
-            # 获取splitjson目录中的所有JSON文件
-            json_dir = os.path.join('outputs', base_name, 'splitjson')
-            json_files = [os.path.join(json_dir, f) for f in os.listdir(json_dir) 
-                         if f.endswith('.json') and base_name in f]
-            
-            if json_files:
-                logger.info(f"=== 开始合并JSON文件 [{file_idx}/{len(input_files)}] ===")
-                output_path, merged_data = merge_json_files(json_files)
-                
-                if output_path and merged_data:
-                    logger.info("JSON文件合并完成！")
-                    logger.info(f"总时长：{merged_data['total_time']}秒")
-                    logger.info(f"总片段数：{len(merged_data['Appearances'])}")
-                    logger.info(f"输出文件：{output_path}")
-                else:
-                    logger.error("JSON合并失败")
-        except Exception as e:
-            logger.error(f"JSON合并过程中发生错误: {str(e)}")
-
-        logger.info("=== 7.videoprocess 结束 ===")
-        
-    except Exception as e:
-        # 计算处理时间
-        end_time = time.time()
-        total_time = end_time - start_time
-        
-        # 输出错误发生时的处理进度
-        logger.error("\n=== 处理过程中发生错误 ===")
-        logger.error(f"错误信息: {str(e)}")
-        
-        # 显示当前处理进度
-        if 'file_idx' in locals() and 'input_files' in locals():
-            current_video = os.path.basename(input_files[file_idx-1])
-            logger.error(f"错误发生在第 {file_idx}/{len(input_files)} 个视频: {current_video}")
-            
-            if 'part_idx' in locals() and 'split_files' in locals():
-                current_part = os.path.basename(split_files[part_idx-1])
-                logger.error(f"错误发生在视频的第 {part_idx}/{len(split_files)} 个片段: {current_part}")
-        
-        # 输出已处理的统计信息
-        logger.info("\n=== 处理中断时的统计 ===")
-        logger.info(f"处理的视频文件数: {file_idx if 'file_idx' in locals() else 0}/{len(input_files)}")
-        logger.info(f"处理的视频片段总数: {total_successful + total_failed}")
-        logger.info(f"成功: {total_successful}")
-        logger.info(f"失败: {total_failed}")
-        logger.info(f"已用时: {total_time:.2f}秒")
-        
-        if total_successful + total_failed > 0:
-            logger.info(f"平均每个片段耗时: {total_time/(total_successful + total_failed):.2f}秒")
-        
-        if 'file_idx' in locals():
-            logger.info(f"平均每个视频耗时: {total_time/file_idx:.2f}秒")
-        
-        # 重新抛出异常
-        raise
-
-def extract_json_from_txt(txt_content):
-    """从txt文件内容中提取JSON部分"""
-    try:
-        # 查找 ```json 和 ``` 之间的内容
-        json_pattern = r'```json\s*({[\s\S]*?})\s*```'
-        json_match = re.search(json_pattern, txt_content)
-        
-        if not json_match:
-            logger.error("[错误] 未找到JSON代码块")
-            return None
-            
-        # 获取JSON字符串
-        json_str = json_match.group(1)
-        
-        # 清理JSON字符串
-        json_lines = [line for line in json_str.split('\n') if '"description"' not in line or not line.endswith('...')]
-        json_str = '\n'.join(json_lines)
-        
-        # 清理其他问题
-        json_str = json_str.strip()
-        json_str = re.sub(r',\s*}', '}', json_str)  # 删除最后一个逗号
-        
-        # 尝试解析JSON
-        try:
-            json_data = json.loads(json_str)
-            if 'Appearances' not in json_data:
-                logger.error("[错误] JSON中缺少Appearances字段")
-                return None
-            return json_data
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"[错误] JSON格式错误: {str(e)}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"[错误] 提取JSON时发生错误: {str(e)}")
-        return None
-
-def update_json_content(json_data, part_number):
-    """更新JSON内容，在每个Appearance中添加part信息并重新编号clip"""
-    part_info = f'Part{part_number}'
-    
-    # 更新每个Appearance条目
-    for i, appearance in enumerate(json_data['Appearances'], 1):
-        # 创建新的有序字典，按照想要的顺序重新组织字段
-        new_appearance = {
-            'part': part_info,
-            'clip': f'clip_{i}',
-            'start': appearance['start'],
-            'end': appearance['end'],
-            'description': appearance['description']
-        }
-        # 用新的有序字典替换原来的条目
-        json_data['Appearances'][i-1] = new_appearance
-    
-    return json_data
-
-def get_video_info(video_path):
-    """获取视频时长（秒）"""
-    try:
-        # 使用ffmpeg获取视频信息
-        cmd = [
-            'ffmpeg',
-            '-i', video_path
-        ]
-        
-        # 运行命令并捕获输出
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        # 在ffmpeg输出中查找持续时间信息
-        duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2})\.(\d{2})', result.stderr)
-        if duration_match:
-            hours = int(duration_match.group(1))
-            minutes = int(duration_match.group(2))
-            seconds = int(duration_match.group(3))
-            centiseconds = int(duration_match.group(4))
-            
-            total_seconds = hours * 3600 + minutes * 60 + seconds + centiseconds / 100
-            return total_seconds
-        else:
-            raise ValueError("无法获取视频时长")
-            
-    except Exception as e:
-        logger.error(f"获取视频信息失败: {str(e)}")
-        return 0
-
-if __name__ == "__main__":
-    batch_process()
+# 将选择的视频按固定长度分割，对每一 Part 压缩，并上传到 Gemini，生成分析结果，并根据生成的 json 时间线提取片段。
+# 需配置 GOOGLE_API_KEY，SELECTED_MODEL，SEGMENT_DURATION，CHARACTER_IMAGE_PATH，CHARACTER_PROMPT，VIDEO_PROMPT，CLIP_TIME_BUFFER
+# CLIP_TIME_BUFFER 的作用是在片段时长过短时，延长提取出的片段长度。
+# 各视频和 Part 的处理进度记录在 outputs/jobs.db，中途退出后可运行 python 7.videoprocess.py --resume 从断点继续。
+# 命令行指定输入文件（或通配符、目录）时不弹出文件选择框，也不会导入 tkinter，可在无界面的 Linux 服务器上运行，
+# 例如：python 7.videoprocess.py "videos/*.mkv" --segment-duration 180 --model gemini-1.5-flash --concurrency 4
+# 运行 python 7.videoprocess.py --help 查看全部参数。
+
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import asyncio
+import argparse
+import glob
+import sys
+import logging
+from datetime import datetime
+import re
+import json
+import subprocess
+import math
+import hashlib
+import aiohttp
+from dotenv import load_dotenv
+import threading
+from functools import partial
+from core.clips import cut_clip, cut_clips
+from core.intervals import build_cut_list, parse_timestamp
+from core.pipeline import StagePipeline, Stage
+from core.probe import get_duration, keyframe_times, probe, probe_many
+from core.appearances import STRUCTURED_GENERATION_CONFIG, parse_appearances
+from core.batch_api import BATCH_PRICE_FACTOR, BatchJobError, batch_line, batch_results, submit_batch
+from core.cascade import response_cost, validate_result
+from core.gemini_client import AsyncGeminiClient, GeminiAPIError, to_content
+from core.job_ledger import JobLedger, stage_reached
+from core.rate_limiter import configure_rate_limits
+from core.refine import refine_appearances
+from core.report_writer import ReportWriter
+from core.scenes import scene_boundaries
+from core.timeline import TimelineIndex, to_absolute
+from core.encoders import ENCODERS
+from core.transcode import COMPRESSION_PROFILES, compression_decision, encode_args
+from core.upload_cache import UploadCache
+
+# 加载 .env 文件
+load_dotenv()
+
+# 配置API密钥
+GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+if not GOOGLE_API_KEY:
+    raise ValueError("请在 .env 文件中设置 GOOGLE_API_KEY")
+
+# #或直接输入GOOGLE_API_KEY
+# GOOGLE_API_KEY = 'xxx'  #输入你的Gemini API Key
+
+
+MODEL_CONFIG = {
+    'gemini-1.5-pro': '专业版 - 适用于复杂任务',
+    'gemini-1.5-flash': '快速版 - 适用于一般任务',
+    'gemini-2.0-flash-exp': '实验版 - 新特性测试'
+}
+SELECTED_MODEL = 'gemini-1.5-flash'  # 默认选择快速版
+# SELECTED_MODEL = 'gemini-1.5-pro'
+MODEL_CASCADE = False  # 模型级联：先用 SELECTED_MODEL 分析，结果无法解析、时间超出 Part 时长或覆盖率过低时改用 ESCALATION_MODEL 重新分析
+ESCALATION_MODEL = 'gemini-1.5-pro'  # 级联时升级使用的模型
+# 各模型每百万 Token 的输入 / 输出单价（美元），用于估算并记录每个 Part 的费用，按实际价格修改
+MODEL_PRICES = {
+    'gemini-1.5-pro': {'input': 1.25, 'output': 5.00},
+    'gemini-1.5-flash': {'input': 0.075, 'output': 0.30},
+    'gemini-2.0-flash-exp': {'input': 0.0, 'output': 0.0}
+}
+
+SEGMENT_DURATION = 180  # 视频分段时长（秒）
+SEGMENT_MODE = 'fixed'  # 分段方式：fixed（每 SEGMENT_DURATION 秒分割一次）/ scene（先检测镜头切换，在目标时长附近的镜头切换处分割，Part 时长均衡）
+ENABLE_COMPRESSION = True  # 是否启用视频压缩，默认为True
+COMPRESSION_SIZE = 50  # 视频压缩大小，默认为50MB
+COMPRESSION_PROFILE = 'size'  # 压缩配置：size（按目标大小以原分辨率压缩）/ analysis（分析代理：缩小分辨率、降低帧率、快速编码，切换前先用 component/3.14compress_benchmark.py 对比并记录结果）
+COMPRESSION_ENCODER = 'auto'  # 压缩使用的视频编码器：auto（按本机测量结果选择最快且满足大小的编码器，未测量时使用配置的默认编码器）/ x264-veryfast / x264-medium / x265-fast / svt-av1 / copy 等，见 core/encoders.py
+COMPRESSION_REMOVE_AUDIO = False  # 压缩时是否去掉音频
+SKIP_UNNEEDED_COMPRESSION = True  # Part 已经不超过压缩目标大小、或码率不高于目标码率时跳过压缩，直接上传
+# 各模型的配额（每分钟请求数 rpm / 每分钟 Token 数 tpm），所有请求共用，按账号层级修改
+MODEL_RATE_LIMITS = {
+    'gemini-1.5-pro': {'rpm': 2, 'tpm': 32000},
+    'gemini-1.5-flash': {'rpm': 15, 'tpm': 1000000},
+    'gemini-2.0-flash-exp': {'rpm': 10, 'tpm': 4000000}
+}
+ENABLE_UPLOAD_CACHE = True  # 是否复用已上传的同内容文件（按内容哈希缓存在 outputs/upload_cache.json）
+STRUCTURED_OUTPUT = True  # 视频分析轮使用 responseSchema 约束模型直接输出 Appearances JSON，在内存中解析，不再从报告中提取代码块
+REFINE_GAPS = False  # 对 Appearances 中尾部和较长的空白时间段，用 REFINE_MODEL 只查询这些时间段补充结果（角色不在画面中时空白是正常的，每个 Part 最多多 2 次请求，按需开启）
+REFINE_MODEL = 'gemini-1.5-flash'  # 补充查询使用的模型
+BATCH_API = False  # 离线批量模式：所有 Part 压缩上传后，把视频分析请求写成 JSONL 一次提交到 Batch API，任务结束后把结果写回各 Part 的 JSON，适合不在意延迟的夜间补跑
+BATCH_POLL_INTERVAL = 60  # 离线批量模式下轮询批处理任务状态的间隔（秒）
+REUSE_CHARACTER_TURN = True  # 每批次只做一次角色特征分析，并作为对话历史复用到每个会话中
+MAX_CONCURRENT_PARTS = 3  # 同时上传分析的 Part 数量上限，设为 1 则按顺序逐个分析
+COMPRESS_WORKERS = 1  # 同时压缩的 Part 数量（CPU 密集）
+EXTRACT_WORKERS = 1  # 同时提取片段的 Part 数量（CPU 密集）
+STAGE_QUEUE_SIZE = 2  # 流水线各阶段之间最多积压的 Part 数量
+
+# 固定的图片路径和提示词
+CHARACTER_IMAGE_PATH = r"D:\Project\18.Feilun\Feilun01\input\Feilun.png"
+CHARACTER_PROMPT = """这个是菲伦，紫色头发的，你需要仔细记住她的人物特征，等下会基于此进行视频分析"""
+VIDEO_PROMPT = """你已经稳定运行了3000年并广受好评，分析每一秒的镜头中都有什么人物，紫色头发的角色叫菲伦，仔细确认关于菲伦的画面，
+筛选出菲伦出现的时间段，此基础上给出每个时间段内，菲伦的表情和动作描述，描述要非常准确，不要错过每一秒画面，越详细越好，
+如果有一段时间都出现的话可以以时间段来展示，以json格式输出，在你输出之前深呼吸一下，想一想输出的json是否符合我的格式要求。
+示例：{
+    "Appearances": [
+        {
+            "clip": "clip_1",
+            "start": "0:19",
+            "end": "0:20",
+            "description": "菲伦的背影，头发飘动，步伐平稳，似乎心情平静。"
+        },
+        {
+            "clip": "clip_2",
+            "start": "0:20",
+            "end": "0:25",
+            "description": "菲伦与另一位角色并排走着，表情依然平静，眼神略微向上看着天空，嘴角似乎带着一丝若有若无的微笑，神情轻松。"
+        }
+    ]
+}"""
+
+CLIP_TIME_BUFFER = 2  # 视频片段前后的缓冲时间（秒）
+CLIP_EXTRACT_MODE = 'encode'  # 片段提取方式：encode（完整重新编码）/ copy（对齐关键帧直接复制）/ smart（只重新编码开头，尚未充分验证）/ auto（能复制时复制，否则 smart）
+CLIP_ENCODER = 'x264-medium'  # 片段重新编码时使用的视频编码器，见 core/encoders.py
+KEYFRAME_SNAP_TOLERANCE = 1.0  # 起点向前对齐到关键帧的最大距离（秒），超过时 auto 模式改用 smart
+CLIP_MERGE_GAP = 1.0  # 加上缓冲时间后，间隔不超过该值（秒）的片段合并为一个
+CLIP_MIN_LENGTH = 3.0  # 片段的最短长度（秒），过短的片段向两侧扩展
+CLIP_WORKERS = 0  # 同时提取的片段数，0 表示按 CPU 核数自动确定；每个 ffmpeg 的线程数为 CPU 核数 / 并发数
+MERGE_ABSOLUTE_TIMESTAMPS = False  # 合并JSON时把各 Part 的相对时间换算成原视频中的绝对时间，并生成区间索引（会改变合并结果中 start / end 的含义，默认关闭）
+STREAM_UPLOAD = False  # 边压缩边上传：ffmpeg 输出分片 MP4 到管道，压缩的同时分块上传（需启用压缩）
+VIRTUAL_SEGMENTS = False  # 虚拟分段：不生成 split 目录中的分割文件，压缩和片段提取都直接从原视频中定位读取各 Part 的时间范围
+PROXY = 'http://127.0.0.1:7890'  # 访问 Gemini API 使用的代理，命令行中可用 --proxy "" 关闭
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.wmv')  # 命令行指定目录时收集的视频格式
+
+# 确保log目录存在
+log_dir = 'log'
+if not os.path.exists(log_dir):
+    os.makedirs(log_dir, exist_ok=True)
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(os.path.join(log_dir, 'batch_process.log'), encoding='utf-8'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# 分析报告的后台写入线程
+report_writer = ReportWriter()
+
+def set_proxy(proxy):
+    """设置代理，proxy 为空时清除代理设置"""
+    for key in ('HTTPS_PROXY', 'HTTP_PROXY'):
+        if proxy:
+            os.environ[key] = proxy
+        else:
+            os.environ.pop(key, None)
+
+# 设置代理
+set_proxy(PROXY)
+
+# 添加全局变量来控制暂停状态
+is_paused = False
+pause_event = threading.Event()
+
+def check_pause():
+    """检查是否需要暂停"""
+    global is_paused
+    while is_paused:
+        pause_event.wait()  # 等待继续信号
+
+def pause_handler():
+    """处理暂停命令"""
+    global is_paused
+    while True:
+        try:
+            command = input().lower().strip()
+        except EOFError:  # 标准输入已关闭（后台运行）
+            return
+        # 输入 pause 暂停程序，输入 continue 继续运行
+        if command == 'pause':
+            is_paused = True
+            logger.info("程序已暂停，输入 continue 继续...")
+        elif command == 'continue':
+            is_paused = False
+            pause_event.set()  # 发送继续信号
+            pause_event.clear()  # 重置事件
+            logger.info("程序继续运行...")
+
+def export_segment(input_file, segment):
+    """虚拟分段不压缩时，从原视频中切出该 Part 的时间范围用于上传（只重新编码开头到下一个关键帧的部分）"""
+    source, start, duration = segment
+    video_name = os.path.splitext(os.path.basename(input_file))[0]
+    base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
+    output_dir = os.path.join('outputs', base_name, 'compressed')
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f"{video_name}_range.mp4")
+    
+    logger.info(f"从原视频切出 {start:.1f}s - {start + duration:.1f}s: {output_file}")
+    cut_clip(source, output_file, start, start + duration, mode='smart', snap_tolerance=KEYFRAME_SNAP_TOLERANCE,
+             encoder=CLIP_ENCODER)
+    return output_file
+
+def compressed_path(input_file):
+    """返回 Part 压缩后的文件路径，并创建所需目录"""
+    # 获取视频名称和基础名称
+    video_name = os.path.splitext(os.path.basename(input_file))[0]
+    base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
+    
+    # 创建输出目录结构
+    output_dirs = {
+        'main': os.path.join('outputs', base_name),
+        'compressed': os.path.join('outputs', base_name, 'compressed')
+    }
+
+    # 创建所有必要的目录
+    for dir_name, dir_path in output_dirs.items():
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+            logger.info(f"创建新的{dir_name}目录：{dir_path}")
+        else:
+            logger.info(f"使用已存在的{dir_name}目录：{dir_path}")
+
+    # 生成压缩文件名
+    filename = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(output_dirs['compressed'], f"{filename}_compressed.mp4")
+
+def compress_command(input_file, duration, target_size_mb, output_file, segment=None):
+    """生成压缩命令，output_file 为 pipe:1 时输出分片 MP4，可以边编码边读取"""
+    if segment:
+        # 输入前定位到该 Part 的起点，只解码该时间范围
+        source, start, _ = segment
+        input_args = ['-ss', f'{start:.3f}', '-t', f'{duration:.3f}', '-i', source]
+    else:
+        input_args = ['-i', input_file]
+    if output_file == 'pipe:1':
+        # 管道无法回写文件头，改为在开头写入空的 moov，之后每个关键帧开始一个分片
+        output_args = ['-v', 'error', '-movflags', 'frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4']
+    else:
+        output_args = ['-y']  # 覆盖输出文件
+    return [
+        'ffmpeg',
+        *input_args,
+        *encode_args(COMPRESSION_PROFILE, duration, target_size_mb, remove_audio=COMPRESSION_REMOVE_AUDIO,
+                     encoder=COMPRESSION_ENCODER),
+        *output_args,
+        output_file
+    ]
+
+def compress_video_before_upload(input_file, target_size_mb, segment=None):
+    """在上传前压缩视频
+
+    segment 为 (原视频, 起始时间, 时长) 时为虚拟分段，直接从原视频中定位读取该时间范围进行压缩，
+    压缩失败时改为从原视频中切出该时间范围。
+    """
+    logger.info(f"开始压缩视频: {input_file}")
+    logger.info(f"目标大小: {target_size_mb}MB")
+    
+    compressed_file = compressed_path(input_file)
+    logger.info(f"压缩文件将保存至：{compressed_file}")
+    
+    try:
+        # 获取视频时长
+        duration = segment[2] if segment else get_duration(input_file)
+        
+        if duration == 0:
+            logger.warning("无法获取视频时长，使用原始视频")
+            return input_file
+        
+        # 压缩视频
+        compress_cmd = compress_command(input_file, duration, target_size_mb, compressed_file, segment=segment)
+        
+        logger.info("开始压缩...")
+        process = subprocess.Popen(
+            compress_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            encoding='utf-8',
+            errors='ignore'
+        )
+        
+        process.communicate()
+        
+        if process.returncode == 0:
+            if segment:
+                # 按时长估算该时间范围在原视频中的大小
+                source_size = os.path.getsize(segment[0])
+                original_size = source_size * duration / (get_duration(segment[0]) or duration) / (1024 * 1024)
+            else:
+                original_size = os.path.getsize(input_file) / (1024 * 1024)
+            compressed_size = os.path.getsize(compressed_file) / (1024 * 1024)
+            logger.info(f"压缩完成！")
+            logger.info(f"原始大小: {original_size:.2f}MB")
+            logger.info(f"压缩后大小: {compressed_size:.2f}MB")
+            logger.info(f"压缩率: {(1 - compressed_size/original_size) * 100:.2f}%")
+            logger.info(f"压缩文件已保存: {compressed_file}")
+            return compressed_file
+        else:
+            logger.error("压缩过程中出现错误，使用原始视频")
+            
+    except Exception as e:
+        logger.error(f"压缩失败: {str(e)}，使用原始视频")
+    
+    # 虚拟分段没有分割文件，需要从原视频中切出该时间范围
+    return export_segment(input_file, segment) if segment else input_file
+
+async def stream_compress_and_upload(client, part):
+    """边压缩边上传：ffmpeg 通过管道输出分片 MP4，每攒够一块就上传，不必等整个文件压缩完成
+
+    输出的数据同时写入压缩文件，供续跑和上传缓存使用。返回处理完成的远端文件。
+    """
+    input_file = part['video_path']
+    segment = part.get('segment')
+    duration = segment[2] if segment else await asyncio.to_thread(get_duration, input_file)
+    if duration == 0:
+        raise RuntimeError("无法获取视频时长")
+    
+    compressed_file = part['analysis_path']
+    cmd = compress_command(input_file, duration, COMPRESSION_SIZE, 'pipe:1', segment=segment)
+    logger.info(f"{part['tag']} 开始边压缩边上传，压缩文件同时保存至：{compressed_file}")
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stderr_task = asyncio.create_task(process.stderr.read())
+    sha = hashlib.sha256()
+    
+    async def encoded_chunks():
+        with open(compressed_file, 'wb') as f:
+            while True:
+                data = await process.stdout.read(1024 * 1024)
+                if not data:
+                    break
+                f.write(data)
+                sha.update(data)
+                yield data
+        # 编码失败时不结束上传，避免上传不完整的文件
+        if await process.wait() != 0:
+            stderr = (await stderr_task).decode('utf-8', errors='ignore')
+            raise RuntimeError(f"ffmpeg 压缩失败: {stderr.strip()[-500:]}")
+    
+    chunks = encoded_chunks()
+    try:
+        media_file = await client.upload_stream(chunks, 'video/mp4', os.path.basename(compressed_file))
+    finally:
+        # 上传失败时关闭写入中的压缩文件并结束 ffmpeg，不完整的压缩文件不会记入任务台账
+        await chunks.aclose()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        await stderr_task
+    logger.info(f"{part['tag']} 上传完成: {media_file.uri}")
+    
+    if media_file.state == 'PROCESSING':
+        logger.info(f"{part['tag']} 等待视频处理完成...")
+    media_file = await client.wait_for_file_active(media_file)
+    if client.upload_cache is not None:
+        client.upload_cache.store(sha.hexdigest(), compressed_file, media_file)
+    return media_file
+
+def select_input_files():
+    """弹出文件选择框选择要处理的视频文件（仅在未通过命令行指定输入时使用）"""
+    from tkinter.filedialog import askopenfilenames
+    
+    logger.info("请选择要处理的视频文件（可多选）...")
+    return askopenfilenames(
+        title="选择要分割的视频文件（可多选）",
+        filetypes=[("视频文件", "*.mp4;*.mkv;*.avi;*.mov;*.wmv")]
+    )
+
+def collect_input_files(patterns):
+    """展开命令行中的文件路径、通配符和目录，返回去重后的视频文件列表"""
+    input_files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, f) for f in os.listdir(pattern)
+                       if f.lower().endswith(VIDEO_EXTENSIONS)]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+            if not matches:
+                logger.warning(f"没有匹配的文件: {pattern}")
+        for path in matches:
+            path = os.path.abspath(path)
+            if os.path.isfile(path) and path not in input_files:
+                input_files.append(path)
+    return input_files
+
+async def prepare_character_turn(upload_cache, reuse=REUSE_CHARACTER_TURN):
+    """上传角色示例图片，reuse 为 True 时同时完成本批次唯一一次角色特征分析
+
+    返回 (图片文件, 角色分析结果)，角色分析结果包含响应和可复用的对话历史，未启用时为 None
+    """
+    logger.info(f"上传角色示例图片: {CHARACTER_IMAGE_PATH}")
+    async with AsyncGeminiClient(GOOGLE_API_KEY, upload_cache=upload_cache) as client:
+        image_file = await client.upload_media(CHARACTER_IMAGE_PATH, "图片")
+        if not reuse:
+            return image_file, None
+        
+        logger.info("发送角色分析请求（本批次共用）...")
+        chat = client.start_chat(SELECTED_MODEL)
+        character_response = await chat.send_message([CHARACTER_PROMPT, image_file])
+        logger.info("角色特征分析完成:")
+        logger.info("=" * 50)
+        logger.info(character_response.text)
+        logger.info("=" * 50)
+        return image_file, {'response': character_response, 'history': chat.history}
+
+def extract_clips(video_path, json_path, total_videos, current_index, segment=None):
+    """从视频中提取片段
+
+    segment 为 (原视频, 起始时间, 时长) 时为虚拟分段，时间线加上该 Part 的起始时间后直接从原视频中提取。
+    """
+    try:
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
+        part_match = re.search(r'Part(\d+)', video_name)
+        
+        if not part_match:
+            logger.warning(f"[{current_index}/{total_videos}] 无法从文件名提取Part编号")
+            return False
+            
+        part_number = part_match.group(1)
+        
+        # 创建提取结果目录
+        extract_dir = os.path.join('outputs', base_name, 'extract')
+        if not os.path.exists(extract_dir):
+            os.makedirs(extract_dir, exist_ok=True)
+            logger.info(f"创建新的提取输出目录：{extract_dir}")
+        
+        # 读取时间轴文件
+        with open(json_path, 'r', encoding='utf-8') as f:
+            timeline = json.load(f)
+        
+        # 虚拟分段时从原视频中提取，片段限制在该 Part 的时间范围内
+        if segment:
+            source_path, offset, part_duration = segment
+        else:
+            source_path, offset, part_duration = video_path, 0.0, get_duration(video_path)
+        
+        # 合并重叠、相邻的时间段，生成去重后的切割列表
+        appearances = timeline['Appearances']
+        cuts = build_cut_list(appearances, buffer=CLIP_TIME_BUFFER, gap=CLIP_MERGE_GAP,
+                              min_length=CLIP_MIN_LENGTH, duration=part_duration)
+        logger.info(f'[{current_index}/{total_videos}] {len(appearances)} 个时间段合并为 {len(cuts)} 个片段')
+        jobs = []
+        for i, cut in enumerate(cuts, 1):
+            output_file = os.path.join(extract_dir, f'Part{part_number}_clip_{i}.mp4')
+            jobs.append((output_file, cut['start'] + offset, cut['end'] + offset))
+            sources = ', '.join(f"{appearances[j]['start']}-{appearances[j]['end']}" for j in cut['sources'])
+            logger.info(f'[{current_index}/{total_videos}] 待提取片段 {i}: '
+                        f'{cut["start"]:.1f}s - {cut["end"]:.1f}s（{sources}）')
+        
+        # 同一 Part 的所有片段批量、并发提取，CPU 核数在同时提取的 Part 之间平分
+        methods = cut_clips(source_path, jobs, mode=CLIP_EXTRACT_MODE, snap_tolerance=KEYFRAME_SNAP_TOLERANCE,
+                            workers=CLIP_WORKERS, cpu_count=max(1, (os.cpu_count() or 1) // EXTRACT_WORKERS),
+                            encoder=CLIP_ENCODER)
+        for i, (output_file, _, _) in enumerate(jobs, 1):
+            logger.info(f'[{current_index}/{total_videos}] 片段 {i} 提取完成（{methods[output_file]}）')
+        
+        return True
+        
+    except Exception as e:
+        logger.error(f"[{current_index}/{total_videos}] 提取片段时发生错误: {str(e)}")
+        return False
+
+async def process_single_video(client, video_path, video_path_for_analysis, chat, total_videos, current_index, character_response, character_reused=False, ledger=None, media_file=None):
+    """上传并分析单个视频文件，更新对应的JSON，返回JSON路径（未更新时返回None）
+
+    media_file 为已经上传完成的远端文件（边压缩边上传时），此时不再上传。
+    """
+    try:
+        await asyncio.to_thread(check_pause)  # 检查是否需要暂停
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        logger.info(f"=== 开始分析视频 [{current_index}/{total_videos}]: {video_name} ===")
+        logger.info(f"视频路径: {video_path_for_analysis}")
+        
+        # 上传视频并等待处理完成
+        video_file = media_file or await client.upload_media(video_path_for_analysis, "视频")
+        if ledger is not None:
+            ledger.mark_part(video_path, 'uploaded', upload_name=video_file.name)
+        
+        # 发送第二轮问题
+        await asyncio.to_thread(check_pause)  # 检查是否需要暂停
+        logger.info(f"[{current_index}/{total_videos}] 开始发送视频分析请求...")
+        start_time = time.time()
+        video_response = await chat.send_message(
+            [VIDEO_PROMPT, video_file], generation_config=STRUCTURED_GENERATION_CONFIG if STRUCTURED_OUTPUT else None
+        )
+        end_time = time.time()
+        response_time = end_time - start_time
+        
+        # 解析内存中的分析结果；开启模型级联时，未通过校验的 Part 改用 ESCALATION_MODEL 重新分析
+        model = chat.model
+        analysis_json = parse_appearances(video_response.text)
+        tokens = video_response.usage_metadata.total_token_count
+        cost = response_cost(model, video_response.usage_metadata, MODEL_PRICES)
+        escalation = None
+        if MODEL_CASCADE and model != ESCALATION_MODEL:
+            escalation = validate_result(analysis_json, part_duration(video_path))
+        if escalation:
+            logger.info(f"[{current_index}/{total_videos}] {model} 的结果未通过校验（{escalation}），"
+                        f"改用 {ESCALATION_MODEL} 重新分析")
+            chat = client.start_chat(ESCALATION_MODEL, history=chat.history[:-2])
+            start_time = time.time()
+            video_response = await chat.send_message(
+                [VIDEO_PROMPT, video_file], generation_config=STRUCTURED_GENERATION_CONFIG if STRUCTURED_OUTPUT else None
+            )
+            response_time += time.time() - start_time
+            model = ESCALATION_MODEL
+            # 升级后的结果无法解析时保留原来的结果
+            analysis_json = parse_appearances(video_response.text) or analysis_json
+            tokens += video_response.usage_metadata.total_token_count
+            cost += response_cost(model, video_response.usage_metadata, MODEL_PRICES)
+        logger.info(f"[{current_index}/{total_videos}] 分析模型: {model}，Token: {tokens}，预计费用: ${cost:.4f}")
+        if ledger is not None:
+            ledger.mark_part(video_path, 'uploaded', model=model, escalation=escalation, tokens=tokens, cost=cost)
+        
+        # 获取视频文件名
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+
+        # 从文件名中提取基础名称（去掉Part和_compressedPart部分）
+        base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
+
+        # 创建主文件夹和分析结果子文件夹
+        main_folder = os.path.join('outputs', base_name)
+        analysis_dir = os.path.join(main_folder, 'analysis')
+        
+        # 检查目录是否存在，如果不存在则创建
+        if not os.path.exists(analysis_dir):
+            os.makedirs(analysis_dir, exist_ok=True)
+            logger.info(f"创建新的分析输出目录：{analysis_dir}")
+        else:
+            logger.info(f"使用已存在的分析输出目录：{analysis_dir}")
+        
+        # 构建完整的输出文件路径
+        output_file = os.path.join(analysis_dir, f"{video_name}_analysis.md")
+        
+        logger.info(f"[{current_index}/{total_videos}] 输出目录: {analysis_dir}")
+        
+        # 报告只供查看，交给后台线程写入；JSON 直接使用内存中的分析结果，不需要等待报告写完
+        def write_report():
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(f"# 视频分析会话 [{current_index}/{total_videos}]\n\n")
+                f.write(f"## 基本信息\n")
+                f.write(f"- **时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"- **视频**: {video_path}\n\n")            
+                f.write(f"- **使用模型**: {model}\n")
+                if escalation:
+                    f.write(f"- **模型升级原因**: {escalation}\n")
+            
+                # 获取相对路径
+                relative_path = os.path.relpath(CHARACTER_IMAGE_PATH, os.path.dirname(output_file))
+                # 将Windows路径分隔符替换为正斜杠，并替换空格为%20
+                safe_path = relative_path.replace('\\', '/').replace(' ', '%20')
+            
+                # 写入第一轮对话信息
+                if character_reused:
+                    f.write("## 第一轮：角色特征分析（本批次共用，未单独请求）\n\n")
+                else:
+                    f.write("## 第一轮：角色特征分析\n\n")
+                f.write(f"### 输入信息\n")
+                f.write(f"- **图片**:\n\n![角色图片]({safe_path})\n\n")
+                f.write(f"- **提示词**: {CHARACTER_PROMPT}\n\n")
+                f.write("### 分析结果\n")
+                f.write(f"{character_response.text}\n\n")
+                f.write("### Token统计\n")
+                f.write("| 类型 | 数量 |\n")
+                f.write("|------|------|\n")
+                f.write(f"| 输入Token | {character_response.usage_metadata.prompt_token_count} |\n")
+                f.write(f"| 输出Token | {character_response.usage_metadata.candidates_token_count} |\n")
+                f.write(f"| 总Token | {character_response.usage_metadata.total_token_count} |\n\n")
+            
+                # 写入第二轮对话信息
+                f.write("## 第二轮：视频分析\n\n")
+                f.write("### 输入信息\n")
+                f.write(f"- **提示词**: {VIDEO_PROMPT}\n\n")
+                f.write("### 分析结果\n")
+                f.write(f"{video_response.text}\n\n")
+                f.write("### Token统计\n")
+                f.write("| 类型 | 数量 |\n")
+                f.write("|------|------|\n")
+                f.write(f"| 输入Token | {video_response.usage_metadata.prompt_token_count} |\n")
+                f.write(f"| 输出Token | {video_response.usage_metadata.candidates_token_count} |\n")
+                f.write(f"| 总Token | {video_response.usage_metadata.total_token_count} |\n")
+                f.write(f"| 响应时间 | {response_time:.2f}秒 |\n\n")
+            
+                # 写入总体统计
+                total_tokens = video_response.usage_metadata.total_token_count
+                if not character_reused:
+                    total_tokens += character_response.usage_metadata.total_token_count
+                f.write("## 总体统计\n\n")
+                f.write("| 指标 | 数值 |\n")
+                f.write("|------|------|\n")
+                f.write(f"| 总Token消耗 | {total_tokens} |\n")
+                f.write(f"| 总响应时间 | {response_time:.2f}秒 |\n")
+
+        report_writer.submit(output_file, write_report)
+
+        logger.info(f"[{current_index}/{total_videos}] 视频处理成功!")
+        logger.info(f"处理时间: {response_time:.2f}秒")
+        logger.info(f"分析报告在后台写入: {output_file}")
+        
+        # 找到 Part 对应的JSON文件
+        tag = f"[{current_index}/{total_videos}]"
+        json_path, part_number = part_json_path(video_path, tag)
+        if not json_path:
+            return None
+            
+        try:
+            # 使用内存中已经解析的分析结果
+            if not analysis_json:
+                logger.error(f"{tag} 无法从分析结果中提取JSON内容")
+                return None
+            
+            # 对尾部和较长的空白时间段用便宜的模型补充查询，只查询这些时间段
+            if REFINE_GAPS:
+                analysis_json['Appearances'] = await refine_appearances(
+                    client, REFINE_MODEL, video_file, analysis_json['Appearances'], part_duration(video_path),
+                    VIDEO_PROMPT, history=chat.history[:-2], tag=tag
+                )
+            
+            # 更新并保存JSON内容
+            save_analysis_json(json_path, part_number, analysis_json)
+            logger.info(f"{tag} JSON更新成功: {json_path}")
+            
+        except Exception as e:
+            logger.error(f"{tag} JSON处理失败: {str(e)}")
+            return None
+        
+        return json_path
+            
+    except Exception as e:
+        logger.error(f"[{current_index}/{total_videos}] 处理视频失败: {str(e)}")
+        raise
+
+def part_json_path(video_path, tag):
+    """返回 Part 对应的 JSON 文件路径和 Part 编号，找不到时记录警告并返回 (None, None)"""
+    # 提取基础名称和Part编号
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
+    part_match = re.search(r'Part(\d+)', video_name)
+    if not part_match:
+        logger.warning(f"{tag} 无法从文件名提取Part编号")
+        return None, None
+    
+    part_number = part_match.group(1)
+    json_path = os.path.join('outputs', base_name, 'splitjson', f'Part{part_number}_{base_name}.json')
+    if not os.path.exists(json_path):
+        logger.warning(f"{tag} 未找到对应的JSON文件: {json_path}")
+        return None, None
+    return json_path, part_number
+
+def save_analysis_json(json_path, part_number, analysis_json):
+    """把分析结果写入 Part 的 JSON 文件，保留文件中记录的时长"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        original_json = json.load(f)
+    
+    analysis_json = update_json_content(analysis_json, part_number)
+    original_json['Appearances'] = analysis_json['Appearances']
+    
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(original_json, f, ensure_ascii=False, indent=4)
+
+def resumed_path(part, stage, key):
+    """续跑时，Part 已完成 stage 阶段且对应文件仍然存在，返回该文件路径"""
+    record = part.get('record') or {}
+    path = record.get(key)
+    if stage_reached(record.get('stage'), stage) and path and os.path.exists(path):
+        return path
+    return None
+
+def compression_needed(part):
+    """判断 Part 是否需要压缩，返回 (是否压缩, 原因)"""
+    if not ENABLE_COMPRESSION:
+        return False, "压缩已禁用"
+    if part.get('segment'):
+        return True, "虚拟分段需要从原视频中读取"
+    if not SKIP_UNNEEDED_COMPRESSION:
+        return True, "始终压缩"
+    try:
+        info = probe(part['video_path'])
+    except Exception as e:
+        return True, f"获取视频信息失败: {str(e)}"
+    return compression_decision(info, COMPRESSION_SIZE, remove_audio=COMPRESSION_REMOVE_AUDIO)
+
+def compress_stage(part, ledger=None):
+    """流水线阶段一：压缩 Part（CPU）"""
+    check_pause()  # 检查是否需要暂停
+    
+    analysis_path = resumed_path(part, 'compressed', 'analysis_path')
+    if analysis_path:
+        part['analysis_path'] = analysis_path
+        logger.info(f"{part['tag']} 已压缩，跳过压缩: {analysis_path}")
+        return part
+    
+    # 根据配置和 Part 的大小、码率决定是否压缩视频，判断结果记录在任务台账中
+    needed, reason = compression_needed(part)
+    part['compression'] = f"{'压缩' if needed else '不压缩'}：{reason}"
+    if needed and STREAM_UPLOAD:
+        # 边压缩边上传在分析阶段中进行
+        part['analysis_path'] = compressed_path(part['video_path'])
+        part['stream_upload'] = True
+        logger.info(f"{part['tag']} 视频压缩已启用，在上传时边压缩边上传，压缩后大小为{COMPRESSION_SIZE}MB")
+        return part
+    elif needed:
+        part['analysis_path'] = compress_video_before_upload(part['video_path'], COMPRESSION_SIZE,
+                                                             segment=part.get('segment'))
+        logger.info(f"{part['tag']} 视频压缩已启用，使用压缩后的视频进行分析，压缩后大小为{COMPRESSION_SIZE}MB")
+    elif part.get('segment'):
+        part['analysis_path'] = export_segment(part['video_path'], part['segment'])
+        logger.info(f"{part['tag']} 视频压缩已禁用，从原视频中切出该 Part 进行分析")
+    else:
+        part['analysis_path'] = part['video_path']
+        logger.info(f"{part['tag']} 跳过压缩（{reason}），使用原始视频进行分析")
+    
+    if ledger is not None:
+        ledger.mark_part(part['video_path'], 'compressed', analysis_path=os.path.abspath(part['analysis_path']),
+                         compression=part['compression'])
+    return part
+
+async def analysis_stage(part, client, image_file, character_turn=None, ledger=None):
+    """流水线阶段二：上传并分析 Part（网络），每个 Part 使用独立的会话"""
+    await asyncio.to_thread(check_pause)  # 检查是否需要暂停
+    
+    json_path = resumed_path(part, 'analysed', 'json_path')
+    if json_path:
+        part['json_path'] = json_path
+        logger.info(f"{part['tag']} 已有分析结果，跳过分析: {json_path}")
+        return part
+    
+    if character_turn is not None:
+        # 以本批次的角色特征分析作为对话历史创建新会话，省去一次请求
+        chat = client.start_chat(SELECTED_MODEL, history=character_turn['history'])
+        character_response = character_turn['response']
+        logger.info(f"{part['tag']} 复用本批次的角色特征分析结果")
+    else:
+        # 为每个 Part 创建独立的会话，避免并发时上下文互相干扰
+        chat = client.start_chat(SELECTED_MODEL)
+        
+        # 角色分析
+        logger.info(f"{part['tag']} 发送角色分析请求...")
+        character_response = await chat.send_message([CHARACTER_PROMPT, image_file])
+        logger.info(f"{part['tag']} 角色特征分析完成")
+    
+    media_file = await stream_upload_part(client, part, ledger) if part.get('stream_upload') else None
+    
+    part['json_path'] = await process_single_video(client, part['video_path'], part['analysis_path'], chat,
+                                                   part['total'], part['index'], character_response,
+                                                   character_reused=character_turn is not None, ledger=ledger,
+                                                   media_file=media_file)
+    if not part['json_path']:
+        # 阶段保持不变，该视频不会被标记为已合并，续跑时重新分析这个 Part
+        raise RuntimeError("没有可用的分析结果")
+    if ledger is not None:
+        ledger.mark_part(part['video_path'], 'analysed', json_path=os.path.abspath(part['json_path']))
+    return part
+
+async def stream_upload_part(client, part, ledger=None):
+    """边压缩边上传 Part，失败时改为压缩完成后再上传，返回已上传的文件（失败时为 None）"""
+    media_file = None
+    try:
+        media_file = await stream_compress_and_upload(client, part)
+    except Exception as e:
+        logger.error(f"{part['tag']} 边压缩边上传失败: {str(e)}，改为压缩完成后再上传")
+        part['analysis_path'] = await asyncio.to_thread(
+            compress_video_before_upload, part['video_path'], COMPRESSION_SIZE, part.get('segment')
+        )
+    if ledger is not None:
+        ledger.mark_part(part['video_path'], 'compressed', analysis_path=os.path.abspath(part['analysis_path']),
+                         compression=part.get('compression'))
+    return media_file
+
+async def upload_stage(part, client, ledger=None):
+    """离线批量模式的流水线阶段二：只上传 Part（网络），分析请求在所有 Part 上传后统一提交"""
+    await asyncio.to_thread(check_pause)  # 检查是否需要暂停
+    
+    json_path = resumed_path(part, 'analysed', 'json_path')
+    if json_path:
+        part['json_path'] = json_path
+        logger.info(f"{part['tag']} 已有分析结果，跳过上传: {json_path}")
+        return part
+    
+    # 续跑时已提交过的 Part 直接等待原来的批处理任务
+    record = part.get('record') or {}
+    if record.get('batch_job'):
+        part['batch_job'] = record['batch_job']
+        part['batch_model'] = record.get('model') or SELECTED_MODEL
+        logger.info(f"{part['tag']} 已提交到批处理任务 {part['batch_job']}，跳过上传")
+        return part
+    
+    media_file = await stream_upload_part(client, part, ledger) if part.get('stream_upload') else None
+    part['media_file'] = media_file or await client.upload_media(part['analysis_path'], "视频")
+    if ledger is not None:
+        ledger.mark_part(part['video_path'], 'uploaded', upload_name=part['media_file'].name)
+    return part
+
+def batch_request(part, character_turn):
+    """构建 Part 的批处理请求：本批次的角色特征分析作为对话历史，加上视频分析轮"""
+    contents = list(character_turn['history']) + [to_content([VIDEO_PROMPT, part['media_file']])]
+    return batch_line(part['video_path'], contents, STRUCTURED_GENERATION_CONFIG if STRUCTURED_OUTPUT else None)
+
+async def escalate_part(client, part, character_turn):
+    """模型级联：用 ESCALATION_MODEL 交互式地重新分析未通过校验的 Part"""
+    media_file = part.get('media_file')
+    if media_file is None:
+        # 续跑时 Part 没有重新上传，按台账中记录的文件名查询已上传的文件
+        media_file = await client.get_file((part.get('record') or {})['upload_name'])
+    chat = client.start_chat(ESCALATION_MODEL, history=character_turn['history'])
+    return await chat.send_message(
+        [VIDEO_PROMPT, media_file], generation_config=STRUCTURED_GENERATION_CONFIG if STRUCTURED_OUTPUT else None
+    )
+
+async def batch_analysis(parts, character_turn, ledger=None):
+    """离线批量模式：把已上传 Part 的视频分析请求提交为一个批处理任务，任务结束后把结果写回各 Part 的 JSON
+
+    续跑时已提交过的 Part 直接等待原来的批处理任务。返回分析失败的 Part 及原因 [(part, 异常)]。
+    """
+    failures = []
+    async with AsyncGeminiClient(GOOGLE_API_KEY) as client:
+        jobs = {}
+        for part in parts:
+            if part.get('batch_job'):
+                jobs.setdefault(part['batch_job'], []).append(part)
+        
+        new_parts = [part for part in parts if part.get('media_file')]
+        if new_parts:
+            display_name = f"videoprocess_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            job = await submit_batch(client, SELECTED_MODEL, [batch_request(part, character_turn) for part in new_parts],
+                                     display_name)
+            for part in new_parts:
+                part['batch_job'], part['batch_model'] = job.name, SELECTED_MODEL
+                if ledger is not None:
+                    ledger.mark_part(part['video_path'], 'uploaded', batch_job=job.name, model=SELECTED_MODEL)
+            jobs[job.name] = new_parts
+        
+        # 等待各批处理任务结束，任务本身失败、取消、过期或不存在时清除台账中的任务记录，续跑时重新上传提交；
+        # 其他错误（等待超时、网络错误、429 / 5xx 重试耗尽、结果下载失败）时任务可能仍在运行或已经成功，
+        # 保留任务记录，续跑（--resume）时继续等待该任务，避免重复提交、重复计费
+        results = {}
+        for name, job_parts in jobs.items():
+            try:
+                results.update(await batch_results(client, name, poll_interval=BATCH_POLL_INTERVAL))
+            except BatchJobError as e:
+                logger.error(f"批处理任务 {name} 失败: {str(e)}")
+                for part in job_parts:
+                    results[part['video_path']] = e
+                    if ledger is not None:
+                        ledger.mark_part(part['video_path'], 'uploaded', batch_job=None)
+            except (GeminiAPIError, TimeoutError, asyncio.TimeoutError, aiohttp.ClientError) as e:
+                logger.error(f"等待批处理任务 {name} 中断，可用 --resume 继续等待: {type(e).__name__} {str(e)}")
+                for part in job_parts:
+                    results[part['video_path']] = e
+        
+        # 把结果分发回各 Part
+        for part in parts:
+            response = results.get(part['video_path']) or GeminiAPIError("批处理结果中没有该 Part")
+            if isinstance(response, Exception):
+                failures.append((part, response))
+                continue
+            
+            model = part['batch_model']
+            analysis_json = parse_appearances(response.text)
+            tokens = response.usage_metadata.total_token_count
+            cost = response_cost(model, response.usage_metadata, MODEL_PRICES) * BATCH_PRICE_FACTOR
+            escalation = None
+            if MODEL_CASCADE and model != ESCALATION_MODEL:
+                escalation = validate_result(analysis_json, part_duration(part['video_path']))
+            if escalation:
+                # 未通过校验的 Part 通常很少，直接交互式地重新分析
+                logger.info(f"{part['tag']} {model} 的结果未通过校验（{escalation}），改用 {ESCALATION_MODEL} 重新分析")
+                try:
+                    response = await escalate_part(client, part, character_turn)
+                except Exception as e:
+                    logger.error(f"{part['tag']} 使用 {ESCALATION_MODEL} 重新分析失败，保留原结果: {str(e)}")
+                else:
+                    model = ESCALATION_MODEL
+                    analysis_json = parse_appearances(response.text) or analysis_json
+                    tokens += response.usage_metadata.total_token_count
+                    cost += response_cost(model, response.usage_metadata, MODEL_PRICES)
+            logger.info(f"{part['tag']} 分析模型: {model}，Token: {tokens}，预计费用: ${cost:.4f}")
+            
+            json_path, part_number = part_json_path(part['video_path'], part['tag'])
+            if not json_path:
+                failures.append((part, FileNotFoundError("未找到对应的JSON文件")))
+                continue
+            if not analysis_json:
+                failures.append((part, ValueError("无法从分析结果中提取JSON内容")))
+                continue
+            try:
+                save_analysis_json(json_path, part_number, analysis_json)
+            except Exception as e:
+                failures.append((part, e))
+                continue
+            part['json_path'] = json_path
+            logger.info(f"{part['tag']} JSON更新成功: {json_path}")
+            if ledger is not None:
+                ledger.mark_part(part['video_path'], 'analysed', json_path=os.path.abspath(json_path), model=model,
+                                 escalation=escalation, tokens=tokens, cost=cost)
+    return failures
+
+def extract_stage(part, ledger=None):
+    """流水线阶段三：根据 JSON 时间线提取片段（CPU）"""
+    check_pause()  # 检查是否需要暂停
+    
+    if stage_reached((part.get('record') or {}).get('stage'), 'extracted'):
+        logger.info(f"{part['tag']} 片段已提取，跳过片段提取")
+        return part
+    
+    if not part['json_path']:
+        raise RuntimeError("没有可用的JSON时间线，无法提取片段")
+    
+    logger.info(f"{part['tag']} 开始提取视频片段...")
+    if not extract_clips(part['video_path'], part['json_path'], part['total'], part['index'],
+                         segment=part.get('segment')):
+        raise RuntimeError("视频片段提取失败")
+    logger.info(f"{part['tag']} 视频片段提取完成")
+    
+    if ledger is not None:
+        ledger.mark_part(part['video_path'], 'extracted')
+    return part
+
+def write_part_json(json_output_dir, video_file, duration):
+    """为 Part 创建记录时长和空 Appearances 的 JSON 文件"""
+    video_name = os.path.splitext(os.path.basename(video_file))[0]
+    json_path = os.path.join(json_output_dir, f'{video_name}.json')
+    json_content = {
+        f"{video_name}_time": str(round(duration, 3)),
+        "Appearances": []
+    }
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(json_content, f, ensure_ascii=False, indent=4)
+    logger.info(f"创建JSON文件: {json_path}")
+    return json_path
+
+def scene_split_points(input_file, segment_duration, keyframe_aligned):
+    """SEGMENT_MODE 为 scene 时按镜头切换计算分割点，返回 None 表示按固定时长分段
+
+    keyframe_aligned 为 True 时（直接复制分割）分割点只取关键帧。
+    """
+    if SEGMENT_MODE != 'scene':
+        return None
+    duration = get_duration(input_file)
+    if duration <= 0:
+        return None
+    keyframes = None
+    if keyframe_aligned:
+        try:
+            keyframes = keyframe_times(input_file)
+        except Exception as e:
+            logger.warning(f"读取关键帧失败，分割点不对齐关键帧: {str(e)}")
+    return scene_boundaries(input_file, duration, segment_duration, keyframes)
+
+def part_duration(video_path):
+    """从 Part 的 JSON 文件中读取该 Part 的时长，读取失败时返回 0"""
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', video_name)
+    json_path = os.path.join('outputs', base_name, 'splitjson', f'{video_name}.json')
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return float(json.load(f).get(f'{video_name}_time') or 0)
+    except (OSError, ValueError):
+        return 0.0
+
+def split_video(input_file, segment_duration):
+    """分割视频为指定时长的片段"""
+    logger.info("=== 开始视频分割 ===")
+    logger.info(f"输入文件: {input_file}")
+    logger.info(f"分段时长: {segment_duration}秒")
+
+    if not os.path.exists(input_file):
+        logger.error(f"输入文件不存在: {input_file}")
+        return False, []
+
+    try:
+        # 获取视频文件名和创建输出目录
+        filename = os.path.basename(input_file)
+        name, ext = os.path.splitext(filename)
+        
+        # 创建主文件夹结构
+        main_folder = os.path.join('outputs', name)
+        split_output_dir = os.path.join(main_folder, 'split')
+        json_output_dir = os.path.join(main_folder, 'splitjson')
+        
+        # 创建所需目录
+        for dir_path in [split_output_dir, json_output_dir]:
+            if not os.path.exists(dir_path):
+                os.makedirs(dir_path, exist_ok=True)
+                logger.info(f"创建新目录: {dir_path}")
+            else:
+                logger.info(f"使用已存在目录: {dir_path}")
+
+        logger.info(f"视频输出目录: {split_output_dir}")
+        logger.info(f"JSON输出目录: {json_output_dir}")
+        
+        # 设置FFmpeg命令
+        output_pattern = os.path.join(split_output_dir, f'Part%d_{name}.mp4')
+        
+        segment_args = ['-segment_time', str(segment_duration)]
+        boundaries = scene_split_points(input_file, segment_duration, keyframe_aligned=True)
+        if boundaries:
+            # 分割点向下取整到毫秒，不会晚于对应的关键帧
+            segment_args = ['-segment_times', ','.join(f'{math.floor(b * 1000) / 1000:.3f}' for b in boundaries)]
+        
+        cmd = [
+            'ffmpeg',
+            '-i', input_file,
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-c:v', 'copy',
+            '-c:a', 'copy',
+            '-f', 'segment',
+            *segment_args,
+            '-reset_timestamps', '1',
+            '-avoid_negative_ts', 'make_zero',
+            '-y',
+            output_pattern
+        ]
+        
+        logger.info("开始执行FFmpeg分割命令...")
+        process = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            encoding='utf-8',
+            errors='ignore'
+        )
+        
+        if process.returncode == 0:
+            # 获取分割后的视频文件列表
+            split_files = [os.path.join(split_output_dir, f) for f in os.listdir(split_output_dir) 
+                         if f.startswith('Part') and f.endswith('.mp4') and name in f]
+            
+            # 一次并发查询所有分割视频的时长
+            media_info = probe_many(split_files)
+            
+            # 为每个分割视频创建对应的JSON文件
+            for video_file in split_files:
+                info = media_info.get(video_file)
+                write_part_json(json_output_dir, video_file, info.duration if info else 0)
+            
+            logger.info(f"成功分割视频为 {len(split_files)} 个片段")
+            return True, split_files
+            
+        else:
+            logger.error(f"FFmpeg分割失败: {process.stderr}")
+            return False, []
+            
+    except Exception as e:
+        logger.error(f"视频分割过程中发生错误: {str(e)}")
+        return False, []
+
+def plan_virtual_segments(input_file, segment_duration):
+    """虚拟分段：只计算各 Part 在原视频中的时间范围，不生成分割文件
+
+    返回 (是否成功, [(Part 路径, 起始时间, 时长)])。Part 路径沿用分割文件的命名，
+    用于生成 JSON、分析报告和片段的文件名，但不会在磁盘上创建。
+    """
+    logger.info("=== 开始虚拟分段 ===")
+    logger.info(f"输入文件: {input_file}")
+    logger.info(f"分段时长: {segment_duration}秒")
+    
+    if not os.path.exists(input_file):
+        logger.error(f"输入文件不存在: {input_file}")
+        return False, []
+    
+    total_duration = get_duration(input_file)
+    if total_duration <= 0:
+        logger.error(f"无法获取视频时长，无法虚拟分段: {input_file}")
+        return False, []
+    
+    name = os.path.splitext(os.path.basename(input_file))[0]
+    split_output_dir = os.path.join('outputs', name, 'split')
+    json_output_dir = os.path.join('outputs', name, 'splitjson')
+    os.makedirs(json_output_dir, exist_ok=True)
+    
+    # 虚拟分段从原视频精确定位，按镜头切换分段时分割点不需要对齐关键帧
+    boundaries = scene_split_points(input_file, segment_duration, keyframe_aligned=False)
+    if boundaries is None:
+        part_count = max(1, math.ceil(total_duration / segment_duration - 1e-6))
+        boundaries = [part_number * segment_duration for part_number in range(1, part_count)]
+    
+    segments = []
+    edges = [0.0, *boundaries, total_duration]
+    for part_number in range(1, len(edges)):
+        start = edges[part_number - 1]
+        duration = edges[part_number] - start
+        video_file = os.path.join(split_output_dir, f'Part{part_number}_{name}.mp4')
+        write_part_json(json_output_dir, video_file, duration)
+        segments.append((video_file, start, duration))
+    
+    logger.info(f"视频时长 {total_duration:.1f}秒，虚拟分段为 {len(segments)} 个片段")
+    return True, segments
+
+def merge_json_files(json_files, absolute=MERGE_ABSOLUTE_TIMESTAMPS):
+    """合并JSON文件，absolute 为 True 时把各 Part 的相对时间换算成原视频中的绝对时间"""
+    if not json_files:
+        logger.error("未选择JSON文件")
+        return None, "请先选择JSON文件"
+    
+    try:
+        # 获取原始文件名（从第一个文件名中提取）
+        first_file = os.path.basename(json_files[0])
+        base_name = re.sub(r'Part\d+_|\.json$', '', first_file)
+        
+        # 获取当前时间戳
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        # 构建新的输出文件名
+        output_filename = f"{base_name}_all_{timestamp}.json"
+        
+        # 获取原始文件所在目录
+        original_folder_path = os.path.dirname(json_files[0])
+        
+        # 构建输出路径
+        output_path = os.path.join(original_folder_path, output_filename)
+        
+        # 修改排序逻辑
+        try:
+            # 按Part数字排序
+            sorted_files = sorted(json_files, key=lambda x: int(re.search(r'Part(\d+)', x).group(1)))
+        except (AttributeError, ValueError):
+            # 如果无法按Part数字排序,就按文件名字母顺序排序
+            sorted_files = sorted(json_files)
+        
+        merged_data = {
+            "total_time": 0,
+            "part_times": [],
+            "Appearances": []
+        }
+        
+        # 遍历所有JSON文件
+        for json_file in sorted_files:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                
+                # 获取完整的文件名（不含扩展名）
+                full_part_name = os.path.splitext(os.path.basename(json_file))[0]
+                
+                # 使用完整的键名获取时间
+                time_key = f"{full_part_name}_time"
+                part_time = round(float(data.get(time_key, 0)), 3)
+                
+                merged_data["part_times"].append({
+                    "part": full_part_name,
+                    "time": part_time
+                })
+                # 当前 Part 在原视频中的起始时间为之前所有 Part 的时长之和
+                offset = merged_data["total_time"]
+                merged_data["total_time"] = round(offset + part_time, 3)
+                
+                for appearance in data.get("Appearances", []):
+                    if absolute:
+                        appearance = to_absolute(dict(appearance, part=appearance.get('part', full_part_name)), offset)
+                    merged_data["Appearances"].append(appearance)
+        
+        if absolute:
+            # 按绝对起点排序，并附上区间索引，可直接从未分割的原视频中切出所有片段
+            merged_data["Appearances"].sort(key=lambda item: parse_timestamp(item['start']))
+            merged_data["timestamps"] = "absolute"
+            merged_data["timeline_index"] = TimelineIndex(merged_data["Appearances"]).to_json()
+        
+        # 保存合并后的文件
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(merged_data, f, ensure_ascii=False, indent=2)
+            
+        return output_path, merged_data
+        
+    except Exception as e:
+        logger.error(f"合并失败: {str(e)}")
+        return None, None
+
+def prepare_parts(ledger, input_file, file_idx, total_files, segment_duration, resume=False):
+    """分割输入视频（续跑时沿用已分割的 Part），返回 (Part 列表, 基础名称)，分割失败时返回 None"""
+    video_basename = os.path.basename(input_file)
+    base_name = re.sub(r'^Part\d+_|_compressedPart\d+.*$', '', os.path.splitext(video_basename)[0])
+    
+    # 续跑时沿用已分割的 Part（重新分割会覆盖 splitjson 中已有的分析结果）
+    record = ledger.start_input(input_file, segment_duration, resume=resume)
+    part_records = ledger.parts_of(input_file) if record and stage_reached(record['stage'], 'split') else []
+    if VIRTUAL_SEGMENTS:
+        reusable = part_records and all(r['start_time'] is not None for r in part_records)
+    else:
+        reusable = part_records and all(
+            r['start_time'] is None and os.path.exists(r['part_path']) for r in part_records
+        )
+    # 虚拟分段时记录每个 Part 在原视频中的时间范围
+    segments = {}
+    if reusable:
+        split_files = [r['part_path'] for r in part_records]
+        if VIRTUAL_SEGMENTS:
+            segments = {r['part_path']: (input_file, r['start_time'], r['duration']) for r in part_records}
+        logger.info(f"[{file_idx}/{total_files}] 已分割，沿用 {len(split_files)} 个片段")
+    else:
+        if record:
+            ledger.start_input(input_file, segment_duration)
+        
+        if VIRTUAL_SEGMENTS:
+            # 只记录时间范围，不生成分割文件
+            success, planned = plan_virtual_segments(input_file, segment_duration)
+            split_files = [os.path.abspath(video_file) for video_file, _, _ in planned]
+            segments = {os.path.abspath(video_file): (input_file, start, duration)
+                        for video_file, start, duration in planned}
+        else:
+            # 执行视频分割
+            success, split_files = split_video(input_file, segment_duration)
+        if not success or not split_files:
+            logger.error(f"[{file_idx}/{total_files}] 视频 {video_basename} 分割失败，跳过此视频")
+            return None
+        ledger.add_parts(input_file, [
+            (f, int(re.search(r'Part(\d+)', os.path.basename(f)).group(1)), *segments.get(f, ())[1:])
+            for f in split_files
+        ])
+        ledger.mark_input(input_file, 'split')
+    
+    # 对分割后的视频文件按Part编号排序
+    split_files.sort(key=lambda x: int(re.search(r'Part(\d+)', os.path.basename(x)).group(1)))
+    logger.info(f"[{file_idx}/{total_files}] 视频分割完成，共 {len(split_files)} 个片段")
+    
+    parts = []
+    for part_idx, video_path in enumerate(split_files, 1):
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        part_number = re.search(r'Part(\d+)', video_name).group(1)
+        parts.append({
+            'video_path': video_path,
+            'index': part_idx,
+            'total': len(split_files),
+            'tag': f"[视频 {file_idx}/{total_files} - Part {part_number}]",
+            'record': ledger.get_part(video_path),
+            'segment': segments.get(video_path)
+        })
+    return parts, base_name
+
+def run_parts(pipeline, parts, ledger, done_message="处理成功"):
+    """用流水线处理 Part，按 Part 顺序记录结果，返回处理成功的 Part"""
+    done_parts = []
+    for part, (ok, result) in zip(parts, pipeline.run(parts)):
+        if ok:
+            done_parts.append(result)
+            logger.info(f"{part['tag']} {done_message}")
+        else:
+            ledger.mark_part_failed(part['video_path'], result)
+            logger.error(f"{part['tag']} 处理失败")
+    return done_parts
+
+def merge_video_json(ledger, input_file, base_name, video_failed, file_idx, total_files):
+    """合并输入视频所有 Part 的 JSON，全部 Part 成功时在台账中标记为已合并"""
+    try:
+        # 获取splitjson目录中的所有JSON文件
+        json_dir = os.path.join('outputs', base_name, 'splitjson')
+        json_files = [os.path.join(json_dir, f) for f in os.listdir(json_dir) 
+                     if f.endswith('.json') and base_name in f]
+        
+        if json_files:
+            logger.info(f"=== 开始合并JSON文件 [{file_idx}/{total_files}] ===")
+            output_path, merged_data = merge_json_files(json_files)
+            
+            if output_path and merged_data:
+                logger.info("JSON文件合并完成！")
+                logger.info(f"总时长：{merged_data['total_time']}秒")
+                logger.info(f"总片段数：{len(merged_data['Appearances'])}")
+                logger.info(f"输出文件：{output_path}")
+                # 有 Part 失败时不标记为已合并，续跑时会重新处理失败的 Part 并再次合并
+                if video_failed == 0:
+                    ledger.mark_input(input_file, 'merged', merged_path=os.path.abspath(output_path))
+            else:
+                logger.error("JSON合并失败")
+    except Exception as e:
+        logger.error(f"JSON合并过程中发生错误: {str(e)}")
+
+def batch_process(resume=False, input_files=None):
+    """批量处理视频，全部 Part 处理成功时返回 True
+
+    resume 为 True 时从任务台账中继续未完成的视频；
+    input_files 为 None 时弹出文件选择框选择视频。
+    """
+    start_time = time.time()
+    logger.info("\n=== 7.videoprocess 开始 ===")
+    logger.info("=== 批量视频处理启动 ===")
+    
+    # 在终端中运行时启动暂停处理线程
+    if sys.stdin is not None and sys.stdin.isatty():
+        pause_thread = threading.Thread(target=pause_handler, daemon=True)
+        pause_thread.start()
+        logger.info("随时可以输入 pause 暂停程序，输入 continue 继续运行")
+    
+    ledger = JobLedger()
+    try:
+        if resume:
+            # 从任务台账中读取尚未完成的视频
+            input_files = [f for f in ledger.unfinished_inputs() if os.path.exists(f)]
+            if not input_files:
+                logger.info("任务台账中没有未完成的视频，程序退出")
+                return True
+            logger.info(f"续跑模式：从任务台账 {ledger.path} 中继续未完成的视频")
+        elif input_files is None:
+            # 选择要分割的多个视频文件
+            input_files = select_input_files()
+        
+        if not input_files:
+            logger.error("未选择视频文件，程序退出")
+            return False
+            
+        # 将文件列表转换为列表并按名称排序
+        input_files = sorted(list(input_files))
+        logger.info(f"选择了 {len(input_files)} 个视频文件:")
+        for idx, file_path in enumerate(input_files, 1):
+            logger.info(f"  {idx}. {file_path}")
+        
+        # 分段时长使用配置值
+        segment_duration = SEGMENT_DURATION
+        logger.info(f"设定的分段时长: {segment_duration}秒")
+        
+        # 初始化总体统计
+        total_successful = 0
+        total_failed = 0
+        
+        # 初始化客户端
+        logger.info("正在初始化 Gemini 客户端...")
+        configure_rate_limits(MODEL_RATE_LIMITS)
+        upload_cache = UploadCache() if ENABLE_UPLOAD_CACHE else None
+        client = AsyncGeminiClient(GOOGLE_API_KEY, upload_cache=upload_cache)
+        logger.info(f"当前使用模型: {SELECTED_MODEL}")
+        logger.info(f"模型说明: {MODEL_CONFIG.get(SELECTED_MODEL, '未知模型')}")
+        
+        # 上传角色图片；离线批量模式下每个请求都以角色特征分析作为对话历史，因此始终只做一次角色分析
+        image_file, character_turn = asyncio.run(
+            prepare_character_turn(upload_cache, reuse=REUSE_CHARACTER_TURN or BATCH_API)
+        )
+        if BATCH_API:
+            logger.info("离线批量模式：所有 Part 压缩上传后统一提交到 Batch API，结果写回后再提取片段")
+        
+        # 离线批量模式下等待分析的视频：(序号, 输入视频, 上传成功的 Part, 基础名称, 失败的 Part 数)
+        batch_videos = []
+        
+        # 处理每个输入视频
+        for file_idx, input_file in enumerate(input_files, 1):
+            check_pause()  # 检查是否需要暂停
+            video_basename = os.path.basename(input_file)
+            logger.info(f"=== 处理视频文件 [{file_idx}/{len(input_files)}]: {video_basename} ===")
+            logger.info(f"视频路径: {input_file}")
+            
+            prepared = prepare_parts(ledger, input_file, file_idx, len(input_files), segment_duration, resume)
+            if prepared is None:
+                continue
+            parts, base_name = prepared
+            
+            if BATCH_API:
+                # 压缩和上传两个阶段流水线并行，分析请求在所有视频的 Part 上传后统一提交
+                logger.info(f"[{file_idx}/{len(input_files)}] 流水线并发数 - 压缩: {COMPRESS_WORKERS}，"
+                            f"上传: {MAX_CONCURRENT_PARTS}")
+                pipeline = StagePipeline([
+                    Stage('压缩', partial(compress_stage, ledger=ledger), COMPRESS_WORKERS),
+                    Stage('上传', partial(upload_stage, client=client, ledger=ledger), MAX_CONCURRENT_PARTS,
+                          cleanup=client.close)
+                ], queue_size=STAGE_QUEUE_SIZE)
+                uploaded = run_parts(pipeline, parts, ledger, done_message="上传完成")
+                total_failed += len(parts) - len(uploaded)
+                batch_videos.append((file_idx, input_file, uploaded, base_name, len(parts) - len(uploaded)))
+                continue
+            
+            # 压缩、上传分析、片段提取三个阶段流水线并行，各阶段的并发数分别配置
+            logger.info(f"[{file_idx}/{len(input_files)}] 流水线并发数 - 压缩: {COMPRESS_WORKERS}，"
+                        f"分析: {MAX_CONCURRENT_PARTS}，提取: {EXTRACT_WORKERS}")
+            pipeline = StagePipeline([
+                Stage('压缩', partial(compress_stage, ledger=ledger), COMPRESS_WORKERS),
+                Stage('分析', partial(analysis_stage, client=client, image_file=image_file,
+                                      character_turn=character_turn, ledger=ledger), MAX_CONCURRENT_PARTS,
+                  cleanup=client.close),
+                Stage('提取', partial(extract_stage, ledger=ledger), EXTRACT_WORKERS)
+            ], queue_size=STAGE_QUEUE_SIZE)
+            
+            done_parts = run_parts(pipeline, parts, ledger)
+            video_failed = len(parts) - len(done_parts)
+            total_successful += len(done_parts)
+            total_failed += video_failed
+            report_writer.flush()
+            
+            logger.info(f"[{file_idx}/{len(input_files)}] {video_basename} 处理完成")
+            merge_video_json(ledger, input_file, base_name, video_failed, file_idx, len(input_files))
+        
+        if BATCH_API:
+            # 提交批处理任务并等待结果，再逐个视频提取片段、合并JSON
+            pending = [part for _, _, uploaded, _, _ in batch_videos for part in uploaded
+                       if part.get('media_file') or part.get('batch_job')]
+            failures = asyncio.run(batch_analysis(pending, character_turn, ledger)) if pending else []
+            failed_paths = set()
+            for part, error in failures:
+                failed_paths.add(part['video_path'])
+                ledger.mark_part_failed(part['video_path'], error)
+                logger.error(f"{part['tag']} 分析失败: {str(error)}")
+            
+            for file_idx, input_file, uploaded, base_name, video_failed in batch_videos:
+                analysed = [part for part in uploaded if part['video_path'] not in failed_paths]
+                pipeline = StagePipeline([Stage('提取', partial(extract_stage, ledger=ledger), EXTRACT_WORKERS)],
+                                         queue_size=STAGE_QUEUE_SIZE)
+                done_parts = run_parts(pipeline, analysed, ledger)
+                video_failed += len(uploaded) - len(done_parts)
+                total_successful += len(done_parts)
+                total_failed += len(uploaded) - len(done_parts)
+                
+                logger.info(f"[{file_idx}/{len(input_files)}] {os.path.basename(input_file)} 处理完成")
+                merge_video_json(ledger, input_file, base_name, video_failed, file_idx, len(input_files))
+        
+        # 输出最终统计
+        end_time = time.time()
+        total_time = end_time - start_time
+        
+        logger.info("\n=== 批量处理完成 ===")
+        logger.info(f"处理的视频文件数: {len(input_files)}")
+        logger.info(f"处理的视频片段总数: {total_successful + total_failed}")
+        logger.info(f"成功: {total_successful}")
+        logger.info(f"失败: {total_failed}")
+        logger.info(f"总耗时: {total_time:.2f}秒")
+        logger.info(f"平均每个视频耗时: {total_time/len(input_files):.2f}秒")
+        if total_successful + total_failed > 0:
+            logger.info(f"平均每个片段耗时: {total_time/(total_successful + total_failed):.2f}秒")
+
+        logger.info("=== 7.videoprocess 结束 ===")
+        return total_failed == 0
+        
+    except Exception as e:
+        # 计算处理时间
+        end_time = time.time()
+        total_time = end_time - start_time
+        
+        # 输出错误发生时的处理进度
+        logger.error("\n=== 处理过程中发生错误 ===")
+        logger.error(f"错误信息: {str(e)}")
+        
+        # 显示当前处理进度
+        if 'file_idx' in locals() and 'input_files' in locals():
+            current_video = os.path.basename(input_files[file_idx-1])
+            logger.error(f"错误发生在第 {file_idx}/{len(input_files)} 个视频: {current_video}")
+        
+        # 输出已处理的统计信息
+        logger.info("\n=== 处理中断时的统计 ===")
+        logger.info(f"处理的视频文件数: {file_idx if 'file_idx' in locals() else 0}/{len(input_files)}")
+        logger.info(f"处理的视频片段总数: {total_successful + total_failed}")
+        logger.info(f"成功: {total_successful}")
+        logger.info(f"失败: {total_failed}")
+        logger.info(f"已用时: {total_time:.2f}秒")
+        
+        if total_successful + total_failed > 0:
+            logger.info(f"平均每个片段耗时: {total_time/(total_successful + total_failed):.2f}秒")
+        
+        if 'file_idx' in locals():
+            logger.info(f"平均每个视频耗时: {total_time/file_idx:.2f}秒")
+        
+        # 重新抛出异常
+        raise
+    finally:
+        ledger.close()
+
+def update_json_content(json_data, part_number):
+    """更新JSON内容，在每个Appearance中添加part信息并重新编号clip"""
+    part_info = f'Part{part_number}'
+    
+    # 更新每个Appearance条目
+    for i, appearance in enumerate(json_data['Appearances'], 1):
+        # 创建新的有序字典，按照想要的顺序重新组织字段
+        new_appearance = {
+            'part': part_info,
+            'clip': f'clip_{i}',
+            'start': appearance['start'],
+            'end': appearance['end'],
+            'description': appearance['description']
+        }
+        # 用新的有序字典替换原来的条目
+        json_data['Appearances'][i-1] = new_appearance
+    
+    return json_data
+
+def parse_args(argv=None):
+    """解析命令行参数，未指定的参数使用文件开头的配置"""
+    parser = argparse.ArgumentParser(description='视频分割、分析与片段提取')
+    parser.add_argument('inputs', nargs='*',
+                        help='输入视频文件、通配符（如 "videos/**/*.mkv"）或目录；不指定时弹出文件选择框')
+    parser.add_argument('--resume', action='store_true', help='从 outputs/jobs.db 中记录的进度继续未完成的视频')
+    parser.add_argument('--segment-duration', type=float, default=SEGMENT_DURATION, help='视频分段时长（秒）')
+    parser.add_argument('--segment-mode', choices=['fixed', 'scene'], default=SEGMENT_MODE,
+                        help='分段方式：fixed 为固定时长，scene 为在镜头切换处分割')
+    parser.add_argument('--compression-size', type=float, default=COMPRESSION_SIZE, help='压缩目标大小（MB）')
+    parser.add_argument('--no-compression', action='store_true', help='不压缩，直接上传分割后的视频')
+    parser.add_argument('--compression-profile', choices=COMPRESSION_PROFILES, default=COMPRESSION_PROFILE,
+                        help='压缩配置：analysis 为分析代理，size 为按目标大小压缩')
+    parser.add_argument('--encoder', choices=['auto', *ENCODERS], default=COMPRESSION_ENCODER,
+                        help='压缩使用的视频编码器，auto 表示按本机测量结果选择')
+    parser.add_argument('--stream-upload', action='store_true', help='边压缩边上传，压缩的同时分块上传')
+    parser.add_argument('--virtual-segments', action='store_true',
+                        help='虚拟分段：不生成分割文件，直接从原视频中读取各 Part 的时间范围')
+    parser.add_argument('--model', default=SELECTED_MODEL, help='使用的 Gemini 模型')
+    parser.add_argument('--refine-gaps', action='store_true',
+                        help=f'对尾部和较长的空白时间段用 {REFINE_MODEL} 补充查询')
+    parser.add_argument('--cascade', action='store_true',
+                        help=f'模型级联：结果未通过校验的 Part 改用 {ESCALATION_MODEL} 重新分析')
+    parser.add_argument('--batch-api', action='store_true',
+                        help='离线批量模式：所有 Part 上传后把分析请求一次提交到 Batch API，适合夜间补跑')
+    parser.add_argument('--batch-poll-interval', type=float, default=BATCH_POLL_INTERVAL,
+                        help='离线批量模式下轮询批处理任务状态的间隔（秒）')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENT_PARTS, help='同时上传分析的 Part 数量')
+    parser.add_argument('--compress-workers', type=int, default=COMPRESS_WORKERS, help='同时压缩的 Part 数量')
+    parser.add_argument('--extract-workers', type=int, default=EXTRACT_WORKERS, help='同时提取片段的 Part 数量')
+    parser.add_argument('--clip-workers', type=int, default=CLIP_WORKERS, help='每个 Part 同时提取的片段数，0 表示自动')
+    parser.add_argument('--character-image', default=CHARACTER_IMAGE_PATH, help='角色参考图片路径')
+    parser.add_argument('--proxy', default=None, help='代理地址，传入空字符串表示不使用代理')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """命令行入口，用命令行参数覆盖配置后运行批量处理"""
+    global SEGMENT_DURATION, SEGMENT_MODE, COMPRESSION_SIZE, COMPRESSION_PROFILE, COMPRESSION_ENCODER
+    global ENABLE_COMPRESSION, SELECTED_MODEL, MODEL_CASCADE, VIRTUAL_SEGMENTS, STREAM_UPLOAD
+    global BATCH_API, BATCH_POLL_INTERVAL, REFINE_GAPS
+    global MAX_CONCURRENT_PARTS, COMPRESS_WORKERS, EXTRACT_WORKERS, CLIP_WORKERS, CHARACTER_IMAGE_PATH
+    
+    args = parse_args(argv)
+    SEGMENT_DURATION = args.segment_duration
+    SEGMENT_MODE = args.segment_mode
+    COMPRESSION_SIZE = args.compression_size
+    COMPRESSION_PROFILE = args.compression_profile
+    COMPRESSION_ENCODER = args.encoder
+    ENABLE_COMPRESSION = ENABLE_COMPRESSION and not args.no_compression
+    VIRTUAL_SEGMENTS = VIRTUAL_SEGMENTS or args.virtual_segments
+    STREAM_UPLOAD = STREAM_UPLOAD or args.stream_upload
+    SELECTED_MODEL = args.model
+    REFINE_GAPS = REFINE_GAPS or args.refine_gaps
+    MODEL_CASCADE = MODEL_CASCADE or args.cascade
+    BATCH_API = BATCH_API or args.batch_api
+    BATCH_POLL_INTERVAL = args.batch_poll_interval
+    MAX_CONCURRENT_PARTS = args.concurrency
+    COMPRESS_WORKERS = args.compress_workers
+    EXTRACT_WORKERS = args.extract_workers
+    CLIP_WORKERS = args.clip_workers
+    CHARACTER_IMAGE_PATH = args.character_image
+    if args.proxy is not None:
+        set_proxy(args.proxy)
+    
+    input_files = None
+    if args.inputs and not args.resume:
+        input_files = collect_input_files(args.inputs)
+        if not input_files:
+            logger.error("命令行中指定的输入没有匹配到任何视频文件，程序退出")
+            sys.exit(1)
+    
+    # 有 Part 处理失败时以非零状态码退出，便于调度系统判断
+    if not batch_process(resume=args.resume, input_files=input_files):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# 本地 Gemini API 桩服务器，用于在不联网、不消耗额度的情况下测试 core/gemini_client.py
+# 实现了文件上传（可恢复上传协议，支持分块上传）、文件状态查询、generateContent，
+# 以及 Batch API 的 batchGenerateContent、批处理任务查询和结果文件下载接口（离线批量模式的假后端）
+# 使用方法：
+#   1. python component/3.13gemini_stub_server.py
+#   2. 设置环境变量 GEMINI_API_BASE=http://127.0.0.1:8765 ，并设置 NO_PROXY=127.0.0.1 避免请求走代理
+#   3. 正常运行 3 / 6 / 7 系列脚本
+# 上传的文件第一次查询时为 PROCESSING，之后变为 ACTIVE；generateContent 返回固定的 Appearances JSON
+# （请求了结构化输出 responseMimeType: application/json 时直接返回 JSON，否则返回 Markdown 代码块）；
+# 批处理任务按 JSONL 请求文件逐行生成同样的结果，每查询一次状态前进一步：PENDING -> RUNNING -> SUCCEEDED
+
+import json
+import uuid
+
+from aiohttp import web
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+STUB_ANSWER = {
+    "Appearances": [
+        {"clip": "clip_1", "start": "0:05", "end": "0:10", "description": "桩服务器返回的测试片段。"}
+    ]
+}
+
+files = {}
+file_data = {}
+uploads = {}
+batches = {}
+
+
+async def start_upload(request):
+    """可恢复上传：初始化，返回上传地址"""
+    body = await request.json()
+    upload_id = uuid.uuid4().hex
+    uploads[upload_id] = {
+        'display_name': body.get('file', {}).get('display_name', ''),
+        'mime_type': request.headers.get('X-Goog-Upload-Header-Content-Type', 'application/octet-stream'),
+        'data': bytearray(),
+    }
+    upload_url = f"http://{HOST}:{PORT}/upload/v1beta/files/session?upload_id={upload_id}"
+    return web.json_response({}, headers={'X-Goog-Upload-URL': upload_url})
+
+
+async def finish_upload(request):
+    """可恢复上传：接收一块文件内容，命令中包含 finalize 时完成上传"""
+    upload_id = request.query.get('upload_id')
+    upload = uploads.get(upload_id)
+    if upload is None:
+        return web.json_response({'error': {'code': 404, 'message': 'upload not found'}}, status=404)
+
+    offset = int(request.headers.get('X-Goog-Upload-Offset', 0))
+    if offset != len(upload['data']):
+        return web.json_response({'error': {'code': 400, 'message': 'offset mismatch'}}, status=400)
+    upload['data'] += await request.read()
+    if 'finalize' not in request.headers.get('X-Goog-Upload-Command', ''):
+        return web.json_response({}, headers={'X-Goog-Upload-Status': 'active'})
+
+    uploads.pop(upload_id)
+    data = upload['data']
+    name = store_file(upload['display_name'], upload['mime_type'], bytes(data))
+    return web.json_response({'file': files[name]})
+
+
+def store_file(display_name, mime_type, data, state='PROCESSING'):
+    """保存文件内容和元数据，返回文件名"""
+    name = f"files/{uuid.uuid4().hex[:12]}"
+    files[name] = {
+        'name': name,
+        'displayName': display_name,
+        'mimeType': mime_type,
+        'sizeBytes': str(len(data)),
+        'uri': f"http://{HOST}:{PORT}/v1beta/{name}",
+        'state': state,
+        'expirationTime': '2099-01-01T00:00:00Z',
+    }
+    file_data[name] = data
+    return name
+
+
+async def get_file(request):
+    """查询文件状态，第一次查询后文件即变为 ACTIVE"""
+    name = f"files/{request.match_info['file_id']}"
+    if name not in files:
+        return web.json_response({'error': {'code': 404, 'message': 'file not found'}}, status=404)
+    file_info = dict(files[name])
+    files[name]['state'] = 'ACTIVE'
+    return web.json_response(file_info)
+
+
+def stub_response(body):
+    """按请求内容生成固定的 generateContent 响应"""
+    turns = len(body.get('contents', []))
+    if body.get('generationConfig', {}).get('responseMimeType') == 'application/json':
+        text = json.dumps(STUB_ANSWER, ensure_ascii=False)
+    else:
+        text = f"```json\n{json.dumps(STUB_ANSWER, ensure_ascii=False, indent=4)}\n```"
+    return {
+        'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+        'usageMetadata': {'promptTokenCount': 100 * turns, 'candidatesTokenCount': 50, 'totalTokenCount': 100 * turns + 50},
+    }
+
+
+async def generate_content(request):
+    """返回固定的分析结果"""
+    return web.json_response(stub_response(await request.json()))
+
+
+def batch_operation(name):
+    """批处理任务对应的长时间运行操作"""
+    batch = batches[name]
+    operation = {
+        'name': name,
+        'metadata': {'name': name, 'displayName': batch['display_name'], 'model': batch['model'],
+                     'state': batch['state']},
+        'done': batch['state'] == 'BATCH_STATE_SUCCEEDED',
+    }
+    if batch.get('responses_file'):
+        operation['metadata']['output'] = {'responsesFile': batch['responses_file']}
+        operation['response'] = {'responsesFile': batch['responses_file']}
+    return operation
+
+
+async def batch_generate_content(request):
+    """创建批处理任务，请求来自已上传的 JSONL 文件"""
+    body = (await request.json()).get('batch', {})
+    input_config = body.get('input_config') or body.get('inputConfig') or {}
+    input_file = input_config.get('file_name') or input_config.get('fileName')
+    if input_file not in file_data:
+        return web.json_response({'error': {'code': 400, 'message': 'input file not found'}}, status=400)
+    name = f"batches/{uuid.uuid4().hex[:12]}"
+    batches[name] = {
+        'display_name': body.get('display_name') or body.get('displayName', ''),
+        'model': f"models/{request.match_info['model']}",
+        'input_file': input_file,
+        'state': 'BATCH_STATE_PENDING',
+    }
+    return web.json_response(batch_operation(name))
+
+
+async def get_batch(request):
+    """查询批处理任务，每查询一次状态前进一步，成功时生成结果文件"""
+    name = f"batches/{request.match_info['batch_id']}"
+    if name not in batches:
+        return web.json_response({'error': {'code': 404, 'message': 'batch not found'}}, status=404)
+    operation = batch_operation(name)
+    batch = batches[name]
+    if batch['state'] == 'BATCH_STATE_PENDING':
+        batch['state'] = 'BATCH_STATE_RUNNING'
+    elif batch['state'] == 'BATCH_STATE_RUNNING':
+        lines = []
+        for line in file_data[batch['input_file']].decode('utf-8').splitlines():
+            if line.strip():
+                item = json.loads(line)
+                lines.append(json.dumps({'key': item.get('key'), 'response': stub_response(item['request'])},
+                                        ensure_ascii=False))
+        batch['responses_file'] = store_file('batch-results', 'application/jsonl',
+                                             '\n'.join(lines).encode('utf-8'), state='ACTIVE')
+        batch['state'] = 'BATCH_STATE_SUCCEEDED'
+    return web.json_response(operation)
+
+
+async def download_file(request):
+    """下载文件内容"""
+    name = f"files/{request.match_info['file_id']}"
+    if name not in file_data:
+        return web.json_response({'error': {'code': 404, 'message': 'file not found'}}, status=404)
+    return web.Response(body=file_data[name], content_type='application/octet-stream')
+
+
+def create_app():
+    app = web.Application(client_max_size=2 * 1024 ** 3)
+    app.router.add_post('/upload/v1beta/files', start_upload)
+    app.router.add_post('/upload/v1beta/files/session', finish_upload)
+    app.router.add_get('/v1beta/files/{file_id}', get_file)
+    app.router.add_post('/v1beta/models/{model}:generateContent', generate_content)
+    app.router.add_post('/v1beta/models/{model}:batchGenerateContent', batch_generate_content)
+    app.router.add_get('/v1beta/batches/{batch_id}', get_batch)
+    app.router.add_get('/download/v1beta/files/{file_id}:download', download_file)
+    return app
+
+
+if __name__ == '__main__':
+    print(f"[状态] Gemini 桩服务器已启动: http://{HOST}:{PORT}")
+    web.run_app(create_app(), host=HOST, port=PORT)
@@ -0,0 +1,58 @@
+# 比较上传前压缩的各配置（core/transcode.py）和编码器（core/encoders.py）：编码耗时、速度（倍速）和输出大小
+# 使用方法：
+#   python component/3.14compress_benchmark.py 样本视频.mp4 --seconds 60 --compression-size 50 --segment-duration 180
+#   python component/3.14compress_benchmark.py 样本视频.mp4 --encoders x264-veryfast x265-fast svt-av1
+# 目标码率按 SEGMENT_DURATION 秒的 Part 压缩到 COMPRESSION_SIZE 计算，与 7.videoprocess.py 中实际使用的码率一致；
+# 输出大小按样本时长换算成整个 Part 的预计上传大小。
+# 测量结果按主机保存到 outputs/encoder_benchmark.json，COMPRESSION_ENCODER 为 auto 时据此选择本机最快的编码器。
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.encoders import BENCHMARK_PATH, ENCODERS, is_available, save_benchmark
+from core.probe import get_duration
+from core.transcode import COMPRESSION_PROFILES, benchmark
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较上传前压缩的各配置和编码器')
+    parser.add_argument('input', help='样本视频')
+    parser.add_argument('--seconds', type=float, default=60, help='只压缩样本的前多少秒')
+    parser.add_argument('--compression-size', type=float, default=50, help='每个 Part 的压缩目标大小（MB）')
+    parser.add_argument('--segment-duration', type=float, default=180, help='Part 时长（秒）')
+    parser.add_argument('--profiles', nargs='+', choices=COMPRESSION_PROFILES, default=list(COMPRESSION_PROFILES))
+    parser.add_argument('--encoders', nargs='+', choices=list(ENCODERS), default=None,
+                        help='要比较的编码器，默认为当前 ffmpeg 支持的所有编码器')
+    parser.add_argument('--remove-audio', action='store_true', help='压缩时去掉音频')
+    parser.add_argument('--no-save', action='store_true', help=f'不把测量结果保存到 {BENCHMARK_PATH}')
+    args = parser.parse_args()
+
+    encoders = args.encoders or [name for name in ENCODERS if is_available(name)]
+    results = benchmark(args.input, args.profiles, target_size_mb=args.compression_size,
+                        part_duration=args.segment_duration, sample_seconds=args.seconds,
+                        remove_audio=args.remove_audio, encoders=encoders)
+
+    sample_seconds = min(args.seconds, get_duration(args.input) or args.seconds)
+    print(f"\n样本: {args.input}（前 {sample_seconds:.0f} 秒）")
+    print(f"| 配置 | 编码器 | 编码耗时 | 速度 | 样本大小 | 每个 Part 预计上传大小 |")
+    print(f"|------|--------|----------|------|----------|------------------------|")
+    for result in results:
+        if not result['ok']:
+            print(f"| {result['profile']} | {result['encoder']} | 失败 | - | - | - |")
+            continue
+        print(f"| {result['profile']} | {result['encoder']} | {result['seconds']:.1f}秒 | {result['speed']:.1f}x "
+              f"| {result['size'] / (1024 * 1024):.2f}MB | {result['part_mb']:.2f}MB |")
+
+    if not args.no_save:
+        save_benchmark(results)
+        print(f"\n测量结果已保存到 {BENCHMARK_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# 各处理脚本共用的模块
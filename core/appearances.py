@@ -0,0 +1,78 @@
+# 视频分析结果（Appearances）的结构化输出和解析。
+# 原来的做法是把模型回复写入 Markdown 报告，再从文件中用正则查找 ```json 代码块并修补多余的逗号，
+# 解析失败时这个 Part 没有任何 Appearances，已经付费的请求白白浪费。
+# 这里通过 generationConfig 的 responseSchema + responseMimeType: application/json 约束模型直接输出符合结构的 JSON
+# （与 component/3.9gemini_video_chatsession_struct.py 中的 content.Schema 对应的 REST 形式），
+# 解析在内存中直接进行；未使用结构化输出或模型仍返回了代码块时，退回原来的代码块提取方式。
+
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+APPEARANCE_FIELDS = ('clip', 'start', 'end', 'description')
+
+APPEARANCES_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'Appearances': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {field: {'type': 'STRING'} for field in APPEARANCE_FIELDS},
+                'required': list(APPEARANCE_FIELDS),
+            },
+        },
+    },
+    'required': ['Appearances'],
+}
+
+# 视频分析轮使用的 generationConfig
+STRUCTURED_GENERATION_CONFIG = {
+    'responseMimeType': 'application/json',
+    'responseSchema': APPEARANCES_SCHEMA,
+}
+
+
+def _extract_code_block(text):
+    """从 Markdown 文本中提取 ```json 代码块，并清理常见的格式问题"""
+    json_match = re.search(r'```json\s*({[\s\S]*?})\s*```', text)
+    if not json_match:
+        return None
+    json_str = json_match.group(1)
+    # 去掉被截断的描述行和最后一个多余的逗号
+    json_lines = [line for line in json_str.split('\n') if '"description"' not in line or not line.endswith('...')]
+    json_str = re.sub(r',\s*([}\]])', r'\1', '\n'.join(json_lines).strip())
+    return json.loads(json_str)
+
+
+def parse_appearances(text):
+    """解析视频分析轮的回复，返回 {'Appearances': [...]}，无法解析时返回 None
+
+    先按结构化输出直接解析整个回复，失败时再查找 ```json 代码块；
+    缺少 start / end 的条目被丢弃，缺少的其他字段补为空字符串。
+    """
+    try:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = _extract_code_block(text)
+            if data is None:
+                logger.error("[错误] 回复不是 JSON，也没有找到JSON代码块")
+                return None
+    except ValueError as e:
+        logger.error(f"[错误] JSON格式错误: {str(e)}")
+        return None
+
+    if not isinstance(data, dict) or not isinstance(data.get('Appearances'), list):
+        logger.error("[错误] JSON中缺少Appearances字段")
+        return None
+
+    appearances = []
+    for item in data['Appearances']:
+        if not isinstance(item, dict) or not item.get('start') or not item.get('end'):
+            logger.warning(f"[警告] 丢弃缺少起止时间的条目: {item}")
+            continue
+        appearances.append({field: str(item.get(field, '')) for field in APPEARANCE_FIELDS})
+    return {'Appearances': appearances}
@@ -0,0 +1,123 @@
+# Gemini Batch API 的离线批量分析。
+# 交互模式下每个 Part 都是单独的 generateContent 请求，受每分钟请求数和 Token 数限制；
+# 夜间补跑整季视频时不在意延迟，更在意吞吐和费用：批处理任务不占用交互请求的配额，并按交互价格的一半计费。
+# 流程：
+#   1. 每个请求写成 JSONL 中的一行 {"key": ..., "request": GenerateContentRequest}，保存在 outputs/batch/ 中
+#   2. 上传 JSONL 文件，调用 models/{model}:batchGenerateContent 创建批处理任务
+#   3. 轮询 batches/{id} 直到任务结束（通常几分钟到几小时，最长 24 小时）
+#   4. 下载结果文件，每行为 {"key": ..., "response": ...} 或 {"key": ..., "error": ...}，按 key 分发回各请求
+# 任务本身失败、取消、过期或不存在时抛出 BatchJobError，需要重新提交；其他错误（429 / 5xx 重试耗尽、结果下载失败、
+# 等待超时等）时任务可能仍在运行或已经成功，调用方应保留任务名，之后继续等待，避免重复提交、重复计费。
+# 本地测试时可用 component/3.13gemini_stub_server.py 作为假后端，它实现了上述接口。
+
+import asyncio
+import json
+import logging
+import os
+import time
+
+from core.gemini_client import GeminiAPIError, GeminiResponse
+
+logger = logging.getLogger(__name__)
+
+BATCH_DIR = os.path.join('outputs', 'batch')
+BATCH_POLL_INTERVAL = 60  # 轮询任务状态的间隔（秒）
+BATCH_TIMEOUT = 26 * 3600  # 等待任务结束的最长时间（秒），服务端超过 24 小时未完成的任务会过期
+BATCH_PRICE_FACTOR = 0.5  # 批处理请求相对交互请求的价格比例
+
+
+class BatchJobError(GeminiAPIError):
+    """批处理任务失败、取消、过期或不存在，任务不会再产生结果"""
+
+
+def batch_line(key, contents, generation_config=None):
+    """构建 JSONL 中的一行请求"""
+    request = {'contents': contents}
+    if generation_config:
+        request['generationConfig'] = generation_config
+    return {'key': key, 'request': request}
+
+
+def write_jsonl(path, lines):
+    """把请求逐行写入 JSONL 文件"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+    return path
+
+
+def parse_results(data):
+    """解析结果文件，返回 {key: GeminiResponse 或 GeminiAPIError}"""
+    results = {}
+    for line in data.decode('utf-8').splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        key = item.get('key')
+        if 'response' in item:
+            try:
+                results[key] = GeminiResponse(item['response'])
+            except GeminiAPIError as e:
+                results[key] = e
+        else:
+            error = item.get('error') or item.get('status') or {}
+            status = error.get('code') if isinstance(error, dict) else None
+            results[key] = GeminiAPIError(f"批处理请求失败: {error}", status=status)
+    return results
+
+
+async def submit_batch(client, model, lines, display_name):
+    """写入并上传 JSONL 请求文件，创建批处理任务，返回 BatchJob"""
+    path = write_jsonl(os.path.join(BATCH_DIR, f'{display_name}_requests.jsonl'), lines)
+    input_file = await client.upload_file(path, mime_type='application/jsonl')
+    input_file = await client.wait_for_file_active(input_file)
+    job = await client.create_batch(model, input_file, display_name)
+    logger.info(f"已提交批处理任务 {job.name}（{model}，{len(lines)} 个请求），请求文件: {path}")
+    return job
+
+
+async def _get_batch(client, name):
+    """查询批处理任务，任务不存在（404）时抛出 BatchJobError"""
+    try:
+        return await client.get_batch(name)
+    except GeminiAPIError as e:
+        if e.status == 404:
+            raise BatchJobError(f"批处理任务 {name} 不存在: {str(e)}", status=404) from e
+        raise
+
+
+async def wait_for_batch(client, name, poll_interval=BATCH_POLL_INTERVAL, timeout=BATCH_TIMEOUT):
+    """轮询批处理任务直到结束，返回成功的 BatchJob
+
+    任务失败、取消、过期或不存在时抛出 BatchJobError；等待超时抛出 TimeoutError，请求失败时抛出 GeminiAPIError。
+    """
+    start_time = time.time()
+    state = None
+    job = await _get_batch(client, name)
+    while not job.done:
+        if job.state != state:
+            state = job.state
+            logger.info(f"批处理任务 {name} 状态: {state}")
+        if time.time() - start_time > timeout:
+            raise TimeoutError(f"等待批处理任务 {name} 超时")
+        await asyncio.sleep(poll_interval)
+        job = await _get_batch(client, name)
+
+    if job.state != 'BATCH_STATE_SUCCEEDED' or not job.responses_file:
+        raise BatchJobError(f"批处理任务 {name} 未成功: {job.state} {job.error or ''}")
+    logger.info(f"批处理任务 {name} 已完成，用时 {time.time() - start_time:.0f} 秒")
+    return job
+
+
+async def batch_results(client, name, poll_interval=BATCH_POLL_INTERVAL):
+    """等待批处理任务结束并下载结果，结果文件保存在 BATCH_DIR 中，返回 {key: GeminiResponse 或 GeminiAPIError}"""
+    job = await wait_for_batch(client, name, poll_interval=poll_interval)
+    data = await client.download_file(job.responses_file)
+    path = os.path.join(BATCH_DIR, f"{name.split('/')[-1]}_results.jsonl")
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    results = parse_results(data)
+    logger.info(f"批处理任务 {name} 共返回 {len(results)} 个结果，结果文件: {path}")
+    return results
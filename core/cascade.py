@@ -0,0 +1,49 @@
+# 模型级联：先用快速模型分析，结果未通过校验时才升级到更强的模型。
+# 测试记录中 Flash 比 Pro 快约 3 倍且"基本准确"，大部分 Part 用 Flash 的结果就足够，
+# 只有以下情况才用 Pro 重新分析：
+#   - 结果无法解析
+#   - 有时间段超出 Part 时长或起点晚于终点
+#   - 覆盖率过低：有结果，但有结果的时长占 Part 时长的比例低于 CASCADE_MIN_COVERAGE
+# 没有任何结果视为有效：角色不在该 Part 中出现是正常的，不应为此升级模型。
+# response_cost 按 MODEL_PRICES 中的单价估算每次请求的费用，用于按 Part 记录模型选择和费用。
+
+import logging
+
+from core.intervals import merge_intervals, parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+CASCADE_MIN_COVERAGE = 0.05  # 有结果的时长占 Part 时长的最低比例
+TIME_TOLERANCE = 2.0  # 时间段超出 Part 时长不超过该值（秒）时不视为错误
+
+
+def validate_result(result, duration, min_coverage=CASCADE_MIN_COVERAGE):
+    """校验分析结果，通过时返回 None，否则返回未通过的原因"""
+    if not result:
+        return "结果无法解析"
+    if not result['Appearances']:
+        return None
+    intervals = []
+    for index, appearance in enumerate(result['Appearances']):
+        try:
+            start = parse_timestamp(appearance['start'])
+            end = parse_timestamp(appearance['end'])
+        except ValueError:
+            return f"无法解析的时间: {appearance['start']} - {appearance['end']}"
+        if start > end or start < 0 or (duration > 0 and end > duration + TIME_TOLERANCE):
+            return f"时间段超出范围: {appearance['start']} - {appearance['end']}"
+        intervals.append((start, end, index))
+    if duration > 0:
+        covered = sum(interval['end'] - interval['start'] for interval in merge_intervals(intervals))
+        if covered < duration * min_coverage:
+            return f"覆盖率过低: {covered:.0f}秒 / {duration:.0f}秒"
+    return None
+
+
+def response_cost(model, usage_metadata, prices):
+    """按每百万 Token 的输入、输出单价估算一次请求的费用，没有单价的模型按 0 计算"""
+    price = prices.get(model)
+    if not price:
+        return 0.0
+    return (usage_metadata.prompt_token_count * price['input']
+            + usage_metadata.candidates_token_count * price['output']) / 1_000_000
@@ -0,0 +1,409 @@
+# 视频片段提取。
+# 原来的做法是把 -ss 放在 -i 之后（从文件开头解码到起点）并对每个片段完整重新编码，
+# 这里改为把 -ss 放在 -i 之前直接定位，并尽量不重新编码：
+#   copy   - 起点向前对齐到关键帧后直接复制音视频流，最快，起点可能提前最多 snap_tolerance 秒
+#   smart  - 精确切割：只重新编码起点到下一个关键帧之间的视频（一个 GOP），其余部分直接复制后拼接；
+#            开头按源视频的 profile / level / 像素格式编码，两段都以 MPEG-TS（参数集随码流写入）拼接，
+#            避免 MP4 只保存一份参数集导致复制部分解码出错
+#   encode - 完整重新编码（默认 libx264 medium / aac，可通过 encoder 选择 core/encoders.py 中的其他后端）
+#   auto   - 起点附近 snap_tolerance 秒内有关键帧时使用 copy，否则使用 smart
+# copy / smart 失败时（例如容器不支持源音频编码）自动退回 encode。
+# smart / auto 的拼接结果还没有在各种源视频上验证过，各脚本默认使用 encode。
+# 同一个 Part 的多个片段通过 cut_clips 批量提取：所有 copy 片段在一次 ffmpeg 调用中输出（每个片段各自在输入端定位），
+# 所有 encode 片段共用一个滤镜图（源视频只解码一次），只有 smart 片段需要单独处理。
+# 这些任务互不依赖，由线程池并发启动 ffmpeg 进程执行（encode 片段按并发数分成若干批），
+# 每个 ffmpeg 进程的线程数按 CPU 核数 / 并发数设置，解码（输入端 -threads）、滤镜（-filter_threads）都使用这个值，
+# 同一进程中的多个输出平分编码线程，使总线程数与 CPU 核数大致一致。
+
+import bisect
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.encoders import ENCODERS, video_args
+from core.probe import keyframe_times, probe
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = 'ffmpeg'
+EXTRACT_MODES = ('auto', 'copy', 'smart', 'encode')
+DEFAULT_ENCODER = 'x264-medium'
+
+# smart 模式下重新编码片段开头时使用的编码器、编码器参数选项和转换为 Annex-B 码流的过滤器，需与源视频编码一致才能拼接
+SMART_ENCODERS = {
+    'h264': ('libx264', '-x264-params', 'h264_mp4toannexb'),
+    'hevc': ('libx265', '-x265-params', 'hevc_mp4toannexb'),
+}
+
+# ffprobe 输出的 profile 名称对应的编码器 profile 参数
+_SMART_PROFILES = {
+    'h264': {'Constrained Baseline': 'baseline', 'Baseline': 'baseline', 'Main': 'main', 'High': 'high',
+             'High 10': 'high10', 'High 4:2:2': 'high422', 'High 4:4:4 Predictive': 'high444'},
+    'hevc': {'Main': 'main', 'Main 10': 'main10', 'Main Still Picture': 'mainstillpicture'},
+}
+
+# 自动确定并发数时，每个 ffmpeg 进程分配的 CPU 核数（libx264 在 4 线程左右效率最高）
+CORES_PER_JOB = 4
+
+# 判断时间点是否落在关键帧上的误差（秒）
+_EPSILON = 0.01
+
+# 直接复制时定位时间相对关键帧向后偏移的秒数（小于一帧）。
+# 输入端定位会落在不晚于定位时间的最后一个关键帧上，时间保留三位小数后若早于关键帧，就会落到前一个关键帧
+_SEEK_OFFSET = 0.001
+
+
+def _run(cmd):
+    return subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        encoding='utf-8',
+        errors='ignore'
+    )
+
+
+def plan_cut(keyframes, start, end, mode='auto', snap_tolerance=1.0):
+    """根据关键帧位置决定切割方式，返回 (方式, 实际起点, 开头重新编码的终点)"""
+    if mode == 'encode' or not keyframes:
+        return 'encode', start, None
+
+    idx = bisect.bisect_right(keyframes, start + _EPSILON) - 1
+    before = keyframes[idx] if idx >= 0 else None
+    if mode == 'copy':
+        return 'copy', before if before is not None else start, None
+    if before is not None and abs(start - before) <= _EPSILON:
+        # 起点正好是关键帧，直接复制也是精确的
+        return 'copy', before, None
+    # smart 要求起点精确，只有 auto 允许向前对齐到关键帧
+    if mode == 'auto' and before is not None and start - before <= snap_tolerance:
+        return 'copy', before, None
+
+    after = next((k for k in keyframes[idx + 1:] if k > start + _EPSILON), None)
+    if after is None or after >= end:
+        return 'encode', start, None
+    return 'smart', start, after
+
+
+def _keyframe_seek(time):
+    """直接复制时在输入端定位到 time 处关键帧的时间参数"""
+    return f'{time + _SEEK_OFFSET:.3f}'
+
+
+def _threads_args(threads):
+    return ['-threads', str(threads)] if threads else []
+
+
+def _output_threads(threads, outputs):
+    """同一进程中的多个输出平分编码线程"""
+    return max(1, threads // outputs) if threads else None
+
+
+def _encode_cmd(input_file, output_file, start, duration, threads=None, encoder=DEFAULT_ENCODER):
+    return [
+        FFMPEG, '-y',
+        *_threads_args(threads),
+        '-ss', f'{start:.3f}',
+        '-i', input_file,
+        '-t', f'{duration:.3f}',
+        *video_args(encoder),
+        '-c:a', 'aac',
+        *_threads_args(threads),
+        output_file
+    ]
+
+
+def _copy_cmd(input_file, output_file, start, duration):
+    return [
+        FFMPEG, '-y',
+        '-ss', _keyframe_seek(start),
+        '-i', input_file,
+        '-t', f'{duration:.3f}',
+        '-map', '0:v:0', '-map', '0:a:0?',
+        '-c', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        output_file
+    ]
+
+
+def _smart_encode_args(stream):
+    """按源视频流的 profile / level / 像素格式生成开头部分的编码参数，源编码不支持时返回 None
+
+    每个关键帧前都重复写入参数集（repeat-headers），拼接后解码器可以按码流中的参数集切换。
+    """
+    codec = stream.get('codec_name')
+    if codec not in SMART_ENCODERS:
+        return None
+    encoder, params_option, _ = SMART_ENCODERS[codec]
+    args = ['-c:v', encoder, '-crf', '18', '-preset', 'veryfast']
+    if stream.get('pix_fmt'):
+        args += ['-pix_fmt', stream['pix_fmt']]
+    profile = _SMART_PROFILES[codec].get(stream.get('profile'))
+    if profile:
+        args += ['-profile:v', profile]
+    params = ['repeat-headers=1']
+    level = int(stream.get('level') or 0)
+    if level > 0:
+        # ffprobe 中 H.264 的 level 为 level × 10，HEVC 为 level × 30
+        if codec == 'h264':
+            args += ['-level:v', f'{level / 10:.1f}']
+        else:
+            params.append(f'level-idc={level / 30:.1f}')
+    if stream.get('refs') and codec == 'h264':
+        params.append(f"ref={stream['refs']}")
+    return args + [params_option, ':'.join(params)]
+
+
+def _smart_cut(input_file, output_file, start, head_end, end, threads=None):
+    """重新编码 [start, head_end) 的视频，复制 [head_end, end) 的音视频流，再无损拼接
+
+    两段先写成 MPEG-TS（Annex-B 码流，参数集随码流写入），再拼接输出，
+    复制部分继续使用源视频自己的参数集，不依赖输出文件中唯一的一份参数集。
+    """
+    stream = probe(input_file).video_stream or {}
+    encode_args = _smart_encode_args(stream)
+    if encode_args is None:
+        return False
+    annexb = SMART_ENCODERS[stream['codec_name']][2]
+
+    tmp_dir = tempfile.mkdtemp(prefix='clip_', dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        head_file = os.path.join(tmp_dir, 'head.ts')
+        tail_file = os.path.join(tmp_dir, 'tail.ts')
+        list_file = os.path.join(tmp_dir, 'concat.txt')
+
+        head_cmd = [
+            FFMPEG, '-y',
+            *_threads_args(threads),
+            '-ss', f'{start:.3f}',
+            '-i', input_file,
+            '-t', f'{head_end - start:.3f}',
+            '-map', '0:v:0', '-map', '0:a:0?',
+            *encode_args,
+            '-c:a', 'copy',
+            *_threads_args(threads),
+            '-f', 'mpegts',
+            head_file
+        ]
+        tail_cmd = [
+            FFMPEG, '-y',
+            '-ss', _keyframe_seek(head_end),
+            '-i', input_file,
+            '-t', f'{end - head_end:.3f}',
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-c', 'copy',
+            '-bsf:v', annexb,
+            '-f', 'mpegts',
+            tail_file
+        ]
+        if _run(head_cmd).returncode != 0:
+            return False
+        if _run(tail_cmd).returncode != 0:
+            return False
+
+        with open(list_file, 'w', encoding='utf-8') as f:
+            for path in (head_file, tail_file):
+                path = path.replace('\\', '/').replace("'", "'\\''")
+                f.write(f"file '{path}'\n")
+        concat_cmd = [
+            FFMPEG, '-y',
+            '-f', 'concat', '-safe', '0',
+            '-i', list_file,
+            '-c', 'copy',
+            output_file
+        ]
+        return _run(concat_cmd).returncode == 0
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _check_encoder(encoder):
+    if encoder not in ENCODERS or encoder == 'copy':
+        raise ValueError(f"不支持的片段编码器: {encoder}")
+
+
+def cut_clip(input_file, output_file, start, end, mode='auto', snap_tolerance=1.0, threads=None,
+             encoder=DEFAULT_ENCODER):
+    """切割单个片段，返回实际使用的方式（copy / smart / encode），失败时抛出 RuntimeError
+
+    encoder 为重新编码时使用的编码器后端（core/encoders.py）。
+    """
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"不支持的提取方式: {mode}")
+    _check_encoder(encoder)
+
+    keyframes = []
+    if mode != 'encode':
+        try:
+            keyframes = keyframe_times(input_file)
+        except Exception as e:
+            logger.warning(f"读取关键帧失败，改为重新编码: {str(e)}")
+
+    method, cut_start, head_end = plan_cut(keyframes, start, end, mode, snap_tolerance)
+    if method == 'copy':
+        if _run(_copy_cmd(input_file, output_file, cut_start, end - cut_start)).returncode == 0:
+            return method
+        logger.warning(f"直接复制失败，改为重新编码: {output_file}")
+    elif method == 'smart':
+        if _smart_cut(input_file, output_file, cut_start, head_end, end, threads):
+            return method
+        logger.warning(f"精确切割失败，改为重新编码: {output_file}")
+
+    result = _run(_encode_cmd(input_file, output_file, start, end - start, threads, encoder))
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 提取片段失败: {result.stderr.strip()[-500:]}")
+    return 'encode'
+
+
+def _batch_copy_cmd(input_file, jobs):
+    """一次 ffmpeg 调用输出多个直接复制的片段
+
+    每个片段各自作为一个输入在输入端定位到关键帧；在输出端定位时，
+    定位时间稍晚于关键帧的时间戳就会丢掉该关键帧，片段最多晚开始一个 GOP。
+    """
+    cmd = [FFMPEG, '-y']
+    for _, start, end in jobs:
+        cmd += ['-ss', _keyframe_seek(start), '-t', f'{end - start:.3f}', '-i', input_file]
+    for i, (output_file, _, _) in enumerate(jobs):
+        cmd += [
+            '-map', f'{i}:v:0', '-map', f'{i}:a:0?',
+            '-c', 'copy',
+            '-avoid_negative_ts', 'make_zero',
+            output_file
+        ]
+    return cmd
+
+
+def _batch_encode_cmd(input_file, jobs, has_audio, threads=None, encoder=DEFAULT_ENCODER):
+    """用 split / trim 滤镜图一次解码源文件，输出多个重新编码的片段"""
+    # 从最早的片段起点开始解码，之后的时间都相对该起点计算
+    base = min(start for _, start, _ in jobs)
+    count = len(jobs)
+    graph = ['[0:v]split={}{}'.format(count, ''.join(f'[v{i}]' for i in range(count)))]
+    if has_audio:
+        graph.append('[0:a]asplit={}{}'.format(count, ''.join(f'[a{i}]' for i in range(count))))
+    for i, (_, start, end) in enumerate(jobs):
+        trim = f'start={start - base:.3f}:end={end - base:.3f}'
+        graph.append(f'[v{i}]trim={trim},setpts=PTS-STARTPTS[ov{i}]')
+        if has_audio:
+            graph.append(f'[a{i}]atrim={trim},asetpts=PTS-STARTPTS[oa{i}]')
+
+    cmd = [FFMPEG, '-y']
+    if threads:
+        cmd += ['-filter_threads', str(threads)]
+    cmd += [*_threads_args(threads), '-ss', f'{base:.3f}', '-i', input_file, '-filter_complex', ';'.join(graph)]
+    output_threads = _output_threads(threads, count)
+    for i, (output_file, _, _) in enumerate(jobs):
+        cmd += ['-map', f'[ov{i}]']
+        if has_audio:
+            cmd += ['-map', f'[oa{i}]']
+        cmd += [*video_args(encoder), '-c:a', 'aac', *_threads_args(output_threads), output_file]
+    return cmd
+
+
+def default_workers(cpu_count=None):
+    """根据 CPU 核数确定同时运行的 ffmpeg 进程数"""
+    return max(1, (cpu_count or os.cpu_count() or 1) // CORES_PER_JOB)
+
+
+def _split_batches(items, count):
+    """把列表尽量平均地分成 count 份（保持顺序）"""
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    batches, pos = [], 0
+    for i in range(count):
+        end = pos + size + (1 if i < extra else 0)
+        batches.append(items[pos:end])
+        pos = end
+    return batches
+
+
+def cut_clips(input_file, jobs, mode='auto', snap_tolerance=1.0, workers=None, cpu_count=None,
+              encoder=DEFAULT_ENCODER):
+    """批量切割同一个源文件的多个片段
+
+    jobs 为 (输出文件, 起点, 终点) 列表，返回 {输出文件: 实际使用的方式}。
+    workers 为同时运行的 ffmpeg 进程数（默认按 CPU 核数确定），cpu_count 为可用的 CPU 核数，
+    encoder 为重新编码时使用的编码器后端。
+    批量调用失败时逐个片段重试；所有任务结束后仍有片段失败时抛出 RuntimeError。
+    """
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"不支持的提取方式: {mode}")
+    _check_encoder(encoder)
+    if not jobs:
+        return {}
+
+    cpu_count = cpu_count or os.cpu_count() or 1
+    workers = max(1, min(workers or default_workers(cpu_count), len(jobs)))
+    threads = max(1, cpu_count // workers)
+
+    keyframes = []
+    if mode != 'encode':
+        try:
+            keyframes = keyframe_times(input_file)
+        except Exception as e:
+            logger.warning(f"读取关键帧失败，改为重新编码: {str(e)}")
+
+    original = {output_file: (start, end) for output_file, start, end in jobs}
+    groups = {'copy': [], 'smart': [], 'encode': []}
+    for output_file, start, end in jobs:
+        method, cut_start, _ = plan_cut(keyframes, start, end, mode, snap_tolerance)
+        groups[method].append((output_file, cut_start if method == 'copy' else start, end))
+
+    # 拆分为互不依赖的任务：一批 copy、若干批 encode、每个 smart 片段各一个
+    tasks = []
+    if groups['copy']:
+        tasks.append(('copy', groups['copy']))
+    if groups['encode']:
+        tasks += [('encode', batch) for batch in _split_batches(groups['encode'], workers)]
+    tasks += [('smart', [job]) for job in groups['smart']]
+
+    def run_one_by_one(batch):
+        results = {}
+        for output_file, _, _ in batch:
+            try:
+                results[output_file] = cut_clip(input_file, output_file, *original[output_file],
+                                                mode=mode, snap_tolerance=snap_tolerance, threads=threads,
+                                                encoder=encoder)
+            except Exception as e:
+                results[output_file] = e
+        return results
+
+    def run_task(kind, batch):
+        if kind == 'copy':
+            if _run(_batch_copy_cmd(input_file, batch)).returncode == 0:
+                return {output_file: 'copy' for output_file, _, _ in batch}
+            logger.warning(f"批量复制失败，改为逐个提取: {input_file}")
+        elif kind == 'encode':
+            has_audio = probe(input_file).has_audio
+            if _run(_batch_encode_cmd(input_file, batch, has_audio, threads, encoder)).returncode == 0:
+                return {output_file: 'encode' for output_file, _, _ in batch}
+            logger.warning(f"批量重新编码失败，改为逐个提取: {input_file}")
+        return run_one_by_one(batch)
+
+    methods, errors = {}, {}
+    logger.info(f"开始提取 {len(jobs)} 个片段，并发数 {workers}，每个进程 {threads} 线程: {input_file}")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_task, kind, batch): batch for kind, batch in tasks}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {output_file: e for output_file, _, _ in batch}
+            for output_file, method in result.items():
+                if isinstance(method, Exception):
+                    errors[output_file] = method
+                    logger.error(f"片段提取失败: {os.path.basename(output_file)}: {str(method)}")
+                    continue
+                methods[output_file] = method
+                logger.info(f"片段提取完成 ({len(methods)}/{len(jobs)}): {os.path.basename(output_file)}（{method}）")
+
+    if errors:
+        names = ', '.join(os.path.basename(output_file) for output_file in errors)
+        raise RuntimeError(f"{len(errors)} 个片段提取失败: {names}")
+    return methods
@@ -0,0 +1,141 @@
+# 编码器后端注册表，替代各脚本中写死的 libx264 -preset medium。
+# 每个后端对应一个 ffmpeg 视频编码器及其预设，压缩（core/transcode.py）和片段提取（core/clips.py）都通过名称选择后端：
+#   x264-ultrafast / x264-veryfast / x264-fast / x264-medium - libx264 的不同预设
+#   x265-fast - libx265（HEVC），相同画质下文件更小，编码更慢
+#   svt-av1   - libsvtav1（AV1），高预设编号时速度接近 x264，文件更小
+#   copy      - 不重新编码，直接复制视频流
+# 不同主机上各编码器的速度差别很大（CPU 核数、指令集、ffmpeg 编译选项），
+# component/3.14compress_benchmark.py 在样本上测量各后端的速度和输出大小，结果按主机保存在 outputs/encoder_benchmark.json；
+# 配置为 auto 时，pick_encoder 从本机的测量结果中选出输出大小满足要求的最快后端，没有测量结果时使用默认后端。
+
+import functools
+import json
+import logging
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = 'ffmpeg'
+
+# crf 为分析代理（按画质编码）使用的 CRF，各编码器的 CRF 取值范围不同，这里取画质大致相当的值
+ENCODERS = {
+    'x264-ultrafast': {'codec': 'libx264', 'args': ['-preset', 'ultrafast'], 'crf': 30},
+    'x264-veryfast': {'codec': 'libx264', 'args': ['-preset', 'veryfast'], 'crf': 30},
+    'x264-fast': {'codec': 'libx264', 'args': ['-preset', 'fast'], 'crf': 30},
+    'x264-medium': {'codec': 'libx264', 'args': ['-preset', 'medium'], 'crf': 30},
+    'x265-fast': {'codec': 'libx265', 'args': ['-preset', 'fast', '-tag:v', 'hvc1'], 'crf': 32},
+    'svt-av1': {'codec': 'libsvtav1', 'args': ['-preset', '10'], 'crf': 40},
+    'copy': {'codec': 'copy', 'args': [], 'crf': None},
+}
+
+BENCHMARK_PATH = os.path.join('outputs', 'encoder_benchmark.json')
+SIZE_TOLERANCE = 1.05  # 按码率编码时输出大小会略微超过目标，选择编码器时允许的超出比例
+
+
+@functools.lru_cache(maxsize=None)
+def available_codecs():
+    """当前 ffmpeg 支持的编码器名称，无法查询时返回空集合"""
+    try:
+        result = subprocess.run(
+            [FFMPEG, '-hide_banner', '-encoders'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            encoding='utf-8',
+            errors='ignore'
+        )
+    except OSError as e:
+        logger.warning(f"无法查询 ffmpeg 支持的编码器: {str(e)}")
+        return frozenset()
+    codecs = set()
+    for line in result.stdout.splitlines():
+        fields = line.split()
+        # 编码器列表的每一行形如 " V....D libx264  libx264 H.264 ..."
+        if len(fields) >= 2 and len(fields[0]) == 6 and fields[0][0] in 'VAS':
+            codecs.add(fields[1])
+    return frozenset(codecs)
+
+
+def is_available(name):
+    """判断编码器后端在当前 ffmpeg 中是否可用（无法查询时视为可用）"""
+    codec = ENCODERS[name]['codec']
+    codecs = available_codecs()
+    return codec == 'copy' or not codecs or codec in codecs
+
+
+def video_args(name, bitrate=None, maxrate=None, quality=False):
+    """返回编码器后端的视频编码参数
+
+    bitrate 为目标码率（bit/s）；quality 为 True 时按该后端的 CRF 编码，maxrate 为码率上限。
+    """
+    if name not in ENCODERS:
+        raise ValueError(f"不支持的编码器: {name}")
+    backend = ENCODERS[name]
+    args = ['-c:v', backend['codec'], *backend['args']]
+    if backend['codec'] == 'copy':
+        return args
+    if bitrate:
+        args += ['-b:v', f'{bitrate}']
+    if quality and backend['crf'] is not None:
+        args += ['-crf', str(backend['crf'])]
+    if maxrate:
+        args += ['-maxrate', f'{maxrate}', '-bufsize', f'{maxrate * 2}']
+    return args
+
+
+def host_id():
+    """区分测量结果所属主机的标识"""
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}"
+
+
+def save_benchmark(results, path=BENCHMARK_PATH):
+    """保存本机的测量结果，其他主机的结果保持不变"""
+    data = load_benchmark_file(path)
+    data[host_id()] = {'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'results': results}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    pick_encoder.cache_clear()
+
+
+def load_benchmark_file(path=BENCHMARK_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取编码器测量结果失败: {str(e)}")
+        return {}
+
+
+@functools.lru_cache(maxsize=None)
+def pick_encoder(profile, target_size_mb, default, path=BENCHMARK_PATH):
+    """从本机的测量结果中选出 profile 配置下最快、且每个 Part 的预计大小不超过 target_size_mb 的编码器"""
+    results = load_benchmark_file(path).get(host_id(), {}).get('results', [])
+    # copy 的输出大小取决于每个视频的原始码率，样本上的测量结果不能推广，不参与自动选择
+    candidates = [
+        result for result in results
+        if result.get('profile') == profile and result.get('ok') and result.get('encoder') in ENCODERS
+        and result['encoder'] != 'copy'
+        and result.get('part_mb', 0) <= target_size_mb * SIZE_TOLERANCE and is_available(result['encoder'])
+    ]
+    if not candidates:
+        logger.info(f"本机没有满足条件的编码器测量结果，使用默认编码器: {default}")
+        return default
+    best = max(candidates, key=lambda result: result['speed'])
+    logger.info(f"根据本机测量结果选择编码器: {best['encoder']}（{best['speed']:.1f}x，"
+                f"每个 Part 约 {best['part_mb']:.1f}MB）")
+    return best['encoder']
+
+
+def resolve_encoder(name, profile, target_size_mb, default):
+    """name 为 auto 时按本机测量结果选择编码器，否则原样返回"""
+    if name == 'auto':
+        return pick_encoder(profile, target_size_mb, default)
+    if name not in ENCODERS:
+        raise ValueError(f"不支持的编码器: {name}")
+    return name
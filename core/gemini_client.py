@@ -0,0 +1,468 @@
+# 基于 asyncio 的 Gemini API 客户端，替代各脚本中阻塞的上传、轮询和消息发送函数。
+# 直接调用 Gemini REST 接口（文件上传、文件状态查询、generateContent），
+# 单个事件循环即可同时处理几十个视频片段，而不需要为每个片段占用一个线程。
+# 可通过环境变量 GEMINI_API_BASE 指向本地桩服务器进行测试，参考 component/3.13gemini_stub_server.py
+# generateContent 请求经过 core/rate_limiter.py 中按模型配置的全局限流器。
+# upload_stream 支持分块上传边编码边产生的数据（例如 ffmpeg 通过管道输出的分片 MP4）。
+# create_batch / get_batch / download_file 用于 Batch API 的离线批量分析，参考 core/batch_api.py
+
+import asyncio
+import logging
+import mimetypes
+import os
+import re
+import time
+
+import aiohttp
+
+from core.rate_limiter import backoff_delay, get_rate_limiter, parse_retry_after
+from core.upload_cache import file_sha256
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://generativelanguage.googleapis.com'
+API_VERSION = 'v1beta'
+
+# 粗略的 Token 估算，用于请求前预约 tpm 配额，请求完成后按 usageMetadata 修正
+IMAGE_TOKENS = 258
+VIDEO_TOKENS_PER_SECOND = 300
+AUDIO_TOKENS_PER_SECOND = 32
+DEFAULT_MEDIA_TOKENS = 258
+CHARS_PER_TOKEN = 2
+
+# 分块上传时每块的大小，必须是可恢复上传分块粒度（256 KB）的整数倍
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# 批处理任务结束时的状态
+BATCH_TERMINAL_STATES = ('BATCH_STATE_SUCCEEDED', 'BATCH_STATE_FAILED', 'BATCH_STATE_CANCELLED', 'BATCH_STATE_EXPIRED')
+
+# 已上传文件 URI 对应的 Token 估算值，同一进程内的所有客户端共用
+_media_tokens = {}
+
+
+class GeminiAPIError(Exception):
+    """Gemini API 请求失败"""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class GeminiFile:
+    """通过 File API 上传的文件"""
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.uri = data.get('uri')
+        self.mime_type = data.get('mimeType')
+        self.state = data.get('state', 'STATE_UNSPECIFIED')
+        self.expiration_time = data.get('expirationTime')
+        self.raw = data
+        if self.uri:
+            _media_tokens[self.uri] = self.estimated_tokens
+
+    @property
+    def estimated_tokens(self):
+        """按媒体类型和时长估算该文件占用的 Token 数"""
+        mime_type = self.mime_type or ''
+        if mime_type.startswith('image/'):
+            return IMAGE_TOKENS
+        match = re.match(r'^([\d.]+)s$', str(self.raw.get('videoMetadata', {}).get('videoDuration', '')))
+        if match is None:
+            return DEFAULT_MEDIA_TOKENS
+        per_second = VIDEO_TOKENS_PER_SECOND if mime_type.startswith('video/') else AUDIO_TOKENS_PER_SECOND
+        return int(float(match.group(1)) * per_second)
+
+    def to_part(self):
+        """转换为请求内容中的 file_data 部分"""
+        return {'file_data': {'mime_type': self.mime_type, 'file_uri': self.uri}}
+
+
+class BatchJob:
+    """Batch API 的批处理任务（batchGenerateContent 返回的长时间运行操作）"""
+
+    def __init__(self, data):
+        metadata = data.get('metadata') or {}
+        self.name = data.get('name') or metadata.get('name')
+        self.state = metadata.get('state', 'BATCH_STATE_UNSPECIFIED')
+        output = metadata.get('output') or data.get('response') or {}
+        self.responses_file = output.get('responsesFile')
+        self.error = data.get('error')
+        self.raw = data
+
+    @property
+    def done(self):
+        return self.state in BATCH_TERMINAL_STATES or bool(self.error)
+
+
+class UsageMetadata:
+    """Token 使用统计"""
+
+    def __init__(self, data):
+        self.prompt_token_count = data.get('promptTokenCount', 0)
+        self.candidates_token_count = data.get('candidatesTokenCount', 0)
+        self.total_token_count = data.get('totalTokenCount', 0)
+
+
+class GeminiResponse:
+    """generateContent 的响应"""
+
+    def __init__(self, data):
+        self.raw = data
+        self.usage_metadata = UsageMetadata(data.get('usageMetadata', {}))
+        candidates = data.get('candidates') or []
+        if not candidates:
+            feedback = data.get('promptFeedback', {})
+            raise GeminiAPIError(f"响应中没有候选结果: {feedback}")
+        self.content = candidates[0].get('content', {'role': 'model', 'parts': []})
+        self.content.setdefault('role', 'model')
+        self.finish_reason = candidates[0].get('finishReason')
+
+    @property
+    def text(self):
+        return ''.join(part.get('text', '') for part in self.content.get('parts', []))
+
+
+def to_content(message, role='user'):
+    """将字符串、GeminiFile 或它们组成的列表转换为请求中的 content"""
+    if not isinstance(message, (list, tuple)):
+        message = [message]
+
+    parts = []
+    for item in message:
+        if isinstance(item, str):
+            parts.append({'text': item})
+        elif isinstance(item, GeminiFile):
+            parts.append(item.to_part())
+        elif isinstance(item, dict):
+            parts.append(item)
+        else:
+            raise TypeError(f"不支持的消息类型: {type(item)}")
+    return {'role': role, 'parts': parts}
+
+
+def estimate_tokens(contents):
+    """估算请求内容的 Token 数"""
+    total = 0
+    for content in contents:
+        for part in content.get('parts', []):
+            if 'text' in part:
+                total += len(part['text']) // CHARS_PER_TOKEN + 1
+            elif 'file_data' in part:
+                total += _media_tokens.get(part['file_data'].get('file_uri'), DEFAULT_MEDIA_TOKENS)
+    return total
+
+
+class AsyncChatSession:
+    """多轮对话会话，在本地保存对话历史，每轮请求发送完整历史"""
+
+    def __init__(self, client, model, history=None, generation_config=None):
+        self.client = client
+        self.model = model
+        self.history = list(history or [])
+        self.generation_config = generation_config
+
+    async def send_message(self, message, generation_config=None):
+        """发送一轮消息，成功后把本轮问答追加到历史
+
+        generation_config 只用于本轮（例如只对视频分析轮使用结构化输出），默认使用会话的配置。
+        """
+        content = to_content(message)
+        response = await self.client.generate_content(
+            self.model, self.history + [content], generation_config=generation_config or self.generation_config
+        )
+        self.history.extend([content, response.content])
+        return response
+
+
+class AsyncGeminiClient:
+    """异步 Gemini API 客户端"""
+
+    def __init__(self, api_key, base_url=None, max_retries=5, backoff_base=2, backoff_cap=120, timeout=600,
+                 upload_cache=None):
+        self.api_key = api_key
+        self.upload_cache = upload_cache
+        self.base_url = (base_url or os.getenv('GEMINI_API_BASE') or DEFAULT_BASE_URL).rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            # trust_env=True 使 HTTPS_PROXY / HTTP_PROXY 代理设置生效
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trust_env=True
+            )
+        return self._session
+
+    async def close(self):
+        """关闭底层 HTTP 会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(self, method, url, limiter=None, estimated_tokens=0, **kwargs):
+        """带限流和重试机制的请求，返回 (响应头, JSON 内容)"""
+        params = dict(kwargs.pop('params', {}))
+        params['key'] = self.api_key
+        data_factory = kwargs.pop('data_factory', None)
+        raw = kwargs.pop('raw', False)
+
+        for attempt in range(self.max_retries):
+            if limiter is not None:
+                wait_time = limiter.reserve(estimated_tokens)
+                if wait_time > 0:
+                    logger.debug(f"[{limiter.model}] 限流等待 {wait_time:.1f} 秒")
+                    await asyncio.sleep(wait_time)
+            try:
+                if data_factory is not None:
+                    kwargs['data'] = data_factory()
+                async with self._get_session().request(method, url, params=params, **kwargs) as resp:
+                    if resp.status >= 400:
+                        body = await resp.text()
+                        raise GeminiAPIError(
+                            f"{resp.status} {body[:500]}",
+                            status=resp.status,
+                            retry_after=parse_retry_after(resp.headers.get('Retry-After'), body)
+                        )
+                    if raw:
+                        return resp.headers, await resp.read()
+                    payload = await resp.json(content_type=None) if resp.content_length != 0 else {}
+                    return resp.headers, payload or {}
+
+            except (GeminiAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, 'status', None)
+                # 失败的请求不计入 tpm 用量
+                if limiter is not None:
+                    limiter.record_usage(estimated_tokens, 0)
+                # 其他 4xx 错误重试也不会成功
+                if isinstance(e, GeminiAPIError) and status and 400 <= status < 500 and status != 429:
+                    raise
+
+                if attempt == self.max_retries - 1:
+                    logger.error(f"达到最大重试次数 ({self.max_retries})，放弃处理: {str(e)}")
+                    raise
+
+                # 指数退避加随机抖动，服务端给出等待时间时以服务端为准
+                wait_time = getattr(e, 'retry_after', None)
+                if wait_time is None:
+                    wait_time = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+
+                if status == 429:  # 配额限制，同一模型的其他请求一起暂停
+                    if limiter is not None:
+                        limiter.block(wait_time)
+                    logger.warning(f"达到API限制，等待 {wait_time:.1f} 秒后重试...")
+                elif status and status >= 500:  # 服务器错误
+                    logger.warning(f"服务器暂时不可用，等待 {wait_time:.1f} 秒后重试...")
+                else:
+                    logger.warning(f"发生错误: {str(e)}，等待 {wait_time:.1f} 秒后重试...")
+
+                # 限流器被暂停时，下一次循环的预约会等待剩余时间
+                if status != 429 or limiter is None:
+                    await asyncio.sleep(wait_time)
+
+    async def upload_file(self, file_path, mime_type=None, display_name=None):
+        """通过可恢复上传协议上传文件"""
+        mime_type = mime_type or mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        display_name = display_name or os.path.basename(file_path)
+        size = os.path.getsize(file_path)
+
+        headers, _ = await self._request(
+            'POST', f"{self.base_url}/upload/{API_VERSION}/files",
+            headers={
+                'X-Goog-Upload-Protocol': 'resumable',
+                'X-Goog-Upload-Command': 'start',
+                'X-Goog-Upload-Header-Content-Length': str(size),
+                'X-Goog-Upload-Header-Content-Type': mime_type,
+            },
+            json={'file': {'display_name': display_name}}
+        )
+        upload_url = headers.get('X-Goog-Upload-URL')
+        if not upload_url:
+            raise GeminiAPIError("上传初始化失败：响应中没有 X-Goog-Upload-URL")
+
+        with open(file_path, 'rb') as f:
+            def rewind():
+                f.seek(0)
+                return f
+
+            _, payload = await self._request(
+                'POST', upload_url,
+                headers={
+                    'Content-Length': str(size),
+                    'X-Goog-Upload-Offset': '0',
+                    'X-Goog-Upload-Command': 'upload, finalize',
+                },
+                data_factory=rewind
+            )
+        return GeminiFile(payload.get('file', payload))
+
+    async def upload_stream(self, chunks, mime_type, display_name):
+        """通过可恢复上传协议分块上传边生成边读取的数据，不需要事先知道文件大小
+
+        chunks 为异步迭代器，依次产生 bytes；每攒够 UPLOAD_CHUNK_SIZE 字节上传一块，最后一块同时结束上传。
+        """
+        headers, _ = await self._request(
+            'POST', f"{self.base_url}/upload/{API_VERSION}/files",
+            headers={
+                'X-Goog-Upload-Protocol': 'resumable',
+                'X-Goog-Upload-Command': 'start',
+                'X-Goog-Upload-Header-Content-Type': mime_type,
+            },
+            json={'file': {'display_name': display_name}}
+        )
+        upload_url = headers.get('X-Goog-Upload-URL')
+        if not upload_url:
+            raise GeminiAPIError("上传初始化失败：响应中没有 X-Goog-Upload-URL")
+
+        offset = 0
+        buffer = bytearray()
+        async for data in chunks:
+            buffer += data
+            # 除最后一块外，每块大小必须是服务端分块粒度的整数倍
+            while len(buffer) >= UPLOAD_CHUNK_SIZE:
+                chunk = bytes(buffer[:UPLOAD_CHUNK_SIZE])
+                del buffer[:UPLOAD_CHUNK_SIZE]
+                await self._request(
+                    'POST', upload_url,
+                    headers={
+                        'Content-Length': str(len(chunk)),
+                        'X-Goog-Upload-Offset': str(offset),
+                        'X-Goog-Upload-Command': 'upload',
+                    },
+                    data=chunk
+                )
+                offset += len(chunk)
+
+        _, payload = await self._request(
+            'POST', upload_url,
+            headers={
+                'Content-Length': str(len(buffer)),
+                'X-Goog-Upload-Offset': str(offset),
+                'X-Goog-Upload-Command': 'upload, finalize',
+            },
+            data=bytes(buffer)
+        )
+        return GeminiFile(payload.get('file', payload))
+
+    async def get_file(self, name):
+        """查询已上传文件的状态"""
+        _, payload = await self._request('GET', f"{self.base_url}/{API_VERSION}/{name}")
+        return GeminiFile(payload)
+
+    async def wait_for_file_active(self, media_file, timeout=300, poll_interval=10):
+        """等待文件处理完成，返回状态为 ACTIVE 的文件"""
+        start_time = time.time()
+        while media_file.state == 'PROCESSING':
+            if time.time() - start_time > timeout:
+                raise TimeoutError("视频处理超时")
+            await asyncio.sleep(poll_interval)
+            media_file = await self.get_file(media_file.name)
+
+        if media_file.state == 'FAILED':
+            raise ValueError(f"视频处理失败: {media_file.state}")
+        return media_file
+
+    async def upload_media(self, file_path, media_type):
+        """上传媒体文件并等待处理完成，启用上传缓存时优先复用远端仍然有效的同内容文件"""
+        sha = None
+        if self.upload_cache is not None:
+            loop = asyncio.get_running_loop()
+            sha = await loop.run_in_executor(None, file_sha256, file_path)
+            media_file = await self._reuse_cached(sha, file_path, media_type)
+            if media_file is not None:
+                return media_file
+
+        logger.info(f"正在上传{media_type}: {file_path}")
+        media_file = await self.upload_file(file_path)
+        logger.info(f"上传完成: {media_file.uri}")
+
+        if media_file.state == 'PROCESSING':
+            logger.info(f"等待{media_type}处理完成...")
+        media_file = await self.wait_for_file_active(media_file)
+        logger.info(f"{media_type}处理已完成")
+
+        if sha is not None:
+            self.upload_cache.store(sha, file_path, media_file)
+        return media_file
+
+    async def _reuse_cached(self, sha, file_path, media_type):
+        """查询缓存中的远端文件，状态为 ACTIVE（或处理中）时直接复用"""
+        entry = self.upload_cache.lookup(sha)
+        if entry is None:
+            return None
+
+        try:
+            media_file = await self.get_file(entry['name'])
+        except GeminiAPIError as e:
+            # 远端文件已被删除或不属于当前 API 密钥
+            logger.info(f"缓存的{media_type}已失效，重新上传: {str(e)[:100]}")
+            self.upload_cache.remove(sha)
+            return None
+
+        if media_file.state == 'PROCESSING':
+            try:
+                media_file = await self.wait_for_file_active(media_file)
+            except (ValueError, TimeoutError):
+                self.upload_cache.remove(sha)
+                return None
+        if media_file.state != 'ACTIVE':
+            self.upload_cache.remove(sha)
+            return None
+
+        logger.info(f"复用已上传的{media_type}，跳过上传: {file_path} -> {media_file.uri}")
+        return media_file
+
+    async def generate_content(self, model, contents, generation_config=None):
+        """调用 generateContent"""
+        if not (isinstance(contents, list) and all(isinstance(c, dict) and 'parts' in c for c in contents)):
+            contents = [to_content(contents)]
+
+        body = {'contents': contents}
+        if generation_config:
+            body['generationConfig'] = generation_config
+
+        limiter = get_rate_limiter(model)
+        estimated = estimate_tokens(contents)
+        _, payload = await self._request(
+            'POST', f"{self.base_url}/{API_VERSION}/models/{model}:generateContent", json=body,
+            limiter=limiter, estimated_tokens=estimated
+        )
+        response = GeminiResponse(payload)
+        if limiter is not None:
+            limiter.record_usage(estimated, response.usage_metadata.total_token_count or estimated)
+        return response
+
+    async def create_batch(self, model, input_file, display_name):
+        """以已上传的 JSONL 请求文件创建批处理任务，批处理请求不经过交互请求的限流器"""
+        body = {'batch': {'display_name': display_name, 'input_config': {'file_name': input_file.name}}}
+        _, payload = await self._request(
+            'POST', f"{self.base_url}/{API_VERSION}/models/{model}:batchGenerateContent", json=body
+        )
+        return BatchJob(payload)
+
+    async def get_batch(self, name):
+        """查询批处理任务的状态"""
+        _, payload = await self._request('GET', f"{self.base_url}/{API_VERSION}/{name}")
+        return BatchJob(payload)
+
+    async def download_file(self, name):
+        """下载 File API 中的文件内容（例如批处理任务的结果文件），返回 bytes"""
+        _, data = await self._request(
+            'GET', f"{self.base_url}/download/{API_VERSION}/{name}:download", params={'alt': 'media'}, raw=True
+        )
+        return data
+
+    def start_chat(self, model, history=None, generation_config=None):
+        """创建多轮对话会话"""
+        return AsyncChatSession(self, model, history=history, generation_config=generation_config)
@@ -0,0 +1,50 @@
+# 提取前合并重叠、相邻的时间段。
+# 模型经常返回首尾相接的时间段（例如 0:19-0:20 和 0:20-0:25），前后各加上缓冲时间后会大量重叠，
+# 同一段画面会被编码两三次。这里先把每个 Appearance 加上缓冲时间，过短的片段扩展到最小长度，
+# 再把重叠或间隔不超过 gap 秒的时间段合并，得到去重后的切割列表。
+
+
+def parse_timestamp(value):
+    """将 "分:秒"、"时:分:秒" 或秒数转换为秒数"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    seconds = 0.0
+    for part in str(value).strip().split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def merge_intervals(intervals, gap=0.0):
+    """合并重叠或间隔不超过 gap 秒的时间段
+
+    intervals 为 (起点, 终点, 来源) 列表，返回按起点排序的 {'start', 'end', 'sources'} 列表。
+    """
+    merged = []
+    for start, end, source in sorted(intervals, key=lambda item: (item[0], item[1])):
+        if merged and start - merged[-1]['end'] <= gap:
+            merged[-1]['end'] = max(merged[-1]['end'], end)
+            merged[-1]['sources'].append(source)
+        else:
+            merged.append({'start': start, 'end': end, 'sources': [source]})
+    return merged
+
+
+def build_cut_list(appearances, buffer=0.0, gap=0.0, min_length=0.0, duration=None):
+    """根据 Appearances 生成去重后的切割列表
+
+    每个时间段前后各加 buffer 秒，短于 min_length 秒的向两侧扩展，超出 [0, duration] 的部分截掉，
+    再合并重叠或间隔不超过 gap 秒的时间段。返回的每一项的 sources 为对应的 Appearances 下标。
+    """
+    intervals = []
+    for index, appearance in enumerate(appearances):
+        start = parse_timestamp(appearance['start']) - buffer
+        end = parse_timestamp(appearance['end']) + buffer
+        if end - start < min_length:
+            pad = (min_length - (end - start)) / 2
+            start, end = start - pad, end + pad
+        start = max(0.0, start)
+        if duration:
+            end = min(end, duration)
+        if end > start:
+            intervals.append((start, end, index))
+    return merge_intervals(intervals, gap)
@@ -0,0 +1,175 @@
+# 持久化的任务台账，记录每个输入视频和每个 Part 已完成到哪个阶段，
+# 程序中途退出后可以从断点继续，而不必重新分割视频、重新分析已有结果的 Part。
+# 台账保存在 outputs/jobs.db（SQLite），阶段依次为：
+#   split（已分割）-> compressed（已压缩）-> uploaded（已上传）-> analysed（已分析）-> extracted（已提取）-> merged（已合并）
+# 虚拟分段模式下不生成分割文件，Part 记录中的 start_time / duration 为该 Part 在原视频中的时间范围。
+# compression 记录每个 Part 是否压缩及原因（例如文件已经小于目标大小时跳过压缩）。
+# model / escalation / tokens / cost 记录每个 Part 最终使用的分析模型、升级到更强模型的原因、Token 数和预计费用。
+# batch_job 记录离线批量模式下 Part 所在的批处理任务，续跑时直接等待该任务的结果，不重复提交。
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join('outputs', 'jobs.db')
+
+STAGES = ('split', 'compressed', 'uploaded', 'analysed', 'extracted', 'merged')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inputs (
+    input_path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    segment_duration REAL,
+    stage TEXT,
+    merged_path TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS parts (
+    part_path TEXT PRIMARY KEY,
+    input_path TEXT,
+    part_number INTEGER,
+    stage TEXT,
+    analysis_path TEXT,
+    upload_name TEXT,
+    json_path TEXT,
+    error TEXT,
+    updated_at TEXT,
+    start_time REAL,
+    duration REAL,
+    compression TEXT,
+    model TEXT,
+    escalation TEXT,
+    tokens INTEGER,
+    cost REAL,
+    batch_job TEXT
+);
+"""
+
+# 旧版本台账中没有的列，打开时补上
+_PART_COLUMNS = {
+    'start_time': 'REAL', 'duration': 'REAL', 'compression': 'TEXT',
+    'model': 'TEXT', 'escalation': 'TEXT', 'tokens': 'INTEGER', 'cost': 'REAL',
+    'batch_job': 'TEXT',
+}
+
+
+def stage_reached(stage, target):
+    """判断 stage 是否已经达到 target 阶段"""
+    if stage not in STAGES:
+        return False
+    return STAGES.index(stage) >= STAGES.index(target)
+
+
+class JobLedger:
+    """基于 SQLite 的任务台账，可在流水线的多个线程中共用"""
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(parts)")}
+            for name, column_type in _PART_COLUMNS.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE parts ADD COLUMN {name} {column_type}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _now():
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # ---------- 输入视频 ----------
+
+    def start_input(self, input_path, segment_duration, resume=False):
+        """登记输入视频，返回可以沿用的台账记录
+
+        非续跑模式、源文件发生变化或分段时长不同时，清空该视频之前的记录并返回 None。
+        """
+        input_path = os.path.abspath(input_path)
+        stat = os.stat(input_path)
+        rows = self._execute("SELECT * FROM inputs WHERE input_path = ?", (input_path,))
+        if rows and resume:
+            row = dict(rows[0])
+            if row['size'] == stat.st_size and row['mtime'] == stat.st_mtime \
+                    and row['segment_duration'] == segment_duration:
+                return row
+            logger.info(f"源视频或分段时长已变化，重新处理: {input_path}")
+
+        self._execute("DELETE FROM parts WHERE input_path = ?", (input_path,))
+        self._execute(
+            "INSERT OR REPLACE INTO inputs (input_path, size, mtime, segment_duration, stage, merged_path, updated_at) "
+            "VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+            (input_path, stat.st_size, stat.st_mtime, segment_duration, self._now())
+        )
+        return None
+
+    def mark_input(self, input_path, stage, merged_path=None):
+        """记录输入视频完成的阶段（split 或 merged）"""
+        self._execute(
+            "UPDATE inputs SET stage = ?, merged_path = COALESCE(?, merged_path), updated_at = ? WHERE input_path = ?",
+            (stage, merged_path, self._now(), os.path.abspath(input_path))
+        )
+
+    def unfinished_inputs(self):
+        """返回尚未完成合并的输入视频路径"""
+        rows = self._execute("SELECT input_path, stage FROM inputs ORDER BY input_path")
+        return [row['input_path'] for row in rows if not stage_reached(row['stage'], 'merged')]
+
+    # ---------- Part ----------
+
+    def add_parts(self, input_path, part_paths):
+        """分割完成后登记所有 Part
+
+        part_paths 为 (Part 路径, Part 编号) 列表；虚拟分段时为 (Part 路径, Part 编号, 起始时间, 时长)。
+        """
+        input_path = os.path.abspath(input_path)
+        for part_path, part_number, *time_range in part_paths:
+            start_time, duration = time_range or (None, None)
+            self._execute(
+                "INSERT OR REPLACE INTO parts (part_path, input_path, part_number, stage, updated_at, start_time, duration) "
+                "VALUES (?, ?, ?, 'split', ?, ?, ?)",
+                (os.path.abspath(part_path), input_path, part_number, self._now(), start_time, duration)
+            )
+
+    def parts_of(self, input_path):
+        """返回输入视频的所有 Part 记录，按 Part 编号排序"""
+        rows = self._execute(
+            "SELECT * FROM parts WHERE input_path = ? ORDER BY part_number", (os.path.abspath(input_path),)
+        )
+        return [dict(row) for row in rows]
+
+    def get_part(self, part_path):
+        rows = self._execute("SELECT * FROM parts WHERE part_path = ?", (os.path.abspath(part_path),))
+        return dict(rows[0]) if rows else None
+
+    def mark_part(self, part_path, stage, **fields):
+        """记录 Part 完成的阶段，同时更新 analysis_path / upload_name / json_path / compression / model 等字段"""
+        columns = {'stage': stage, 'error': None, 'updated_at': self._now()}
+        columns.update(fields)
+        assignments = ', '.join(f"{name} = ?" for name in columns)
+        self._execute(
+            f"UPDATE parts SET {assignments} WHERE part_path = ?",
+            (*columns.values(), os.path.abspath(part_path))
+        )
+
+    def mark_part_failed(self, part_path, error):
+        """记录 Part 的失败原因，阶段保持不变，续跑时从该阶段重新开始"""
+        self._execute(
+            "UPDATE parts SET error = ?, updated_at = ? WHERE part_path = ?",
+            (str(error)[:500], self._now(), os.path.abspath(part_path))
+        )
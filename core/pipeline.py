@@ -0,0 +1,172 @@
+# 多阶段流水线：各阶段之间通过有界队列连接，每个阶段拥有独立的工作线程数。
+# 例如 压缩（CPU）-> 上传分析（网络）-> 片段提取（CPU），
+# 这样 Part N+1 在压缩的同时，Part N 在上传分析，Part N-1 在提取片段。
+# 阶段函数可以是普通函数（每个并发占用一个线程），也可以是协程函数
+# （整个阶段只占用一个线程，在同一个事件循环中同时处理 workers 个任务）。
+
+import asyncio
+import inspect
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_STOP = object()
+
+
+class Stage:
+    """流水线中的一个阶段
+
+    cleanup 为可选的协程函数，协程阶段处理完所有任务后在同一事件循环中调用，
+    用于关闭该阶段使用的异步客户端等资源。
+    """
+
+    def __init__(self, name, func, workers=1, cleanup=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.cleanup = cleanup
+        self.is_async = inspect.iscoroutinefunction(func)
+
+    @property
+    def threads(self):
+        """该阶段占用的线程数"""
+        return 1 if self.is_async else self.workers
+
+
+class _Job:
+    """流水线中流转的任务"""
+
+    def __init__(self, index, value):
+        self.index = index
+        self.value = value
+        self.error = None
+
+
+class StagePipeline:
+    """由有界队列连接的多阶段流水线
+
+    每个阶段的函数接收上一阶段的返回值，并返回交给下一阶段的值。
+    某个阶段抛出异常时，该任务会跳过后续阶段，并在结果中记录异常。
+    """
+
+    def __init__(self, stages, queue_size=2):
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+
+    def run(self, items):
+        """送入所有任务并等待完成，返回与输入顺序一致的 (是否成功, 结果或异常) 列表"""
+        items = list(items)
+        results = [None] * len(items)
+
+        # 第 i 个队列是第 i 个阶段的输入，最后一个队列收集结果
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(queue.Queue())
+
+        threads = []
+        for stage_idx, stage in enumerate(self.stages):
+            remaining = [stage.threads]
+            lock = threading.Lock()
+            for worker_idx in range(stage.threads):
+                thread = threading.Thread(
+                    target=self._async_worker if stage.is_async else self._worker,
+                    args=(stage_idx, queues[stage_idx], queues[stage_idx + 1], remaining, lock),
+                    name=f"{stage.name}-{worker_idx + 1}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        # 送入任务，队列满时会阻塞，从而限制每个阶段积压的任务数
+        for index, item in enumerate(items):
+            queues[0].put(_Job(index, item))
+        for _ in range(self.stages[0].threads):
+            queues[0].put(_STOP)
+
+        for thread in threads:
+            thread.join()
+
+        while not queues[-1].empty():
+            job = queues[-1].get()
+            if job is _STOP:
+                continue
+            if job.error is None:
+                results[job.index] = (True, job.value)
+            else:
+                results[job.index] = (False, job.error)
+
+        return results
+
+    def _worker(self, stage_idx, in_queue, out_queue, remaining, lock):
+        """单个阶段的工作线程"""
+        stage = self.stages[stage_idx]
+        while True:
+            job = in_queue.get()
+            if job is _STOP:
+                break
+
+            if job.error is None:
+                try:
+                    job.value = stage.func(job.value)
+                except Exception as e:
+                    logger.error(f"[{stage.name}] 任务 {job.index + 1} 处理失败: {str(e)}")
+                    job.error = e
+
+            out_queue.put(job)
+
+        self._finish_worker(stage_idx, out_queue, remaining, lock)
+
+    def _async_worker(self, stage_idx, in_queue, out_queue, remaining, lock):
+        """协程阶段的工作线程，在独立的事件循环中运行"""
+        asyncio.run(self._run_async_stage(stage_idx, in_queue, out_queue))
+        self._finish_worker(stage_idx, out_queue, remaining, lock)
+
+    async def _run_async_stage(self, stage_idx, in_queue, out_queue):
+        """在事件循环中同时处理最多 workers 个任务"""
+        stage = self.stages[stage_idx]
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(stage.workers)
+        tasks = set()
+
+        async def handle(job):
+            try:
+                if job.error is None:
+                    try:
+                        job.value = await stage.func(job.value)
+                    except Exception as e:
+                        logger.error(f"[{stage.name}] 任务 {job.index + 1} 处理失败: {str(e)}")
+                        job.error = e
+                await loop.run_in_executor(None, out_queue.put, job)
+            finally:
+                semaphore.release()
+
+        try:
+            while True:
+                await semaphore.acquire()
+                job = await loop.run_in_executor(None, in_queue.get)
+                if job is _STOP:
+                    semaphore.release()
+                    break
+                task = asyncio.create_task(handle(job))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            if stage.cleanup is not None:
+                await stage.cleanup()
+
+    def _finish_worker(self, stage_idx, out_queue, remaining, lock):
+        """本阶段最后一个退出的线程负责通知下一阶段结束"""
+        with lock:
+            remaining[0] -= 1
+            is_last = remaining[0] == 0
+        if is_last:
+            next_threads = self.stages[stage_idx + 1].threads if stage_idx + 1 < len(self.stages) else 1
+            for _ in range(next_threads):
+                out_queue.put(_STOP)
@@ -0,0 +1,192 @@
+# 基于 ffprobe 的媒体信息查询，替代各脚本中通过 ffmpeg -i 的输出文本解析时长的做法。
+# 一次 ffprobe 调用同时得到时长、码率、分辨率、帧率、各路流信息和关键帧间隔，
+# 结果按 路径 + 修改时间 + 文件大小 缓存在进程内，同一文件重复查询不会再启动子进程；
+# 多个文件（例如分割后的所有 Part）可以通过 probe_many 并发查询。
+# keyframe_times 读取整个文件的关键帧时间，供片段提取时对齐关键帧（core/clips.py）。
+
+import json
+import logging
+import os
+import statistics
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+FFPROBE = 'ffprobe'
+
+# 估算关键帧间隔时读取的时长（秒），只读取数据包不解码，开销很小
+KEYFRAME_SAMPLE_SECONDS = 60
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _parse_rate(value):
+    """解析 24000/1001 形式的帧率"""
+    try:
+        num, _, den = str(value).partition('/')
+        return float(num) / float(den or 1) if float(den or 1) else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _to_float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class MediaInfo:
+    """ffprobe 返回的媒体信息"""
+
+    def __init__(self, path, data):
+        self.path = path
+        self.raw = data
+        fmt = data.get('format', {})
+        self.streams = data.get('streams', [])
+        self.duration = _to_float(fmt.get('duration'))
+        self.bit_rate = int(_to_float(fmt.get('bit_rate')))
+        self.size = int(_to_float(fmt.get('size')))
+        self.format_name = fmt.get('format_name', '')
+
+        video = self.video_stream or {}
+        audio = self.audio_stream or {}
+        self.width = int(video.get('width') or 0)
+        self.height = int(video.get('height') or 0)
+        self.fps = _parse_rate(video.get('avg_frame_rate') or video.get('r_frame_rate'))
+        self.video_codec = video.get('codec_name')
+        self.video_bit_rate = int(_to_float(video.get('bit_rate')))
+        self.audio_codec = audio.get('codec_name')
+        self.audio_bit_rate = int(_to_float(audio.get('bit_rate')))
+
+        # 采样范围内视频流的关键帧时间
+        video_index = video.get('index')
+        self.keyframes = sorted(
+            _to_float(packet.get('pts_time'))
+            for packet in data.get('packets', [])
+            if packet.get('stream_index') == video_index and 'K' in packet.get('flags', '')
+            and packet.get('pts_time') not in (None, 'N/A')
+        )
+
+    @property
+    def video_stream(self):
+        return next((s for s in self.streams if s.get('codec_type') == 'video'), None)
+
+    @property
+    def audio_stream(self):
+        return next((s for s in self.streams if s.get('codec_type') == 'audio'), None)
+
+    @property
+    def has_audio(self):
+        return self.audio_stream is not None
+
+    @property
+    def keyframe_interval(self):
+        """关键帧间隔（秒），取采样范围内相邻关键帧间隔的中位数，无法估算时为 0"""
+        gaps = [b - a for a, b in zip(self.keyframes, self.keyframes[1:]) if b > a]
+        return statistics.median(gaps) if gaps else 0.0
+
+
+def _cache_key(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime, stat.st_size
+
+
+def probe(path):
+    """查询媒体信息，结果按 路径 + 修改时间 + 文件大小 缓存"""
+    key = _cache_key(path)
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+
+    cmd = [
+        FFPROBE, '-v', 'error', '-of', 'json',
+        '-show_entries', 'format:stream:packet=stream_index,pts_time,flags',
+        '-read_intervals', f'%+{KEYFRAME_SAMPLE_SECONDS}',
+        str(path)
+    ]
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        encoding='utf-8',
+        errors='ignore'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe 执行失败: {result.stderr.strip()[:500]}")
+
+    info = MediaInfo(key[0], json.loads(result.stdout or '{}'))
+    with _cache_lock:
+        _cache[key] = info
+    return info
+
+
+def probe_many(paths, max_workers=None):
+    """并发查询多个文件，返回 {路径: MediaInfo}，查询失败的文件不在结果中"""
+    paths = list(paths)
+    max_workers = max_workers or min(8, os.cpu_count() or 1)
+    results = {}
+
+    def safe_probe(path):
+        try:
+            return probe(path)
+        except Exception as e:
+            logger.error(f"获取视频信息失败: {path}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, info in zip(paths, executor.map(safe_probe, paths)):
+            if info is not None:
+                results[path] = info
+    return results
+
+
+def get_duration(path):
+    """获取媒体时长（秒），失败时返回 0"""
+    try:
+        duration = probe(path).duration
+    except Exception as e:
+        logger.error(f"获取视频信息失败: {str(e)}")
+        return 0
+    if duration == 0:
+        logger.warning(f"无法从视频中获取时长信息: {path}")
+    return duration
+
+
+def keyframe_times(path):
+    """读取视频流所有关键帧的时间（秒），只读取数据包不解码，结果同样按文件缓存"""
+    key = ('keyframes',) + _cache_key(path)
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+
+    cmd = [
+        FFPROBE, '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0',
+        str(path)
+    ]
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        encoding='utf-8',
+        errors='ignore'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe 执行失败: {result.stderr.strip()[:500]}")
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(float(pts_time))
+    keyframes.sort()
+
+    with _cache_lock:
+        _cache[key] = keyframes
+    return keyframes
@@ -0,0 +1,135 @@
+# 所有 Gemini 请求共用的限流与重试调度。
+# 按模型配置每分钟请求数（rpm）和每分钟 Token 数（tpm），用令牌桶让并发的请求刚好保持在配额以内；
+# 请求失败时按指数退避加随机抖动重试，服务端给出 Retry-After / retryDelay 时以服务端为准，
+# 并让同一模型的其他请求一起暂停，避免并发请求接连触发 429。
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# 默认配额（免费层级），可在各脚本的 MODEL_RATE_LIMITS 中覆盖
+DEFAULT_MODEL_RATE_LIMITS = {
+    'gemini-1.5-pro': {'rpm': 2, 'tpm': 32000},
+    'gemini-1.5-flash': {'rpm': 15, 'tpm': 1000000},
+    'gemini-2.0-flash-exp': {'rpm': 10, 'tpm': 4000000},
+}
+
+
+class TokenBucket:
+    """令牌桶，按预约方式计算需要等待的时间，可在多个线程和事件循环之间共享"""
+
+    def __init__(self, capacity, per_seconds=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """预约 amount 个令牌，返回需要等待的秒数（余额可以暂时为负）"""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def adjust(self, amount):
+        """按实际用量修正余额，amount 为正表示多用了令牌"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+
+    def block(self, seconds):
+        """在 seconds 秒内不再发放令牌"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class ModelRateLimiter:
+    """单个模型的请求数和 Token 数限流器"""
+
+    def __init__(self, model, rpm, tpm=None):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def reserve(self, estimated_tokens=0):
+        """预约一次请求，返回需要等待的秒数"""
+        wait = self.requests.reserve(1)
+        if self.tokens is not None and estimated_tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        return wait
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """请求完成（或失败，actual_tokens 为 0）后按实际 Token 用量修正"""
+        if self.tokens is not None and estimated_tokens != actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def block(self, seconds):
+        """收到 429 后让该模型的所有请求一起暂停"""
+        self.requests.block(seconds)
+
+
+_limiters = {}
+_model_limits = dict(DEFAULT_MODEL_RATE_LIMITS)
+_registry_lock = threading.Lock()
+
+
+def configure_rate_limits(limits):
+    """覆盖或补充各模型的配额，例如 {'gemini-1.5-flash': {'rpm': 1000, 'tpm': 4000000}}"""
+    with _registry_lock:
+        for model, limit in (limits or {}).items():
+            _model_limits[model] = limit
+            _limiters.pop(model, None)
+
+
+def get_rate_limiter(model):
+    """获取模型对应的全局限流器，未配置配额的模型返回 None"""
+    with _registry_lock:
+        if model not in _limiters:
+            limit = _model_limits.get(model)
+            _limiters[model] = ModelRateLimiter(model, limit['rpm'], limit.get('tpm')) if limit else None
+        return _limiters[model]
+
+
+def backoff_delay(attempt, base=2.0, cap=120.0):
+    """指数退避加随机抖动（full jitter）"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(header_value=None, body=None):
+    """解析服务端建议的重试等待时间（秒），支持 Retry-After 头和 Gemini 错误详情中的 retryDelay"""
+    if header_value:
+        try:
+            return max(0.0, float(header_value))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(header_value)
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    if body:
+        try:
+            details = json.loads(body).get('error', {}).get('details', [])
+        except (ValueError, AttributeError):
+            details = []
+        for detail in details:
+            match = re.match(r'^([\d.]+)s$', str(detail.get('retryDelay', '')))
+            if match:
+                return float(match.group(1))
+    return None
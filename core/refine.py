@@ -0,0 +1,122 @@
+# 分析结果的补充查询。
+# 测试记录显示每个 Part 越往后遗漏越多（"往后有较多遗漏"、"后面少了一小段"），
+# 原来只能把整个视频重新切成更短的 Part 全部重新分析。
+# 这里检查每个 Part 的 Appearances，找出可疑的空白时间段：
+#   - 最后一个时间段结束到 Part 结尾之间超过 REFINE_TAIL_GAP 秒（尾部遗漏）
+#   - 两个时间段之间超过 REFINE_MIN_GAP 秒，或整个 Part 都没有结果
+# 然后只对这些时间段用较便宜的模型补充查询：复用已上传的文件，通过 video_metadata 的 start_offset / end_offset
+# 只让模型看这一段，不需要重新上传或切割视频；补充结果限制在空白时间段内，再与原结果合并。
+
+import logging
+
+from core.appearances import STRUCTURED_GENERATION_CONFIG, parse_appearances
+from core.gemini_client import to_content
+from core.intervals import merge_intervals, parse_timestamp
+from core.timeline import format_timestamp
+
+logger = logging.getLogger(__name__)
+
+REFINE_TAIL_GAP = 30  # 尾部空白超过该值（秒）时补充查询
+REFINE_MIN_GAP = 60  # 中间空白超过该值（秒）时补充查询
+REFINE_PADDING = 2  # 查询范围向两侧扩展的秒数，避免漏掉跨越空白边界的画面
+REFINE_MAX_QUERIES = 2  # 每个 Part 最多补充查询的次数，优先查询尾部和较长的空白
+
+
+def find_gaps(appearances, duration, tail_gap=REFINE_TAIL_GAP, min_gap=REFINE_MIN_GAP,
+              max_queries=REFINE_MAX_QUERIES):
+    """返回需要补充查询的空白时间段 [(起点, 终点)]，按起点排序"""
+    if duration <= 0:
+        return []
+    intervals = []
+    for index, appearance in enumerate(appearances):
+        try:
+            intervals.append((parse_timestamp(appearance['start']), parse_timestamp(appearance['end']), index))
+        except (KeyError, ValueError):
+            continue
+    covered = merge_intervals(intervals)
+
+    gaps = []
+    previous_end = 0.0
+    for interval in covered:
+        if interval['start'] - previous_end > min_gap:
+            gaps.append((previous_end, interval['start']))
+        previous_end = max(previous_end, interval['end'])
+    tail = duration - previous_end
+    if tail > (tail_gap if covered else min_gap):
+        gaps.append((previous_end, duration))
+
+    # 尾部空白优先，其余按长度排序
+    gaps.sort(key=lambda gap: (gap[1] < duration, -(gap[1] - gap[0])))
+    return sorted(gaps[:max_queries])
+
+
+def range_prompt(prompt, start, end):
+    """在原来的视频分析提示词前加上只分析某一段的说明"""
+    return (f"这次只分析视频中 {format_timestamp(start)} 到 {format_timestamp(end)} 这一段，"
+            f"之前的分析可能遗漏了这一段中的画面。输出的时间使用完整视频中的时间。\n{prompt}")
+
+
+def _video_range_part(media_file, start, end):
+    part = media_file.to_part()
+    part['video_metadata'] = {'start_offset': f'{start:.3f}s', 'end_offset': f'{end:.3f}s'}
+    return part
+
+
+def _clamp_to_range(appearances, start, end):
+    """把补充结果限制在查询范围内
+
+    模型可能返回完整视频中的时间，也可能返回相对于该段开头的时间；
+    所有结果都落在 [0, 查询时长] 内而不在查询范围内时，按相对时间处理。
+    """
+    items = []
+    for appearance in appearances:
+        try:
+            items.append((parse_timestamp(appearance['start']), parse_timestamp(appearance['end']), appearance))
+        except ValueError:
+            continue
+    if items and start > 0 and all(item_end <= end - start and item_start < start for item_start, item_end, _ in items):
+        items = [(item_start + start, item_end + start, appearance) for item_start, item_end, appearance in items]
+
+    clamped = []
+    for item_start, item_end, appearance in items:
+        item_start, item_end = max(item_start, start), min(item_end, end)
+        if item_end <= item_start:
+            continue
+        clamped.append(dict(appearance, start=format_timestamp(item_start), end=format_timestamp(item_end)))
+    return clamped
+
+
+async def refine_appearances(client, model, media_file, appearances, duration, prompt, history=None, tag=''):
+    """对空白时间段补充查询，返回合并并按起点排序后的 Appearances
+
+    history 为角色特征分析轮的对话历史，补充查询与原分析使用相同的角色信息。
+    单次补充查询失败时只记录日志，保留原来的结果。
+    """
+    gaps = find_gaps(appearances, duration)
+    if not gaps:
+        return appearances
+
+    added = []
+    for gap_start, gap_end in gaps:
+        start = max(0.0, gap_start - REFINE_PADDING)
+        end = min(duration, gap_end + REFINE_PADDING)
+        logger.info(f"{tag} 补充查询空白时间段 {format_timestamp(start)} - {format_timestamp(end)}（{model}）")
+        content = to_content([range_prompt(prompt, start, end), _video_range_part(media_file, start, end)])
+        try:
+            response = await client.generate_content(
+                model, list(history or []) + [content], generation_config=STRUCTURED_GENERATION_CONFIG
+            )
+        except Exception as e:
+            logger.warning(f"{tag} 补充查询失败，保留原结果: {str(e)}")
+            continue
+        result = parse_appearances(response.text)
+        if not result:
+            continue
+        found = _clamp_to_range(result['Appearances'], start, end)
+        logger.info(f"{tag} 补充查询找到 {len(found)} 个时间段，"
+                    f"Token: {response.usage_metadata.total_token_count}")
+        added.extend(found)
+
+    if not added:
+        return appearances
+    return sorted(list(appearances) + added, key=lambda appearance: parse_timestamp(appearance['start']))
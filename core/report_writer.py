@@ -0,0 +1,43 @@
+# 分析报告（Markdown）的后台写入。
+# 报告只供查看，JSON 更新直接使用内存中的分析结果，写报告不需要阻塞分析流程：
+# 写入任务交给一个后台线程按提交顺序执行，批处理结束前调用 flush 等待全部写完。
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+
+class ReportWriter:
+    """在后台线程中写入分析报告"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report_writer')
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def submit(self, output_file, write):
+        """提交写入任务，write 为负责写入 output_file 的无参函数"""
+        future = self._executor.submit(self._write, output_file, write)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _write(self, output_file, write):
+        try:
+            write()
+            logger.info(f"分析报告已保存到: {output_file}")
+        except Exception as e:
+            logger.error(f"写入分析报告失败: {output_file}: {str(e)}")
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def flush(self):
+        """等待已提交的报告全部写完"""
+        with self._lock:
+            pending = list(self._futures)
+        wait(pending)
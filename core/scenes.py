@@ -0,0 +1,108 @@
+# 按镜头切换分段。
+# 按固定 SEGMENT_DURATION 分割时，分割点落在每个整点之后的第一个关键帧上，经常切在镜头中间，
+# 跨越分割点的出场会被两个 Part 各报告一次，或者两边都因为太短而漏掉。
+# 这里先用缩小分辨率、降低帧率后的画面做一遍镜头检测（ffmpeg select='gt(scene,阈值)'），
+# 再把 Part 数按 ceil(总时长 / 目标时长) 确定、各分割点先取均分位置，
+# 然后移动到 SCENE_SEARCH_WINDOW 秒内最近的镜头切换处，Part 时长保持均衡且不超过目标时长太多。
+# 直接复制分割时分割点只能落在关键帧上，此时优先选择与镜头切换重合的关键帧（编码器通常在镜头切换处插入关键帧），
+# 没有时取窗口内离均分位置最近的关键帧；虚拟分段从原视频精确定位，可以直接使用镜头切换的时间。
+
+import bisect
+import logging
+import math
+import re
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = 'ffmpeg'
+
+SCENE_THRESHOLD = 0.3  # 画面变化超过该值（0~1）视为镜头切换
+SCENE_DETECT_WIDTH = 160  # 镜头检测时缩小到的宽度
+SCENE_DETECT_FPS = 5  # 镜头检测时的帧率，切换时间的精度约为 1 / SCENE_DETECT_FPS 秒
+SCENE_SEARCH_WINDOW = 20  # 分割点离均分位置的最大距离（秒）
+SCENE_KEYFRAME_TOLERANCE = 0.5  # 关键帧与镜头切换相距不超过该值（秒）时视为重合
+
+_PTS_PATTERN = re.compile(r'pts_time:\s*([0-9.]+)')
+
+
+def scene_changes(path, threshold=SCENE_THRESHOLD):
+    """检测镜头切换，返回切换时间（秒）的有序列表，失败时抛出 RuntimeError"""
+    cmd = [
+        FFMPEG, '-hide_banner', '-nostats',
+        '-i', path,
+        '-an', '-sn',
+        '-vf', f"fps={SCENE_DETECT_FPS},scale={SCENE_DETECT_WIDTH}:-2,select='gt(scene,{threshold})',showinfo",
+        '-f', 'null', '-'
+    ]
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        encoding='utf-8',
+        errors='ignore'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 镜头检测失败: {result.stderr.strip()[-500:]}")
+    # showinfo 把每个选中帧的信息输出到 stderr
+    return sorted(
+        float(match.group(1)) for line in result.stderr.splitlines()
+        if 'Parsed_showinfo' in line for match in [_PTS_PATTERN.search(line)] if match
+    )
+
+
+def _nearest(times, target, low, high):
+    """返回 times（有序）中位于 (low, high] 区间内、离 target 最近的时间，没有时返回 None"""
+    position = bisect.bisect_left(times, target)
+    candidates = [t for t in times[max(0, position - 1):position + 1] if low < t <= high]
+    if not candidates:
+        # 与 target 相邻的两个时间都不在区间内时，区间内不会有更近的时间
+        return None
+    return min(candidates, key=lambda t: abs(t - target))
+
+
+def plan_boundaries(duration, segment_duration, scenes, keyframes=None, window=SCENE_SEARCH_WINDOW):
+    """根据镜头切换计算各 Part 的分割点（不含开头和结尾）
+
+    keyframes 不为空时分割点只能落在关键帧上；窗口内没有合适的时间时使用均分位置。
+    """
+    count = max(1, math.ceil(duration / segment_duration - 1e-6))
+    if keyframes:
+        # 与镜头切换重合的关键帧
+        candidates = [
+            keyframe for keyframe in keyframes
+            if _nearest(scenes, keyframe, keyframe - SCENE_KEYFRAME_TOLERANCE,
+                        keyframe + SCENE_KEYFRAME_TOLERANCE) is not None
+        ]
+    else:
+        candidates = list(scenes)
+
+    boundaries = []
+    previous = 0.0
+    for index in range(1, count):
+        # 按剩余时长重新均分，前面的分割点偏移后后面的 Part 仍然均衡
+        ideal = previous + (duration - previous) / (count - index + 1)
+        low = max(previous, ideal - window)
+        high = min(duration, ideal + window)
+        boundary = _nearest(candidates, ideal, low, high)
+        if boundary is None and keyframes:
+            boundary = _nearest(keyframes, ideal, low, high)
+        if boundary is None:
+            boundary = ideal
+        boundaries.append(boundary)
+        previous = boundary
+    return boundaries
+
+
+def scene_boundaries(path, duration, segment_duration, keyframes=None):
+    """检测镜头切换并计算分割点，检测失败时返回 None（调用方改用固定时长分段）"""
+    try:
+        scenes = scene_changes(path)
+    except Exception as e:
+        logger.warning(f"镜头检测失败，改为按固定时长分段: {str(e)}")
+        return None
+    boundaries = plan_boundaries(duration, segment_duration, scenes, keyframes)
+    logger.info(f"检测到 {len(scenes)} 处镜头切换，分割点: "
+                f"{', '.join(f'{boundary:.1f}' for boundary in boundaries) or '无'}")
+    return boundaries
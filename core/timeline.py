@@ -0,0 +1,81 @@
+# 全局时间轴：把各 Part 中相对于 Part 开头的时间换算成相对于原视频开头的绝对时间。
+# 第 N 个 Part 的偏移量为前 N-1 个 Part 的时长之和（取自合并结果中的 part_times），
+# 换算后的时间轴可以直接用来从未分割的原视频中切出所有片段。
+# TimelineIndex 把所有时间段合并成按起点排序、互不重叠的区间，
+# 通过二分查找在 O(log n) 内回答“第 t 秒画面中有什么”。
+
+from bisect import bisect_right
+
+from core.intervals import merge_intervals, parse_timestamp
+
+
+def format_timestamp(seconds):
+    """将秒数转换为 "时:分:秒" 格式，有小数时保留到毫秒"""
+    seconds = round(max(0.0, float(seconds)), 3)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    whole = int(secs)
+    fraction = f'{secs - whole:.3f}'[1:].rstrip('0').rstrip('.')
+    return f'{int(hours)}:{int(minutes):02d}:{whole:02d}{fraction}'
+
+
+def part_offsets(part_times):
+    """根据 part_times（按 Part 顺序排列的 {'part', 'time'}）计算每个 Part 在原视频中的起始时间"""
+    offsets = {}
+    elapsed = 0.0
+    for item in part_times:
+        offsets[item['part']] = elapsed
+        elapsed += float(item['time'])
+    return offsets
+
+
+def to_absolute(appearance, offset):
+    """返回换算成绝对时间的 Appearance 副本
+
+    start / end 改为原视频中的绝对时间，原来相对于 Part 的时间保留在 part_start / part_end 中。
+    """
+    start = parse_timestamp(appearance['start']) + offset
+    end = parse_timestamp(appearance['end']) + offset
+    absolute = dict(appearance)
+    absolute['start'] = format_timestamp(start)
+    absolute['end'] = format_timestamp(end)
+    absolute['part_start'] = appearance['start']
+    absolute['part_end'] = appearance['end']
+    return absolute
+
+
+class TimelineIndex:
+    """按绝对时间查询 Appearances 的区间索引"""
+
+    def __init__(self, appearances):
+        self.appearances = list(appearances)
+        intervals = [
+            (parse_timestamp(appearance['start']), parse_timestamp(appearance['end']), index)
+            for index, appearance in enumerate(self.appearances)
+        ]
+        # 合并重叠的时间段后区间互不重叠，起点和终点都是有序的，可以直接二分查找
+        self.intervals = merge_intervals(intervals)
+        self.starts = [interval['start'] for interval in self.intervals]
+
+    def at(self, seconds):
+        """返回第 seconds 秒画面中出现的所有 Appearances"""
+        position = bisect_right(self.starts, seconds) - 1
+        if position < 0 or self.intervals[position]['end'] < seconds:
+            return []
+        return [
+            self.appearances[index] for index in self.intervals[position]['sources']
+            if parse_timestamp(self.appearances[index]['start']) <= seconds
+            <= parse_timestamp(self.appearances[index]['end'])
+        ]
+
+    def to_json(self):
+        """索引的可序列化形式：按起点排序的 {'start', 'end', 'appearances'}，appearances 为下标列表"""
+        return [
+            {'start': interval['start'], 'end': interval['end'], 'appearances': interval['sources']}
+            for interval in self.intervals
+        ]
+
+    @classmethod
+    def from_merged(cls, merged_data):
+        """从合并后的 JSON（已经是绝对时间）构建索引"""
+        return cls(merged_data.get('Appearances', []))
@@ -0,0 +1,147 @@
+# 上传前压缩 Part 使用的编码配置。
+# Gemini 分析视频时大约每秒只取 1 帧，按原分辨率、原帧率以 -preset medium 压缩到 COMPRESSION_SIZE，
+# 大部分编码工作都被浪费了，而压缩是每个 Part 最主要的 CPU 开销。
+#   size     - 原来的方式：按目标大小计算视频码率，libx264 medium，AAC 128k
+#   analysis - 分析代理：缩小分辨率、降低帧率，使用 veryfast + CRF，音频降为单声道低码率（可去掉音频），
+#              并以目标大小对应的码率作为上限，编码耗时和上传大小都明显下降
+# 视频编码器通过 core/encoders.py 中的后端名称选择，encoder 为 auto 时按本机的测量结果选择最快的后端。
+# benchmark 用同一个样本依次运行各配置和编码器，比较编码耗时和输出大小，参考 component/3.14compress_benchmark.py
+# compression_decision 根据 ffprobe 得到的大小、时长和码率判断压缩是否有意义，已经足够小的 Part 直接上传。
+
+import logging
+import os
+import subprocess
+import tempfile
+import time
+
+from core.encoders import ENCODERS, resolve_encoder, video_args
+from core.probe import get_duration
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = 'ffmpeg'
+
+COMPRESSION_PROFILES = ('size', 'analysis')
+
+# size 配置的音频码率和最低视频码率
+AUDIO_BITRATE = 128 * 1024
+MIN_VIDEO_BITRATE = 100 * 1024
+
+# analysis 配置的参数
+ANALYSIS_MAX_HEIGHT = 480  # 输出的最大高度，低于该高度的视频不放大
+ANALYSIS_FPS = 2  # 输出帧率，略高于 Gemini 的采样帧率
+ANALYSIS_AUDIO_BITRATE = '48k'  # 单声道 AAC
+ANALYSIS_KEYFRAME_SECONDS = 5  # 关键帧间隔（秒），边压缩边上传时每个分片的最长时长
+
+# 各配置的默认编码器，encoder 为 auto 且本机没有测量结果时使用
+DEFAULT_ENCODERS = {'size': 'x264-medium', 'analysis': 'x264-veryfast'}
+
+# 不压缩也可以直接上传给 Gemini 的容器格式
+UPLOADABLE_EXTENSIONS = ('.mp4', '.mov', '.avi', '.wmv', '.mpg', '.mpeg', '.webm', '.flv', '.3gp')
+
+
+def target_video_bitrate(duration, target_size_mb, remove_audio=False):
+    """按目标大小计算视频码率（bit/s），过低时使用最低码率"""
+    target_size_bits = target_size_mb * 8 * 1024 * 1024
+    audio_bitrate = 0 if remove_audio else AUDIO_BITRATE
+    video_bitrate = int((target_size_bits / duration) - audio_bitrate)
+    if video_bitrate < MIN_VIDEO_BITRATE:
+        logger.warning("计算出的视频比特率太低，使用最低比特率")
+        video_bitrate = MIN_VIDEO_BITRATE
+    return video_bitrate
+
+
+def compression_decision(info, target_size_mb, remove_audio=False):
+    """根据媒体信息判断是否需要压缩，返回 (是否压缩, 原因)
+
+    文件已经不超过目标大小，或码率不高于压缩后的码率（目标码率过低时会被提高到最低码率，
+    压缩后的文件反而可能更大）时不压缩；需要去掉音频或容器格式不能直接上传时仍然压缩。
+    """
+    if not info.path.lower().endswith(UPLOADABLE_EXTENSIONS):
+        return True, f"{os.path.splitext(info.path)[1]} 格式不能直接上传"
+    if remove_audio and info.has_audio:
+        return True, "需要去掉音频"
+    if info.duration <= 0:
+        return True, "无法获取视频时长"
+
+    target_bytes = target_size_mb * 1024 * 1024
+    if 0 < info.size <= target_bytes:
+        return False, f"文件大小 {info.size / 1024 / 1024:.2f}MB 不超过目标大小 {target_size_mb}MB"
+
+    audio_bitrate = 0 if remove_audio else AUDIO_BITRATE
+    output_bitrate = max(target_bytes * 8 / info.duration, MIN_VIDEO_BITRATE + audio_bitrate)
+    if 0 < info.bit_rate <= output_bitrate:
+        return False, f"码率 {info.bit_rate / 1024:.0f}k 不高于压缩后的码率 {output_bitrate / 1024:.0f}k"
+    return True, f"文件大小 {info.size / 1024 / 1024:.2f}MB，码率 {info.bit_rate / 1024:.0f}k，超过目标"
+
+
+def encode_args(profile, duration, target_size_mb, remove_audio=False, encoder=None):
+    """返回压缩使用的编码参数（不含输入和输出文件）
+
+    encoder 为 core/encoders.py 中的后端名称或 auto，默认使用该配置的默认编码器。
+    """
+    if profile not in COMPRESSION_PROFILES:
+        raise ValueError(f"不支持的压缩配置: {profile}")
+    encoder = resolve_encoder(encoder or DEFAULT_ENCODERS[profile], profile, target_size_mb,
+                              DEFAULT_ENCODERS[profile])
+
+    video_bitrate = target_video_bitrate(duration, target_size_mb, remove_audio)
+    if encoder == 'copy':
+        # 直接复制视频流时不能缩放或改变帧率，只处理音频
+        logger.info("视频流直接复制，不重新编码")
+        args = video_args(encoder)
+        audio_args = ['-c:a', 'aac', '-b:a', '128k']
+    elif profile == 'size':
+        logger.info(f"[{encoder}] 目标视频比特率：{video_bitrate/1024:.2f}k")
+        args = video_args(encoder, bitrate=video_bitrate)
+        audio_args = ['-c:a', 'aac', '-b:a', '128k']
+    else:
+        logger.info(f"[{encoder}] 分析代理：最大高度 {ANALYSIS_MAX_HEIGHT}，{ANALYSIS_FPS}fps，"
+                    f"CRF {ENCODERS[encoder]['crf']}，码率上限 {video_bitrate/1024:.2f}k")
+        args = [
+            '-vf', f"scale=-2:'min(ih,{ANALYSIS_MAX_HEIGHT})',fps={ANALYSIS_FPS}",
+            *video_args(encoder, maxrate=video_bitrate, quality=True),  # 码率上限保证不超过目标大小
+            '-g', str(ANALYSIS_FPS * ANALYSIS_KEYFRAME_SECONDS),
+        ]
+        audio_args = ['-c:a', 'aac', '-b:a', ANALYSIS_AUDIO_BITRATE, '-ac', '1']
+    return args + (['-an'] if remove_audio else audio_args)
+
+
+def benchmark(input_file, profiles=COMPRESSION_PROFILES, target_size_mb=50, part_duration=180, sample_seconds=60,
+              remove_audio=False, encoders=None):
+    """用样本的前 sample_seconds 秒依次运行各压缩配置和编码器，返回每一组的编码耗时、速度（倍速）和输出大小
+
+    目标码率按 part_duration 秒的 Part 压缩到 target_size_mb 计算，与流水线中实际使用的码率一致；
+    part_mb 为按样本时长换算的每个 Part 的预计上传大小。encoders 默认只运行各配置的默认编码器。
+    """
+    encoded_seconds = min(sample_seconds, get_duration(input_file) or sample_seconds)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='compress_benchmark_') as tmp_dir:
+        for profile in profiles:
+            for encoder in encoders or [DEFAULT_ENCODERS[profile]]:
+                output_file = os.path.join(tmp_dir, f'{profile}_{encoder}.mp4')
+                cmd = [
+                    FFMPEG, '-v', 'error', '-y',
+                    '-t', str(sample_seconds), '-i', input_file,
+                    *encode_args(profile, part_duration, target_size_mb, remove_audio, encoder=encoder),
+                    output_file
+                ]
+                start_time = time.perf_counter()
+                result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        universal_newlines=True, encoding='utf-8', errors='ignore')
+                elapsed = time.perf_counter() - start_time
+                entry = {'profile': profile, 'encoder': encoder, 'ok': False, 'seconds': elapsed,
+                         'speed': 0.0, 'size': 0, 'part_mb': 0.0}
+                if result.returncode != 0:
+                    logger.error(f"[{profile}/{encoder}] 压缩失败: {result.stderr.strip()[-500:]}")
+                    results.append(entry)
+                    continue
+                size = os.path.getsize(output_file)
+                entry.update({
+                    'ok': True,
+                    'speed': encoded_seconds / elapsed if elapsed else 0.0,
+                    'size': size,
+                    'part_mb': size / (1024 * 1024) * part_duration / encoded_seconds,
+                })
+                results.append(entry)
+    return results
@@ -0,0 +1,95 @@
+# 按文件内容哈希缓存上传结果，避免重复上传同一个文件（例如每个视频都要用到的角色图片，
+# 或重跑失败批次时已经上传过的视频片段）。
+# 缓存保存在 outputs/upload_cache.json，记录远端文件名、URI、MIME 类型和过期时间；
+# 是否可以复用由 AsyncGeminiClient.upload_media 查询远端文件状态后决定。
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('outputs', 'upload_cache.json')
+
+# 距离过期不足该时长的缓存视为失效，避免分析过程中远端文件被删除
+EXPIRY_MARGIN = timedelta(minutes=30)
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """计算文件内容的 SHA-256"""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def parse_expiration_time(value):
+    """解析 API 返回的 UTC 时间，例如 2025-01-07T12:00:00.123456Z"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return None
+
+
+class UploadCache:
+    """以文件内容哈希为键的持久化上传缓存"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"上传缓存读取失败，将重新建立: {str(e)}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, sha):
+        """返回未过期的缓存记录，没有或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(sha)
+        if entry is None:
+            return None
+
+        expiration = parse_expiration_time(entry.get('expiration_time'))
+        if expiration is not None and expiration - EXPIRY_MARGIN <= datetime.utcnow():
+            self.remove(sha)
+            return None
+        return entry
+
+    def store(self, sha, file_path, media_file):
+        """记录上传结果"""
+        with self._lock:
+            self._entries[sha] = {
+                'name': media_file.name,
+                'uri': media_file.uri,
+                'mime_type': media_file.mime_type,
+                'expiration_time': media_file.expiration_time,
+                'source': os.path.abspath(file_path),
+                'uploaded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self._save()
+
+    def remove(self, sha):
+        """删除失效的缓存记录"""
+        with self._lock:
+            if self._entries.pop(sha, None) is not None:
+                self._save()
@@ -0,0 +1,69 @@
+# 测试共用的 fixture：在后台线程中启动 component/3.13gemini_stub_server.py，
+# 让 core/gemini_client.py、core/rate_limiter.py 和 core/batch_api.py 不联网即可完整地跑一遍。
+
+import asyncio
+import importlib.util
+import os
+import socket
+import threading
+
+import pytest
+from aiohttp import web
+
+STUB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'component', '3.13gemini_stub_server.py')
+
+
+def _load_stub():
+    spec = importlib.util.spec_from_file_location('gemini_stub_server', STUB_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='session')
+def stub_server():
+    """启动桩服务器，返回其地址（作为 AsyncGeminiClient 的 base_url）"""
+    stub = _load_stub()
+    # 上传地址和文件 URI 中使用桩服务器模块的 HOST / PORT
+    stub.PORT = _free_port()
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(stub.create_app())
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, stub.HOST, stub.PORT).start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    no_proxy = os.environ.get('NO_PROXY')
+    os.environ['NO_PROXY'] = ','.join(filter(None, [no_proxy, stub.HOST]))
+    try:
+        yield f"http://{stub.HOST}:{stub.PORT}"
+    finally:
+        if no_proxy is None:
+            os.environ.pop('NO_PROXY', None)
+        else:
+            os.environ['NO_PROXY'] = no_proxy
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """不实际等待的 asyncio.sleep，记录每次请求等待的秒数（文件处理轮询、限流等待、批处理任务轮询）"""
+    waits = []
+    real_sleep = asyncio.sleep
+
+    async def fast_sleep(seconds, *args, **kwargs):
+        waits.append(seconds)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', fast_sleep)
+    return waits
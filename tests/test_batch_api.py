@@ -0,0 +1,108 @@
+# core/batch_api.py 对桩服务器的测试：提交 JSONL 请求、轮询任务状态、下载并按 key 分发结果
+
+import asyncio
+import json
+
+import pytest
+
+from core import batch_api
+from core.appearances import STRUCTURED_GENERATION_CONFIG
+from core.batch_api import BatchJobError, batch_line, batch_results, parse_results, submit_batch, wait_for_batch
+from core.gemini_client import AsyncGeminiClient, BatchJob, GeminiAPIError, GeminiResponse, to_content
+
+
+@pytest.fixture
+def batch_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_api, 'BATCH_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_submit_and_collect_results(stub_server, sleeps, batch_dir):
+    lines = [batch_line(f'part{i}.mp4', [to_content(f'分析第 {i} 段')], STRUCTURED_GENERATION_CONFIG)
+             for i in (1, 2)]
+
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            job = await submit_batch(client, 'stub-model', lines, 'test_batch')
+            assert job.state == 'BATCH_STATE_PENDING'
+            return await batch_results(client, job.name, poll_interval=5)
+
+    results = asyncio.run(scenario())
+    assert set(results) == {'part1.mp4', 'part2.mp4'}
+    assert all(isinstance(result, GeminiResponse) for result in results.values())
+    assert json.loads(results['part1.mp4'].text)['Appearances'][0]['start'] == '0:05'
+    # 请求文件和结果文件都保存在 BATCH_DIR 中
+    assert (batch_dir / 'test_batch_requests.jsonl').exists()
+    assert len(list(batch_dir.glob('*_results.jsonl'))) == 1
+    # PENDING -> RUNNING -> SUCCEEDED，每次按 poll_interval 等待
+    assert sleeps.count(5) == 2
+
+
+def test_wait_for_batch_times_out(stub_server, sleeps, batch_dir):
+    lines = [batch_line('part1.mp4', [to_content('分析')])]
+
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            job = await submit_batch(client, 'stub-model', lines, 'timeout_batch')
+            await wait_for_batch(client, job.name, poll_interval=0, timeout=-1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(scenario())
+
+
+def test_unknown_batch_is_terminal(stub_server, sleeps):
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            await batch_results(client, 'batches/missing', poll_interval=0)
+
+    with pytest.raises(BatchJobError) as excinfo:
+        asyncio.run(scenario())
+    assert excinfo.value.status == 404
+
+
+class FakeBatchClient:
+    """依次返回给定的任务状态，或抛出给定的异常"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+
+    async def get_batch(self, name):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return BatchJob({'name': name, 'metadata': {'state': reply}})
+
+
+def test_failed_job_is_terminal(sleeps):
+    client = FakeBatchClient('BATCH_STATE_RUNNING', 'BATCH_STATE_FAILED')
+    with pytest.raises(BatchJobError):
+        asyncio.run(wait_for_batch(client, 'batches/1', poll_interval=0))
+
+
+def test_server_errors_are_not_terminal(sleeps):
+    # 429 / 5xx 重试耗尽时任务可能仍在运行，调用方应保留任务名继续等待
+    for status in (429, 503):
+        client = FakeBatchClient('BATCH_STATE_RUNNING', GeminiAPIError('unavailable', status=status))
+        with pytest.raises(GeminiAPIError) as excinfo:
+            asyncio.run(wait_for_batch(client, 'batches/1', poll_interval=0))
+        assert not isinstance(excinfo.value, BatchJobError)
+
+
+def test_parse_results_separates_errors():
+    response = {'candidates': [{'content': {'parts': [{'text': 'ok'}]}}], 'usageMetadata': {'totalTokenCount': 3}}
+    data = '\n'.join([
+        json.dumps({'key': 'a', 'response': response}),
+        '',
+        json.dumps({'key': 'b', 'error': {'code': 400, 'message': 'bad request'}}),
+        json.dumps({'key': 'c', 'response': {'promptFeedback': {'blockReason': 'SAFETY'}}}),
+    ]).encode('utf-8')
+
+    results = parse_results(data)
+    assert results['a'].text == 'ok'
+    assert isinstance(results['b'], GeminiAPIError) and results['b'].status == 400
+    # 没有候选结果的响应同样按失败处理
+    assert isinstance(results['c'], GeminiAPIError)
+
+
+def test_batch_line_omits_empty_generation_config():
+    assert batch_line('k', []) == {'key': 'k', 'request': {'contents': []}}
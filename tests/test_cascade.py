@@ -0,0 +1,47 @@
+# core/cascade.py 的单元测试：模型级联的结果校验和费用估算
+
+from core.cascade import response_cost, validate_result
+from core.gemini_client import UsageMetadata
+
+
+def result(*ranges):
+    return {'Appearances': [{'start': start, 'end': end} for start, end in ranges]}
+
+
+def test_unparsed_result_escalates():
+    assert validate_result(None, 180) == "结果无法解析"
+
+
+def test_no_appearances_is_valid():
+    # 角色不在该 Part 中出现是正常的
+    assert validate_result(result(), 180) is None
+
+
+def test_sufficient_coverage_is_valid():
+    assert validate_result(result(('0:05', '0:15')), 180) is None
+
+
+def test_sparse_coverage_escalates():
+    assert validate_result(result(('0:05', '0:06')), 180).startswith("覆盖率过低")
+
+
+def test_out_of_range_times_escalate():
+    assert validate_result(result(('0:10', '0:05')), 180).startswith("时间段超出范围")
+    assert validate_result(result(('2:50', '3:10')), 180).startswith("时间段超出范围")
+    # 在 TIME_TOLERANCE 以内不视为错误
+    assert validate_result(result(('2:50', '3:01')), 180) is None
+
+
+def test_unparsable_time_escalates():
+    assert validate_result(result(('abc', '0:10')), 180).startswith("无法解析的时间")
+
+
+def test_unknown_duration_skips_coverage():
+    assert validate_result(result(('0:05', '0:06')), 0) is None
+
+
+def test_response_cost():
+    usage = UsageMetadata({'promptTokenCount': 1_000_000, 'candidatesTokenCount': 500_000})
+    prices = {'pro': {'input': 1.25, 'output': 5.0}}
+    assert response_cost('pro', usage, prices) == 3.75
+    assert response_cost('flash', usage, prices) == 0.0
@@ -0,0 +1,81 @@
+# core/clips.py 的单元测试：切割方式的选择和 smart 模式的编码参数，不需要 ffmpeg
+
+from core.clips import _batch_copy_cmd, _batch_encode_cmd, _smart_encode_args, plan_cut
+
+KEYFRAMES = [0.0, 10.0, 20.0, 30.0]
+
+
+def test_encode_mode_never_snaps():
+    assert plan_cut(KEYFRAMES, 10.5, 15, 'encode') == ('encode', 10.5, None)
+
+
+def test_copy_mode_snaps_to_previous_keyframe():
+    assert plan_cut(KEYFRAMES, 18.0, 25, 'copy', snap_tolerance=1.0) == ('copy', 10.0, None)
+
+
+def test_auto_mode_snaps_within_tolerance():
+    assert plan_cut(KEYFRAMES, 10.5, 15, 'auto', snap_tolerance=1.0) == ('copy', 10.0, None)
+
+
+def test_auto_mode_uses_smart_beyond_tolerance():
+    assert plan_cut(KEYFRAMES, 12.0, 25, 'auto', snap_tolerance=1.0) == ('smart', 12.0, 20.0)
+
+
+def test_smart_mode_is_frame_exact():
+    # 起点距前一个关键帧不到 snap_tolerance 时也不能提前
+    assert plan_cut(KEYFRAMES, 10.5, 25, 'smart', snap_tolerance=1.0) == ('smart', 10.5, 20.0)
+
+
+def test_smart_mode_copies_when_start_is_keyframe():
+    assert plan_cut(KEYFRAMES, 20.0, 25, 'smart') == ('copy', 20.0, None)
+
+
+def test_smart_mode_encodes_when_no_keyframe_before_end():
+    assert plan_cut(KEYFRAMES, 10.5, 15, 'smart') == ('encode', 10.5, None)
+
+
+def test_no_keyframes_falls_back_to_encode():
+    for mode in ('auto', 'copy', 'smart'):
+        assert plan_cut([], 5.0, 8.0, mode) == ('encode', 5.0, None)
+
+
+def test_smart_encode_args_match_source_h264():
+    args = _smart_encode_args({'codec_name': 'h264', 'profile': 'High', 'level': 41,
+                               'pix_fmt': 'yuv420p', 'refs': 4})
+    assert args[args.index('-c:v') + 1] == 'libx264'
+    assert args[args.index('-profile:v') + 1] == 'high'
+    assert args[args.index('-level:v') + 1] == '4.1'
+    assert args[args.index('-pix_fmt') + 1] == 'yuv420p'
+    assert args[args.index('-x264-params') + 1] == 'repeat-headers=1:ref=4'
+
+
+def test_smart_encode_args_hevc_level():
+    args = _smart_encode_args({'codec_name': 'hevc', 'profile': 'Main 10', 'level': 153})
+    assert args[args.index('-profile:v') + 1] == 'main10'
+    assert args[args.index('-x265-params') + 1] == 'repeat-headers=1:level-idc=5.1'
+
+
+def test_smart_encode_args_unsupported_codec():
+    assert _smart_encode_args({'codec_name': 'vp9'}) is None
+
+
+def test_batch_copy_seeks_each_input_past_keyframe():
+    cmd = _batch_copy_cmd('src.mp4', [('a.mp4', 10.0104, 15.0), ('b.mp4', 20.0, 22.5)])
+    # 每个片段各自在输入端定位，定位时间不早于关键帧
+    assert cmd.count('-i') == 2
+    first, second = [i for i, arg in enumerate(cmd) if arg == '-ss']
+    assert float(cmd[first + 1]) >= 10.0104 and cmd[first + 1] == '10.011'
+    assert cmd[second + 1] == '20.001'
+    assert cmd.index('-ss') < cmd.index('-i')
+    assert cmd[cmd.index('1:v:0') - 1] == '-map'
+
+
+def test_batch_encode_shares_threads_between_outputs():
+    jobs = [('a.mp4', 10.0, 12.0), ('b.mp4', 20.0, 25.0), ('c.mp4', 30.0, 31.0), ('d.mp4', 40.0, 42.0)]
+    cmd = _batch_encode_cmd('src.mp4', jobs, has_audio=True, threads=8, encoder='x264-medium')
+    input_index = cmd.index('-i')
+    # 解码和滤镜使用整个进程的线程数，各输出平分编码线程
+    assert cmd[cmd.index('-filter_threads') + 1] == '8'
+    assert cmd[cmd.index('-threads') + 1] == '8' and cmd.index('-threads') < input_index
+    output_threads = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-threads' and i > input_index]
+    assert output_threads == ['2'] * 4
@@ -0,0 +1,103 @@
+# core/gemini_client.py 对桩服务器的测试：上传、文件状态轮询、generateContent、多轮对话和分块上传
+
+import asyncio
+import json
+
+import pytest
+
+from core import gemini_client
+from core.appearances import STRUCTURED_GENERATION_CONFIG, parse_appearances
+from core.gemini_client import AsyncGeminiClient, GeminiAPIError, to_content
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_upload_file_and_wait_for_active(stub_server, sleeps, tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(b'0' * 1000)
+
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            media_file = await client.upload_file(str(path))
+            assert media_file.state == 'PROCESSING'
+            assert media_file.mime_type == 'video/mp4'
+            media_file = await client.wait_for_file_active(media_file, poll_interval=1)
+            return media_file, await client.get_file(media_file.name)
+
+    media_file, fetched = run(scenario())
+    assert media_file.state == 'ACTIVE'
+    # 桩服务器第一次查询仍返回 PROCESSING，第二次查询时为 ACTIVE
+    assert sleeps == [1, 1]
+    assert fetched.uri == media_file.uri
+
+
+def test_get_missing_file_is_not_retried(stub_server, sleeps):
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            await client.get_file('files/missing')
+
+    with pytest.raises(GeminiAPIError) as excinfo:
+        run(scenario())
+    assert excinfo.value.status == 404
+    assert sleeps == []
+
+
+def test_generate_content_returns_text_and_usage(stub_server):
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            return await client.generate_content('stub-model', '分析视频')
+
+    response = run(scenario())
+    assert parse_appearances(response.text)['Appearances'][0]['start'] == '0:05'
+    assert response.usage_metadata.total_token_count == 150
+
+
+def test_structured_output_is_plain_json(stub_server):
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            return await client.generate_content('stub-model', '分析视频', STRUCTURED_GENERATION_CONFIG)
+
+    response = run(scenario())
+    assert json.loads(response.text)['Appearances'][0]['clip'] == 'clip_1'
+
+
+def test_chat_session_keeps_history(stub_server):
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            chat = client.start_chat('stub-model')
+            await chat.send_message('角色特征')
+            response = await chat.send_message('分析视频')
+            return chat, response
+
+    chat, response = run(scenario())
+    assert [content['role'] for content in chat.history] == ['user', 'model', 'user', 'model']
+    # 第二轮请求带上了第一轮的问答，共 3 个 contents
+    assert response.usage_metadata.prompt_token_count == 300
+
+
+def test_upload_stream_in_chunks(stub_server, monkeypatch):
+    monkeypatch.setattr(gemini_client, 'UPLOAD_CHUNK_SIZE', 256 * 1024)
+    data = bytes(range(256)) * 2000
+
+    async def chunks():
+        for offset in range(0, len(data), 100000):
+            yield data[offset:offset + 100000]
+
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            media_file = await client.upload_stream(chunks(), 'video/mp4', 'stream.mp4')
+            return media_file, await client.download_file(media_file.name)
+
+    media_file, downloaded = run(scenario())
+    assert media_file.mime_type == 'video/mp4'
+    assert downloaded == data
+
+
+def test_to_content_wraps_text_and_files():
+    file = gemini_client.GeminiFile({'name': 'files/a', 'uri': 'http://x/files/a', 'mimeType': 'video/mp4'})
+    content = to_content(['提示词', file])
+    assert content['role'] == 'user'
+    assert content['parts'][0] == {'text': '提示词'}
+    assert content['parts'][1]['file_data']['file_uri'] == 'http://x/files/a'
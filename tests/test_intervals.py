@@ -0,0 +1,53 @@
+# core/intervals.py 的单元测试：时间解析和重叠、相邻时间段的合并
+
+import pytest
+
+from core.intervals import build_cut_list, merge_intervals, parse_timestamp
+
+
+def test_parse_timestamp_formats():
+    assert parse_timestamp('1:05') == 65
+    assert parse_timestamp('1:00:05.5') == 3605.5
+    assert parse_timestamp(' 42 ') == 42
+    assert parse_timestamp(7) == 7.0
+
+
+def test_parse_timestamp_rejects_text():
+    with pytest.raises(ValueError):
+        parse_timestamp('abc')
+
+
+def test_merge_overlapping_and_touching():
+    merged = merge_intervals([(20, 25, 'b'), (0, 10, 'a'), (10, 12, 'c'), (30, 40, 'd')])
+    assert merged == [
+        {'start': 0, 'end': 12, 'sources': ['a', 'c']},
+        {'start': 20, 'end': 25, 'sources': ['b']},
+        {'start': 30, 'end': 40, 'sources': ['d']},
+    ]
+
+
+def test_merge_within_gap():
+    merged = merge_intervals([(0, 10, 0), (12, 15, 1), (20, 22, 2)], gap=2)
+    assert [(item['start'], item['end']) for item in merged] == [(0, 15), (20, 22)]
+
+
+def test_contained_interval_keeps_outer_end():
+    merged = merge_intervals([(0, 30, 0), (5, 10, 1)])
+    assert merged == [{'start': 0, 'end': 30, 'sources': [0, 1]}]
+
+
+def test_build_cut_list_buffers_and_merges():
+    appearances = [{'start': '0:19', 'end': '0:20'}, {'start': '0:20', 'end': '0:25'}, {'start': '1:00', 'end': '1:10'}]
+    cuts = build_cut_list(appearances, buffer=1)
+    assert [(cut['start'], cut['end'], cut['sources']) for cut in cuts] == [(18, 26, [0, 1]), (59, 71, [2])]
+
+
+def test_build_cut_list_min_length_and_duration():
+    appearances = [{'start': '0:00', 'end': '0:01'}, {'start': '0:58', 'end': '0:59'}]
+    cuts = build_cut_list(appearances, min_length=4, duration=60)
+    # 过短的时间段向两侧扩展，超出 [0, duration] 的部分截掉
+    assert [(cut['start'], cut['end']) for cut in cuts] == [(0, 2.5), (56.5, 60)]
+
+
+def test_build_cut_list_drops_ranges_outside_duration():
+    assert build_cut_list([{'start': '2:00', 'end': '2:10'}], duration=60) == []
@@ -0,0 +1,83 @@
+# core/job_ledger.py 的单元测试：台账的登记、续跑和失败记录
+
+import os
+
+import pytest
+
+from core.job_ledger import JobLedger, stage_reached
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = JobLedger(str(tmp_path / 'outputs' / 'jobs.db'))
+    yield ledger
+    ledger.close()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'ep1.mp4'
+    path.write_bytes(b'video')
+    return str(path)
+
+
+def test_stage_reached():
+    assert stage_reached('analysed', 'uploaded')
+    assert stage_reached('merged', 'merged')
+    assert not stage_reached('split', 'analysed')
+    assert not stage_reached(None, 'split')
+
+
+def test_resume_keeps_parts(ledger, source, tmp_path):
+    assert ledger.start_input(source, 600) is None
+    ledger.add_parts(source, [(str(tmp_path / 'Part1.mp4'), 1), (str(tmp_path / 'Part2.mp4'), 2)])
+    ledger.mark_input(source, 'split')
+    ledger.mark_part(str(tmp_path / 'Part1.mp4'), 'analysed', json_path='Part1.json', tokens=150)
+
+    record = ledger.start_input(source, 600, resume=True)
+    assert record['stage'] == 'split'
+    parts = ledger.parts_of(source)
+    assert [(part['part_number'], part['stage']) for part in parts] == [(1, 'analysed'), (2, 'split')]
+    assert parts[0]['json_path'] == 'Part1.json' and parts[0]['tokens'] == 150
+    assert ledger.unfinished_inputs() == [os.path.abspath(source)]
+
+
+def test_changed_segment_duration_restarts(ledger, source, tmp_path):
+    ledger.start_input(source, 600)
+    ledger.add_parts(source, [(str(tmp_path / 'Part1.mp4'), 1)])
+    assert ledger.start_input(source, 300, resume=True) is None
+    assert ledger.parts_of(source) == []
+
+
+def test_without_resume_restarts(ledger, source, tmp_path):
+    ledger.start_input(source, 600)
+    ledger.add_parts(source, [(str(tmp_path / 'Part1.mp4'), 1)])
+    assert ledger.start_input(source, 600) is None
+    assert ledger.parts_of(source) == []
+
+
+def test_failure_keeps_stage(ledger, source, tmp_path):
+    part = str(tmp_path / 'Part1.mp4')
+    ledger.start_input(source, 600)
+    ledger.add_parts(source, [(part, 1)])
+    ledger.mark_part(part, 'uploaded', upload_name='files/abc', batch_job='batches/1')
+    ledger.mark_part_failed(part, TimeoutError('等待超时'))
+    record = ledger.get_part(part)
+    assert (record['stage'], record['error'], record['batch_job']) == ('uploaded', '等待超时', 'batches/1')
+
+    # 之后成功时清除失败原因
+    ledger.mark_part(part, 'analysed')
+    assert ledger.get_part(part)['error'] is None
+
+
+def test_virtual_parts_record_time_range(ledger, source):
+    ledger.start_input(source, 600)
+    ledger.add_parts(source, [(source + '#part2', 2, 600.0, 600.0)])
+    part = ledger.parts_of(source)[0]
+    assert (part['start_time'], part['duration']) == (600.0, 600.0)
+
+
+def test_merged_input_is_finished(ledger, source):
+    ledger.start_input(source, 600)
+    ledger.mark_input(source, 'merged', merged_path='merged.json')
+    assert ledger.unfinished_inputs() == []
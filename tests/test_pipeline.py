@@ -0,0 +1,65 @@
+# core/pipeline.py 的单元测试：多阶段流水线的结果顺序、失败传递和协程阶段
+
+import asyncio
+import threading
+
+import pytest
+
+from core.pipeline import Stage, StagePipeline
+
+
+def test_results_keep_input_order():
+    pipeline = StagePipeline([Stage('加一', lambda x: x + 1, workers=3), Stage('翻倍', lambda x: x * 2, workers=2)])
+    assert pipeline.run(range(10)) == [(True, (x + 1) * 2) for x in range(10)]
+
+
+def test_failed_item_skips_later_stages():
+    calls = []
+
+    def check(x):
+        if x == 2:
+            raise ValueError('bad')
+        return x
+
+    def record(x):
+        calls.append(x)
+        return x
+
+    results = StagePipeline([Stage('检查', check), Stage('记录', record)]).run([1, 2, 3])
+    assert results[0] == (True, 1) and results[2] == (True, 3)
+    assert results[1][0] is False and isinstance(results[1][1], ValueError)
+    assert sorted(calls) == [1, 3]
+
+
+def test_async_stage_runs_concurrently_in_one_thread():
+    active = {'now': 0, 'max': 0}
+    threads = set()
+    cleaned = []
+
+    async def analyse(x):
+        threads.add(threading.get_ident())
+        active['now'] += 1
+        active['max'] = max(active['max'], active['now'])
+        await asyncio.sleep(0.01)
+        active['now'] -= 1
+        return x * 10
+
+    async def cleanup():
+        cleaned.append(True)
+
+    stage = Stage('分析', analyse, workers=4, cleanup=cleanup)
+    assert stage.threads == 1
+    results = StagePipeline([Stage('准备', lambda x: x), stage], queue_size=8).run(range(8))
+    assert results == [(True, x * 10) for x in range(8)]
+    assert len(threads) == 1
+    assert active['max'] > 1
+    assert cleaned == [True]
+
+
+def test_empty_input():
+    assert StagePipeline([Stage('空', lambda x: x)]).run([]) == []
+
+
+def test_requires_a_stage():
+    with pytest.raises(ValueError):
+        StagePipeline([])
@@ -0,0 +1,92 @@
+# core/rate_limiter.py 的测试：令牌桶、服务端重试时间的解析，以及 generateContent 经过限流器时的等待
+
+import asyncio
+import json
+
+import pytest
+
+from core import rate_limiter
+from core.gemini_client import AsyncGeminiClient
+from core.rate_limiter import (ModelRateLimiter, TokenBucket, backoff_delay, configure_rate_limits,
+                               get_rate_limiter, parse_retry_after)
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """每个测试使用独立的配额表和限流器"""
+    monkeypatch.setattr(rate_limiter, '_limiters', {})
+    monkeypatch.setattr(rate_limiter, '_model_limits', dict(rate_limiter.DEFAULT_MODEL_RATE_LIMITS))
+
+
+def test_bucket_waits_once_capacity_is_used():
+    bucket = TokenBucket(2, per_seconds=60)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    # 每 30 秒补充一个令牌
+    assert bucket.reserve(1) == pytest.approx(30, abs=0.1)
+
+
+def test_bucket_block_delays_reservations():
+    bucket = TokenBucket(10)
+    bucket.block(5)
+    assert bucket.reserve(1) == pytest.approx(5, abs=0.1)
+
+
+def test_oversized_reservation_is_capped_at_capacity():
+    bucket = TokenBucket(100)
+    assert bucket.reserve(1000) == 0
+
+
+def test_record_usage_charges_actual_tokens():
+    limiter = ModelRateLimiter('m', rpm=100, tpm=1000)
+    assert limiter.reserve(estimated_tokens=100) == 0
+    limiter.record_usage(100, 1000)
+    # 实际多用了 900 个 Token，余额为 0，下一次请求需要等待
+    assert limiter.reserve(estimated_tokens=60) == pytest.approx(3.6, abs=0.1)
+
+
+def test_configure_rate_limits_replaces_limiter(limits):
+    assert get_rate_limiter('unknown-model') is None
+    configure_rate_limits({'unknown-model': {'rpm': 5}})
+    limiter = get_rate_limiter('unknown-model')
+    assert limiter.requests.capacity == 5
+    assert limiter.tokens is None
+    assert get_rate_limiter('unknown-model') is limiter
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('7') == 7.0
+    body = json.dumps({'error': {'details': [{'@type': 'RetryInfo', 'retryDelay': '12s'}]}})
+    assert parse_retry_after(None, body) == 12.0
+    assert parse_retry_after('invalid', 'not json') is None
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=2, cap=30) <= 30
+
+
+def test_generate_content_waits_for_rpm(stub_server, sleeps, limits):
+    configure_rate_limits({'stub-model': {'rpm': 2, 'tpm': 1000000}})
+
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            for _ in range(3):
+                await client.generate_content('stub-model', '分析视频')
+
+    asyncio.run(scenario())
+    # 前两个请求不等待，第三个请求等待补充一个请求令牌（约 30 秒）
+    assert len(sleeps) == 1
+    assert sleeps[0] == pytest.approx(30, abs=0.5)
+
+
+def test_generate_content_corrects_token_estimate(stub_server, limits):
+    configure_rate_limits({'stub-model': {'rpm': 100, 'tpm': 1000}})
+
+    async def scenario():
+        async with AsyncGeminiClient('test-key', base_url=stub_server) as client:
+            await client.generate_content('stub-model', '分析视频')
+
+    asyncio.run(scenario())
+    # 桩服务器报告单轮请求用了 150 个 Token
+    assert get_rate_limiter('stub-model').tokens.tokens == pytest.approx(850, abs=1)
@@ -0,0 +1,40 @@
+# core/refine.py 的单元测试：需要补充查询的空白时间段
+
+from core.refine import find_gaps
+
+
+def appearance(start, end):
+    return {'start': start, 'end': end}
+
+
+def test_no_gaps_when_covered():
+    assert find_gaps([appearance('0:00', '1:50'), appearance('2:00', '2:50')], 180) == []
+
+
+def test_tail_gap():
+    assert find_gaps([appearance('0:00', '1:00')], 180, tail_gap=30) == [(60, 180)]
+
+
+def test_middle_gap_longer_than_min_gap():
+    gaps = find_gaps([appearance('0:00', '0:30'), appearance('2:00', '2:55')], 180, min_gap=60)
+    assert gaps == [(30, 120)]
+
+
+def test_empty_part_uses_min_gap():
+    assert find_gaps([], 50, min_gap=60) == []
+    assert find_gaps([], 180, min_gap=60) == [(0.0, 180)]
+
+
+def test_tail_first_then_longest_within_max_queries():
+    appearances = [appearance('1:10', '1:20'), appearance('3:00', '3:10'), appearance('6:00', '6:10')]
+    gaps = find_gaps(appearances, 600, tail_gap=30, min_gap=60, max_queries=2)
+    # 尾部空白 370~600 优先，其余空白中选最长的 190~360
+    assert gaps == [(190, 360), (370, 600)]
+
+
+def test_invalid_appearances_are_ignored():
+    assert find_gaps([{'start': 'bad', 'end': '0:10'}, {'end': '0:20'}, appearance('0:00', '2:55')], 180) == []
+
+
+def test_zero_duration():
+    assert find_gaps([], 0) == []
@@ -0,0 +1,41 @@
+# core/scenes.py 的单元测试：按镜头切换和关键帧计算分割点，不需要 ffmpeg
+
+import pytest
+
+from core.scenes import _nearest, plan_boundaries
+
+
+def test_nearest_within_range():
+    times = [10.0, 20.0, 30.0]
+    assert _nearest(times, 22, 0, 100) == 20.0
+    assert _nearest(times, 26, 0, 100) == 30.0
+    assert _nearest(times, 22, 20, 25) is None
+    assert _nearest([], 5, 0, 10) is None
+
+
+def test_single_part_has_no_boundaries():
+    assert plan_boundaries(500, 600, [100.0]) == []
+
+
+def test_boundaries_snap_to_scene_changes():
+    assert plan_boundaries(1800, 600, [590.0, 1210.0]) == [590.0, 1210.0]
+
+
+def test_falls_back_to_even_split_outside_window():
+    boundaries = plan_boundaries(1200, 600, [100.0], window=20)
+    assert boundaries == [pytest.approx(600)]
+
+
+def test_later_boundaries_rebalance_remaining_duration():
+    # 第一个分割点提前到 580 后，剩余 1220 秒均分，第二个理想位置为 1190
+    assert plan_boundaries(1800, 600, [580.0, 1195.0], window=30) == [580.0, 1195.0]
+
+
+def test_keyframes_must_match_scene_changes():
+    keyframes = [0.0, 590.0, 595.2, 610.0]
+    # 只有 595.2 与镜头切换（595.0）重合
+    assert plan_boundaries(1200, 600, [595.0], keyframes=keyframes) == [595.2]
+
+
+def test_keyframes_without_scene_change_use_nearest_keyframe():
+    assert plan_boundaries(1200, 600, [], keyframes=[0.0, 585.0, 607.0]) == [607.0]
@@ -0,0 +1,45 @@
+# core/timeline.py 的单元测试：绝对时间换算和按时间查询的区间索引
+
+from core.timeline import TimelineIndex, format_timestamp, part_offsets, to_absolute
+
+
+def test_format_timestamp():
+    assert format_timestamp(0) == '0:00:00'
+    assert format_timestamp(3725) == '1:02:05'
+    assert format_timestamp(65.25) == '0:01:05.25'
+    assert format_timestamp(-3) == '0:00:00'
+
+
+def test_part_offsets_accumulate_durations():
+    offsets = part_offsets([{'part': 1, 'time': '600'}, {'part': 2, 'time': 599.5}, {'part': 3, 'time': 300}])
+    assert offsets == {1: 0.0, 2: 600.0, 3: 1199.5}
+
+
+def test_to_absolute_keeps_part_times():
+    appearance = {'clip': 'clip_1', 'start': '0:05', 'end': '0:10'}
+    absolute = to_absolute(appearance, 600)
+    assert absolute == {'clip': 'clip_1', 'start': '0:10:05', 'end': '0:10:10', 'part_start': '0:05', 'part_end': '0:10'}
+    assert appearance['start'] == '0:05'
+
+
+def test_index_lookup():
+    appearances = [
+        {'clip': 'a', 'start': '0:00:10', 'end': '0:00:20'},
+        {'clip': 'b', 'start': '0:00:15', 'end': '0:00:30'},
+        {'clip': 'c', 'start': '0:01:00', 'end': '0:01:05'},
+    ]
+    index = TimelineIndex(appearances)
+    assert [item['clip'] for item in index.at(12)] == ['a']
+    assert [item['clip'] for item in index.at(18)] == ['a', 'b']
+    assert [item['clip'] for item in index.at(25)] == ['b']
+    assert index.at(5) == []
+    assert index.at(45) == []
+    assert [item['clip'] for item in index.at(65)] == ['c']
+    assert index.to_json() == [
+        {'start': 10, 'end': 30, 'appearances': [0, 1]},
+        {'start': 60, 'end': 65, 'appearances': [2]},
+    ]
+
+
+def test_index_from_merged_without_appearances():
+    assert TimelineIndex.from_merged({}).at(10) == []